@@ -5,12 +5,17 @@ This module implements an admin interface for customizing the Muse Summoner syst
 It provides web routes for modifying configuration, managing muses, and viewing system status.
 """
 
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, Response, stream_with_context
 import os
 import json
+import datetime
 from config import get_config, set_config, save_config, reset_config
-from muse_profiles import get_all_muses, get_muse_by_name
+from muse_profiles import MuseProfile, get_all_muses, get_muse_by_name, add_muse
 from memory_system import clear_muse_memory
+from data_transfer import iter_compressed_export, validate_record, ImportJob, get_import_progress
+from analytics_job import load_analytics_report
+from http_cache import cached_response
+from asset_pipeline import register_asset_pipeline
 
 # Create a Blueprint for the admin routes
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -54,8 +59,7 @@ def admin_reset_config():
 @admin_bp.route('/muses')
 def admin_muses():
     """Render the muse management page."""
-    muses = get_all_muses()
-    return render_template('admin/muses.html', muses=muses)
+    return cached_response('admin_muses', lambda: render_template('admin/muses.html', muses=get_all_muses()), 'text/html')
 
 @admin_bp.route('/muses/<muse_name>')
 def admin_muse_detail(muse_name):
@@ -93,7 +97,7 @@ def admin_system():
     memory_files = []
     
     if os.path.exists(memory_dir):
-        memory_files = [f for f in os.listdir(memory_dir) if f.endswith('_memory.json')]
+        memory_files = [f for f in os.listdir(memory_dir) if f.endswith(('_memory.json', '_memory.seg'))]
     
     system_info = {
         'memory_files': memory_files,
@@ -101,7 +105,13 @@ def admin_system():
         'config_file': os.path.exists('config.json')
     }
     
-    return render_template('admin/system.html', system_info=system_info)
+    # Aggregates are computed offline by analytics_job.py; only the report is read here
+    analytics = load_analytics_report()
+    if analytics:
+        generated = datetime.datetime.fromtimestamp(analytics['generated_at'])
+        analytics['generated_display'] = generated.strftime("%Y-%m-%d %H:%M")
+    
+    return render_template('admin/system.html', system_info=system_info, analytics=analytics)
 
 @admin_bp.route('/export', methods=['GET'])
 def admin_export():
@@ -136,8 +146,12 @@ def admin_import():
                 set_config(key, value)
             save_config()
         
-        # Import muses (would need additional implementation)
-        # This is a placeholder for future implementation
+        # Import muses
+        for muse_data in data.get('muses', []):
+            error = validate_record({'type': 'muse', 'data': muse_data})
+            if error:
+                raise ValueError(error)
+            add_muse(MuseProfile.from_dict(muse_data))
         
         return jsonify({
             'success': True,
@@ -149,10 +163,70 @@ def admin_import():
             'message': f'Error importing data: {str(e)}'
         })
 
+@admin_bp.route('/export/stream', methods=['GET'])
+def admin_export_stream():
+    """Stream muse profiles and their memories as gzip-compressed NDJSON."""
+    include_memories = request.args.get('memories', 'true').lower() != 'false'
+    
+    return Response(
+        stream_with_context(iter_compressed_export(include_memories)),
+        mimetype='application/gzip',
+        headers={'Content-Disposition': 'attachment; filename=muse_summoner_export.ndjson.gz'}
+    )
+
+@admin_bp.route('/import/stream', methods=['POST'])
+def admin_import_stream():
+    """
+    Import muse profiles and memories from an NDJSON upload.
+    
+    The body is read as a stream and committed in chunks. Pass the job_id from
+    a previous response to resume an interrupted import after its last checkpoint.
+    """
+    try:
+        job = ImportJob(request.args.get('job_id'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    compressed = (request.mimetype in ('application/gzip', 'application/x-gzip')
+                  or request.headers.get('Content-Encoding') == 'gzip')
+    progress = job.run(request.stream, compressed=compressed)
+    
+    return jsonify({
+        'success': progress['status'] == 'completed',
+        'job_id': job.job_id,
+        'progress': progress
+    })
+
+@admin_bp.route('/import/<job_id>', methods=['GET'])
+def admin_import_progress(job_id):
+    """Get the progress of a streaming import job."""
+    try:
+        progress = get_import_progress(job_id)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    if not progress:
+        return jsonify({
+            'success': False,
+            'message': f'Import job {job_id} not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'progress': progress
+    })
+
 # Function to register the admin blueprint with the Flask app
 def register_admin_blueprint(app):
     """Register the admin blueprint with the Flask app."""
     app.register_blueprint(admin_bp)
+    register_asset_pipeline(app)
     
     # Create admin template directories if they don't exist
     os.makedirs(os.path.join(os.path.dirname(__file__), 'templates/admin'), exist_ok=True)
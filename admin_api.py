@@ -13,8 +13,15 @@ import hashlib
 import time
 from functools import wraps
 from config import get_config, set_config, save_config
-from muse_profiles import get_all_muses, get_muse_by_name
-from memory_system import clear_muse_memory
+from muse_profiles import MuseProfile, get_all_muses, get_muse_by_name, add_muses
+from memory_system import clear_muse_memory, get_memory_cache_stats
+from rate_limiter import admission_control, get_admission_stats
+from text_generation import get_generation_stats
+from http_cache import cached_response, get_response_cache_stats
+from chat_socket import get_chat_socket_stats
+from data_transfer import validate_record
+from file_locks import file_lock, write_json
+from ritual_scheduler import get_scheduler_stats
 
 # Create a Blueprint for the admin API routes
 admin_api_bp = Blueprint('admin_api', __name__, url_prefix='/api/admin')
@@ -33,25 +40,27 @@ def load_api_keys():
     return {}
 
 def save_api_keys(api_keys):
-    """Save API keys to file."""
-    with open(API_KEYS_FILE, 'w') as f:
-        json.dump(api_keys, f, indent=2)
+    """Save API keys to file, replacing it atomically."""
+    with file_lock(API_KEYS_FILE):
+        write_json(API_KEYS_FILE, api_keys)
 
 def generate_api_key(username, role='admin'):
     """Generate a new API key for a user."""
-    api_keys = load_api_keys()
-    
     # Generate a secure random token
     token = secrets.token_hex(32)
     
-    # Store the API key with user info and creation timestamp
-    api_keys[token] = {
-        'username': username,
-        'role': role,
-        'created_at': time.time()
-    }
-    
-    save_api_keys(api_keys)
+    # Hold the lock from read to write so keys issued by other workers are not lost
+    with file_lock(API_KEYS_FILE):
+        api_keys = load_api_keys()
+        
+        # Store the API key with user info and creation timestamp
+        api_keys[token] = {
+            'username': username,
+            'role': role,
+            'created_at': time.time()
+        }
+        
+        save_api_keys(api_keys)
     return token
 
 def verify_api_key(api_key):
@@ -68,11 +77,12 @@ def get_user_from_api_key(api_key):
 
 def revoke_api_key(api_key):
     """Revoke an API key."""
-    api_keys = load_api_keys()
-    if api_key in api_keys:
-        del api_keys[api_key]
-        save_api_keys(api_keys)
-        return True
+    with file_lock(API_KEYS_FILE):
+        api_keys = load_api_keys()
+        if api_key in api_keys:
+            del api_keys[api_key]
+            save_api_keys(api_keys)
+            return True
     return False
 
 # Authentication decorator
@@ -105,6 +115,7 @@ def require_api_key(f):
 # API Routes
 
 @admin_api_bp.route('/auth', methods=['POST'])
+@admission_control
 def authenticate():
     """Authenticate a user and generate an API key."""
     data = request.json
@@ -145,6 +156,7 @@ def authenticate():
     }), 401
 
 @admin_api_bp.route('/auth/revoke', methods=['POST'])
+@admission_control
 @require_api_key
 def revoke_token():
     """Revoke the current API key."""
@@ -159,6 +171,7 @@ def revoke_token():
     })
 
 @admin_api_bp.route('/config', methods=['GET'])
+@admission_control
 @require_api_key
 def get_config_api():
     """Get the current system configuration."""
@@ -174,6 +187,7 @@ def get_config_api():
     })
 
 @admin_api_bp.route('/config', methods=['PUT'])
+@admission_control
 @require_api_key
 def update_config_api():
     """Update system configuration."""
@@ -198,9 +212,14 @@ def update_config_api():
     })
 
 @admin_api_bp.route('/muses', methods=['GET'])
+@admission_control
 @require_api_key
 def get_muses_api():
     """Get all available muses."""
+    return cached_response('admin_api_muses', build_admin_muse_list)
+
+def build_admin_muse_list():
+    """Serialize the detailed muse listing for the admin API."""
     muses = get_all_muses()
     muse_list = []
     
@@ -215,12 +234,71 @@ def get_muses_api():
             'signature_question': muse.signature_question
         })
     
-    return jsonify({
+    return json.dumps({
         'success': True,
         'muses': muse_list
     })
 
+@admin_api_bp.route('/muses/bulk', methods=['POST'])
+@admission_control
+@require_api_key
+def bulk_create_muses_api():
+    """
+    Create many muses in one request.
+    
+    The body is {"muses": [profile, ...], "replace": false}, with each profile in
+    the MuseProfile.to_dict format. Every profile is validated and checked for
+    name and trigger phrase conflicts before any is added, and either all of
+    them are added or none are.
+    """
+    data = request.get_json(silent=True) or {}
+    payloads = data.get('muses')
+    
+    if not isinstance(payloads, list) or not payloads:
+        return jsonify({
+            'success': False,
+            'error': 'No muses provided'
+        }), 400
+    
+    max_batch = get_config('muse_import.max_batch', 1000)
+    if len(payloads) > max_batch:
+        return jsonify({
+            'success': False,
+            'error': f'At most {max_batch} muses can be created per request'
+        }), 413
+    
+    errors = []
+    profiles = []
+    for index, payload in enumerate(payloads):
+        error = validate_record({'type': 'muse', 'data': payload})
+        if error:
+            errors.append({'index': index, 'error': error})
+        else:
+            profiles.append(MuseProfile.from_dict(payload))
+    
+    if errors:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid muse profiles',
+            'errors': errors
+        }), 400
+    
+    muse_ids, conflicts = add_muses(profiles, replace=bool(data.get('replace', False)))
+    
+    if conflicts:
+        return jsonify({
+            'success': False,
+            'error': 'Muse names or trigger phrases conflict',
+            'conflicts': conflicts
+        }), 409
+    
+    return jsonify({
+        'success': True,
+        'created': muse_ids
+    }), 201
+
 @admin_api_bp.route('/muses/<muse_name>', methods=['GET'])
+@admission_control
 @require_api_key
 def get_muse_api(muse_name):
     """Get details for a specific muse."""
@@ -250,6 +328,7 @@ def get_muse_api(muse_name):
     })
 
 @admin_api_bp.route('/muses/<muse_name>/memory', methods=['DELETE'])
+@admission_control
 @require_api_key
 def clear_muse_memory_api(muse_name):
     """Clear memory for a specific muse."""
@@ -269,6 +348,7 @@ def clear_muse_memory_api(muse_name):
     })
 
 @admin_api_bp.route('/system/status', methods=['GET'])
+@admission_control
 @require_api_key
 def system_status_api():
     """Get system status information."""
@@ -277,14 +357,20 @@ def system_status_api():
     memory_files = []
     
     if os.path.exists(memory_dir):
-        memory_files = [f for f in os.listdir(memory_dir) if f.endswith('_memory.json')]
+        memory_files = [f for f in os.listdir(memory_dir) if f.endswith(('_memory.json', '_memory.seg'))]
     
     system_info = {
         'memory_files': memory_files,
         'muse_count': len(get_all_muses()),
         'config_file': os.path.exists('config.json'),
         'version': '1.0.0',
-        'uptime': time.time()  # In a real system, you would track actual uptime
+        'uptime': time.time(),  # In a real system, you would track actual uptime
+        'admission_control': get_admission_stats(),
+        'generation': get_generation_stats(),
+        'response_cache': get_response_cache_stats(),
+        'websocket': get_chat_socket_stats(),
+        'memory_cache': get_memory_cache_stats(),
+        'ritual_scheduler': get_scheduler_stats()
     }
     
     return jsonify({
@@ -0,0 +1,263 @@
+"""
+Muse Summoner System - Batch Analytics Job
+
+This module computes aggregate insights across every stored conversation: theme
+prevalence, task type mix and session length distributions. It runs offline,
+outside the web workers, analyzing memory files in parallel with a process pool
+and writing a materialized report that the admin system page reads.
+
+A checkpoint records each memory file's modification time and partial results,
+so a rerun only analyzes files that changed since the previous run.
+
+Usage:
+    python analytics_job.py [--storage-dir DIR] [--workers N] [--full]
+"""
+
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from config import get_config
+from semantic_memory import HashingEmbedder
+from theme_statistics import EMOTIONAL_THEMES, TASK_TYPE_KEYWORDS, classify_task_type
+from memory_segments import read_segment, JSON_SUFFIX, SEGMENT_SUFFIX
+from timestamps import to_timestamp
+from file_locks import write_json
+
+TASK_TYPES = [task_type for task_type, keywords in TASK_TYPE_KEYWORDS] + ["general"]
+
+# Interactions more than this far apart belong to different sessions
+SESSION_GAP_SECONDS = 30 * 60
+
+# Session length histogram bins, in interactions: 1, 2, 3-5, 6-10, 11+
+SESSION_BIN_EDGES = [1, 2, 3, 6, 11, np.iinfo(np.int64).max]
+SESSION_BIN_LABELS = ["1", "2", "3-5", "6-10", "11+"]
+
+MEMORY_FILE_SUFFIXES = (JSON_SUFFIX, SEGMENT_SUFFIX)
+
+
+def _empty_partial():
+    """Create an empty partial result for one memory file."""
+    return {
+        "entries": 0,
+        "theme_counts": [0] * len(EMOTIONAL_THEMES),
+        "task_type_counts": [0] * len(TASK_TYPES),
+        "sessions": 0,
+        "session_interactions": 0,
+        "session_seconds": 0.0,
+        "session_histogram": [0] * len(SESSION_BIN_LABELS)
+    }
+
+
+def analyze_shard(memory_file):
+    """
+    Compute partial aggregates for one memory file.
+    
+    This runs in a worker process, so it only takes and returns plain data.
+    
+    Args:
+        memory_file (str): Path to the memory file
+    
+    Returns:
+        dict: The partial aggregates for the file
+    """
+    partial = _empty_partial()
+    
+    try:
+        if memory_file.endswith(SEGMENT_SUFFIX):
+            memories = read_segment(memory_file)
+        else:
+            with open(memory_file, 'r') as f:
+                memories = json.load(f)
+    except (ValueError, IOError):
+        return partial
+    
+    if not memories:
+        return partial
+    
+    matcher = HashingEmbedder(dimensions=1)
+    theme_index = {theme: i for i, theme in enumerate(EMOTIONAL_THEMES)}
+    task_type_index = {task_type: i for i, task_type in enumerate(TASK_TYPES)}
+    
+    theme_ids = []
+    task_type_ids = np.empty(len(memories), dtype=np.int64)
+    for row, memory in enumerate(memories):
+        text = memory["user_input"]
+        theme_ids.extend(theme_index[theme] for theme in matcher.concepts(text) if theme in theme_index)
+        task_type_ids[row] = task_type_index[classify_task_type(text)]
+    
+    partial["entries"] = len(memories)
+    partial["theme_counts"] = np.bincount(
+        np.asarray(theme_ids, dtype=np.int64), minlength=len(EMOTIONAL_THEMES)).tolist()
+    partial["task_type_counts"] = np.bincount(task_type_ids, minlength=len(TASK_TYPES)).tolist()
+    
+    # Split the sorted timeline into sessions wherever the gap exceeds the threshold
+    timestamps = np.sort(np.array([to_timestamp(memory["timestamp"]) for memory in memories], dtype=np.int64))
+    seconds = (timestamps - timestamps[0]) / 1000
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(seconds) > SESSION_GAP_SECONDS) + 1))
+    sizes = np.diff(np.concatenate((starts, [len(seconds)])))
+    durations = np.maximum.reduceat(seconds, starts) - np.minimum.reduceat(seconds, starts)
+    
+    partial["sessions"] = int(len(starts))
+    partial["session_interactions"] = int(sizes.sum())
+    partial["session_seconds"] = float(durations.sum())
+    partial["session_histogram"] = np.histogram(sizes, bins=SESSION_BIN_EDGES)[0].tolist()
+    
+    return partial
+
+
+class AnalyticsJob:
+    def __init__(self, storage_dir=None, report_file=None, checkpoint_file=None, workers=None):
+        """
+        Initialize the analytics job.
+        
+        Args:
+            storage_dir (str): Directory holding the memory files
+            report_file (str): Path of the materialized report
+            checkpoint_file (str): Path of the per-file checkpoint
+            workers (int): Number of worker processes (defaults to the CPU count)
+        """
+        if storage_dir is None:
+            from memory_system import muse_memory
+            storage_dir = muse_memory.storage_dir
+        
+        self.storage_dir = storage_dir
+        self.report_file = report_file or get_config("analytics.report_file", "analytics_report.json")
+        self.checkpoint_file = checkpoint_file or get_config("analytics.checkpoint_file", "analytics_checkpoint.json")
+        self.workers = workers
+    
+    def run(self, full=False):
+        """
+        Analyze changed memory files, merge all partials and write the report.
+        
+        Args:
+            full (bool): Ignore the checkpoint and analyze every file
+        
+        Returns:
+            dict: The report that was written
+        """
+        checkpoint = {} if full else self._load_checkpoint()
+        shards = {}
+        pending = []
+        
+        for filename in sorted(os.listdir(self.storage_dir)) if os.path.isdir(self.storage_dir) else []:
+            if not filename.endswith(MEMORY_FILE_SUFFIXES):
+                continue
+            path = os.path.join(self.storage_dir, filename)
+            stat = os.stat(path)
+            signature = {"mtime": stat.st_mtime, "size": stat.st_size}
+            
+            previous = checkpoint.get(filename)
+            if previous and previous["mtime"] == signature["mtime"] and previous["size"] == signature["size"]:
+                shards[filename] = previous
+            else:
+                shards[filename] = signature
+                pending.append(filename)
+        
+        if pending:
+            paths = [os.path.join(self.storage_dir, filename) for filename in pending]
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                for filename, partial in zip(pending, executor.map(analyze_shard, paths)):
+                    shards[filename]["partial"] = partial
+        
+        # Files that disappeared drop out of the checkpoint along with their partials
+        self._save_json(self.checkpoint_file, shards)
+        
+        report = self._build_report(shards, analyzed=len(pending))
+        self._save_json(self.report_file, report)
+        return report
+    
+    def _build_report(self, shards, analyzed):
+        """Merge per-file partials into the materialized report."""
+        partials = [shard["partial"] for shard in shards.values()]
+        totals = _empty_partial()
+        
+        if partials:
+            for key in ["theme_counts", "task_type_counts", "session_histogram"]:
+                totals[key] = np.sum([partial[key] for partial in partials], axis=0).tolist()
+            for key in ["entries", "sessions", "session_interactions", "session_seconds"]:
+                totals[key] = sum(partial[key] for partial in partials)
+        
+        entries = totals["entries"]
+        sessions = totals["sessions"]
+        
+        return {
+            "generated_at": time.time(),
+            "files": len(shards),
+            "files_analyzed": analyzed,
+            "entries": entries,
+            "theme_prevalence": {
+                theme: {"mentions": count, "share": count / entries if entries else 0.0}
+                for theme, count in zip(EMOTIONAL_THEMES, totals["theme_counts"])
+            },
+            "task_type_mix": {
+                task_type: {"count": count, "share": count / entries if entries else 0.0}
+                for task_type, count in zip(TASK_TYPES, totals["task_type_counts"])
+            },
+            "sessions": {
+                "count": sessions,
+                "mean_interactions": totals["session_interactions"] / sessions if sessions else 0.0,
+                "mean_minutes": totals["session_seconds"] / sessions / 60 if sessions else 0.0,
+                "length_histogram": dict(zip(SESSION_BIN_LABELS, totals["session_histogram"]))
+            },
+            "entries_per_muse": {
+                filename.rsplit("_memory.", 1)[0]: shard["partial"]["entries"]
+                for filename, shard in shards.items()
+            }
+        }
+    
+    def _load_checkpoint(self):
+        """Load the per-file checkpoint from the previous run."""
+        if os.path.exists(self.checkpoint_file):
+            try:
+                with open(self.checkpoint_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError):
+                return {}
+        return {}
+    
+    def _save_json(self, path, data):
+        """Write a JSON file, replacing it in one step so readers never see a partial file."""
+        try:
+            write_json(path, data)
+        except IOError as e:
+            print(f"Error writing {path}: {e}")
+
+
+def load_analytics_report(report_file=None):
+    """
+    Load the most recent materialized analytics report.
+    
+    Args:
+        report_file (str): Path of the report (defaults to the configured path)
+    
+    Returns:
+        dict: The report, or None if the job has not run yet
+    """
+    report_file = report_file or get_config("analytics.report_file", "analytics_report.json")
+    if not os.path.exists(report_file):
+        return None
+    try:
+        with open(report_file, 'r') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return None
+
+
+def main():
+    """Run the analytics job from the command line."""
+    parser = argparse.ArgumentParser(description="Compute aggregate insights across stored conversations.")
+    parser.add_argument("--storage-dir", help="Directory holding the memory files")
+    parser.add_argument("--workers", type=int, help="Number of worker processes")
+    parser.add_argument("--full", action="store_true", help="Ignore the checkpoint and analyze every file")
+    args = parser.parse_args()
+    
+    report = AnalyticsJob(storage_dir=args.storage_dir, workers=args.workers).run(full=args.full)
+    print(f"Analyzed {report['files_analyzed']} of {report['files']} memory files "
+          f"({report['entries']} entries). Report written.")
+
+
+if __name__ == "__main__":
+    main()
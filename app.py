@@ -5,21 +5,42 @@ This module implements a Flask web application for the Muse Summoner system.
 It provides a web interface for interacting with muses.
 """
 
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response, stream_with_context, send_file
 import os
 import json
+import math
+import secrets
 from datetime import datetime
 
 # Import Muse Summoner modules
-from muse_profiles import get_all_muses, get_muse_by_trigger
+from muse_profiles import get_all_muses, get_muse_by_trigger, get_muse_by_name
 from trigger_detector import detect_muse_trigger, get_current_muse, deactivate_current_muse
-from enhanced_response_generator import generate_muse_response
-from muse_creator import start_muse_creation, process_creation_input, is_creating_muse
+from enhanced_response_generator import generate_muse_response, generate_muse_response_stream
+from council import extract_council_task, convene_council, is_muse_name_list
+from muse_creator import start_muse_creation, process_creation_input, is_creating_muse, get_creation_progress
 from conversation_storage import start_muse_conversation, end_muse_conversation
-from memory_system import get_conversation_history, clear_muse_memory
+from rate_limiter import admission_control
+from http_cache import cached_response
+from legacy_archive import start_archive_job, get_archive_progress, get_archive_file
+from ritual_scheduler import start_ritual_scheduler, schedule_reminder, cancel_reminder, collect_due_reminders
+from asset_pipeline import register_asset_pipeline
+from chat_socket import register_chat_socket
+from memory_system import get_conversation_history, get_conversation_page, iter_conversation_history, sync_conversation_history, clear_muse_memory
+from mood_series import ingest_mood_stream, ingest_mood_records, get_mood_series, analyze_mood
+from timestamps import now_timestamp, MILLISECONDS_PER_DAY
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)  # For session management
+register_asset_pipeline(app)
+
+# Largest page a client may request from the history endpoint
+MAX_HISTORY_PAGE_SIZE = 100
+
+# Archive jobs remembered per browser session
+MAX_SESSION_ARCHIVES = 10
+
+# Reminder IDs remembered per browser session, for cancelling
+MAX_SESSION_REMINDERS = 50
 
 # Create templates directory if it doesn't exist
 os.makedirs(os.path.join(os.path.dirname(__file__), 'templates'), exist_ok=True)
@@ -28,9 +49,10 @@ os.makedirs(os.path.join(os.path.dirname(__file__), 'static'), exist_ok=True)
 @app.route('/')
 def index():
     """Render the main page of the Muse Summoner web application."""
-    return render_template('index.html')
+    return cached_response('index', lambda: render_template('index.html'), 'text/html')
 
 @app.route('/api/process_input', methods=['POST'])
+@admission_control
 def process_input():
     """Process user input and generate a response from the Muse Summoner system."""
     data = request.json
@@ -41,6 +63,15 @@ def process_input():
     if response:
         return jsonify({'response': response})
     
+    # Check if this is a question for the council
+    council_task = extract_council_task(user_input)
+    if council_task:
+        answers = [f"{answer['muse_name']}:\n{answer['response']}" for answer in convene_council(council_task)]
+        return jsonify({
+            'response': "\n\n".join(answers),
+            'muse_name': 'Council'
+        })
+    
     # Check if a muse is being triggered
     triggered_muse = detect_muse_trigger(user_input)
     
@@ -76,9 +107,101 @@ def process_input():
         'muse_name': 'System'
     })
 
+@app.route('/api/process_input_stream', methods=['POST'])
+@admission_control
+def process_input_stream():
+    """Process user input and stream the response events as NDJSON."""
+    data = request.json
+    if not is_muse_name_list(data.get('muses')):
+        return jsonify({
+            'error': 'muses must be a list of muse names',
+            'success': False
+        }), 400
+    events = iter_input_events(data.get('user_input', ''), data.get('muses'))
+    
+    # Run the command and trigger handling now, while session changes can still be saved
+    first_event = next(events)
+    
+    def generate():
+        yield json.dumps(first_event) + '\n'
+        for event in events:
+            yield json.dumps(event) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def iter_input_events(user_input, muse_names=None, state=None):
+    """
+    Process user input and yield response events.
+    
+    The first event is always a "status" event with the active muse after any
+    command or trigger in the input has been handled. Muse responses follow as
+    a "greeting" event, sent as soon as the muse is summoned, then "response"
+    events with the rest of the text and a final "done" event. Council requests
+    yield one "council" event per muse, in the order the muses finish, then
+    "done". System messages arrive as a single "message" event.
+    
+    Args:
+        user_input (str): The user's input
+        muse_names (list): Muses to consult for a council request (defaults to all)
+        state (dict): Session state to update (defaults to the Flask session; a chat socket passes its own)
+    
+    Yields:
+        dict: The response events
+    """
+    state = session if state is None else state
+    
+    # Check if this is a system command
+    response = check_system_commands(user_input, state)
+    if response:
+        yield status_event()
+        yield {'type': 'message', 'text': response, 'muse_name': 'System'}
+        return
+    
+    # Check if this is a question for the council, and yield each answer as it finishes
+    council_task = extract_council_task(user_input)
+    if council_task:
+        yield status_event()
+        for answer in convene_council(council_task, muse_names):
+            yield {'type': 'council', 'text': answer['response'], 'muse_name': answer['muse_name']}
+        yield {'type': 'done', 'muse_name': 'Council'}
+        return
+    
+    # Check if a muse is being triggered, and start the conversation before responding
+    triggered_muse = detect_muse_trigger(user_input)
+    if triggered_muse:
+        start_muse_conversation(triggered_muse.name)
+        state['active_muse'] = triggered_muse.name
+    
+    yield status_event()
+    
+    active_muse = get_current_muse()
+    if not active_muse:
+        yield {'type': 'message', 'text': get_system_message(), 'muse_name': 'System'}
+        return
+    
+    muse_name = active_muse.name
+    chunks = generate_muse_response_stream(user_input)
+    yield {'type': 'greeting', 'text': next(chunks, ''), 'muse_name': muse_name}
+    for chunk in chunks:
+        yield {'type': 'response', 'text': chunk, 'muse_name': muse_name}
+    yield {'type': 'done', 'muse_name': muse_name}
+
+def status_event():
+    """Build a status event with the active muse and whether a muse is being created."""
+    active_muse = get_current_muse()
+    return {
+        'type': 'status',
+        'active_muse': active_muse.name if active_muse else None,
+        'creating': is_creating_muse()
+    }
+
 @app.route('/api/get_muses', methods=['GET'])
 def get_muses():
     """Get a list of all available muses."""
+    return cached_response('muses', build_muse_list)
+
+def build_muse_list():
+    """Serialize the public muse listing."""
     muses = get_all_muses()
     muse_list = []
     
@@ -89,33 +212,51 @@ def get_muses():
             'purpose': muse.purpose
         })
     
-    return jsonify({'muses': muse_list})
+    return json.dumps({'muses': muse_list})
 
 @app.route('/api/create_muse', methods=['POST'])
+@admission_control
 def create_muse():
     """Start or continue the muse creation process."""
     data = request.json
-    user_input = data.get('user_input', '')
+    return jsonify(process_creation_event(data.get('user_input', '')))
+
+def process_creation_event(user_input):
+    """
+    Start or continue the muse creation process.
     
+    Args:
+        user_input (str): "start" to begin, otherwise the answer for the current step
+    
+    Returns:
+        dict: The next prompt, whether creation is still in progress, and the wizard step
+    """
     if not is_creating_muse() and user_input.lower() == 'start':
         # Start the muse creation process
         prompt = start_muse_creation()
-        return jsonify({'prompt': prompt, 'creating': True})
-    
-    # Process the user input for the current creation step
-    response = process_creation_input(user_input)
+    else:
+        # Process the user input for the current creation step
+        prompt = process_creation_input(user_input)
     
-    # Check if we're still creating a muse
-    still_creating = is_creating_muse()
+    step, total_steps = get_creation_progress()
     
-    return jsonify({
-        'prompt': response,
-        'creating': still_creating
-    })
+    return {
+        'prompt': prompt,
+        'creating': is_creating_muse(),
+        'step': step,
+        'total_steps': total_steps
+    }
 
 @app.route('/api/get_history', methods=['GET'])
+@admission_control
 def get_history():
-    """Get conversation history for the active muse."""
+    """
+    Get one page of conversation history for the active muse.
+    
+    Query parameters:
+        limit: Number of entries per page (default 10)
+        before: Cursor from a previous response's next_cursor to page further back
+    """
     active_muse = get_current_muse()
     if not active_muse:
         return jsonify({
@@ -123,14 +264,282 @@ def get_history():
             'history': []
         })
     
-    history = get_conversation_history(active_muse.name, count=10)
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_HISTORY_PAGE_SIZE)
+    before = request.args.get('before', type=int)
+    
+    history, next_cursor = get_conversation_page(active_muse.name, before=before, limit=limit)
     
     return jsonify({
         'muse_name': active_muse.name,
-        'history': history
+        'history': history,
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/sync_history', methods=['GET'])
+@admission_control
+def sync_history():
+    """
+    Get the conversation entries a client has not cached yet.
+    
+    Query parameters:
+        muse: The muse whose history to sync (defaults to the active muse)
+        after: The newest timestamp (epoch milliseconds) the client already has; omit for a full sync
+        limit: Maximum number of entries (default and maximum 100)
+    
+    The response includes `oldest`, the timestamp of the oldest entry the server
+    still keeps; clients drop cached entries older than it, or everything when
+    it is null, so trimmed and cleared history disappears from their caches too.
+    """
+    muse = get_muse_by_name(request.args['muse']) if request.args.get('muse') else get_current_muse()
+    if not muse:
+        return jsonify({
+            'muse_name': None,
+            'entries': [],
+            'oldest': None,
+            'cursor': None,
+            'has_more': False
+        })
+    
+    after = request.args.get('after', type=int)
+    limit = min(max(request.args.get('limit', MAX_HISTORY_PAGE_SIZE, type=int), 1), MAX_HISTORY_PAGE_SIZE)
+    
+    entries, oldest, has_more = sync_conversation_history(muse.name, after=after, limit=limit)
+    
+    return jsonify({
+        'muse_name': muse.name,
+        'entries': entries,
+        'oldest': oldest,
+        'cursor': entries[-1]['timestamp'] if entries else after,
+        'has_more': has_more
+    })
+
+@app.route('/api/export_history', methods=['GET'])
+@admission_control
+def export_history():
+    """Stream the full conversation history for the active muse as NDJSON."""
+    active_muse = get_current_muse()
+    if not active_muse:
+        return jsonify({
+            'error': 'No muse is currently active.',
+            'history': []
+        })
+    
+    muse_name = active_muse.name
+    
+    def generate():
+        for entry in iter_conversation_history(muse_name):
+            yield json.dumps(entry) + '\n'
+    
+    filename = muse_name.lower().replace(' ', '_') + '_history.ndjson'
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/api/legacy_archive', methods=['POST'])
+@admission_control
+def legacy_archive():
+    """
+    Start building a legacy archive of key reflections in the background.
+    
+    Request body (optional):
+        muse: The muse whose history to archive (defaults to the active muse)
+    """
+    data = request.get_json(silent=True) or {}
+    muse = get_muse_by_name(data['muse']) if data.get('muse') else get_current_muse()
+    if not muse:
+        return jsonify({
+            'error': 'No muse is currently active.',
+            'success': False
+        })
+    
+    progress = start_archive_job(muse.name)
+    
+    # Only the browser session that started a job may read or download it
+    session['archive_jobs'] = (session.get('archive_jobs', []) + [progress['job_id']])[-MAX_SESSION_ARCHIVES:]
+    
+    return jsonify({
+        'success': True,
+        'job_id': progress['job_id'],
+        'progress': progress
+    }), 202
+
+@app.route('/api/legacy_archive/<job_id>', methods=['GET'])
+def legacy_archive_progress(job_id):
+    """Get the progress of a legacy archive job."""
+    progress = get_archive_progress(job_id) if job_id in session.get('archive_jobs', []) else None
+    
+    if not progress:
+        return jsonify({
+            'success': False,
+            'message': f'Archive job {job_id} not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'progress': progress
+    })
+
+@app.route('/api/legacy_archive/<job_id>/download', methods=['GET'])
+def download_legacy_archive(job_id):
+    """Download a finished legacy archive as Markdown."""
+    archive_file = get_archive_file(job_id) if job_id in session.get('archive_jobs', []) else None
+    
+    if not archive_file:
+        return jsonify({
+            'success': False,
+            'message': f'Archive {job_id} is not ready'
+        }), 404
+    
+    muse_name = get_archive_progress(job_id)['muse_name']
+    filename = muse_name.lower().replace(' ', '_') + '_legacy_archive.md'
+    return send_file(archive_file, mimetype='text/markdown', as_attachment=True, download_name=filename)
+
+@app.route('/api/reminders', methods=['POST'])
+@admission_control
+def create_reminder():
+    """
+    Schedule a ritual or reflective session with a muse.
+    
+    Request body:
+        kind: "ritual" or "reflection"
+        due_at: When the reminder falls due, in epoch milliseconds (or delay_minutes from now)
+        purpose, complexity: Optional ritual parameters
+        theme: Optional reflection theme (defaults to the theme rising in recent conversations)
+        period: Optional span a reflection looks back over, "week" (default) or "month"
+        repeat_days: Optional interval for a recurring reminder
+        muse: Optional muse name (defaults to the active muse)
+    """
+    data = request.get_json(silent=True) or {}
+    muse = get_muse_by_name(data['muse']) if data.get('muse') else get_current_muse()
+    if not muse:
+        return jsonify({
+            'error': 'No muse is currently active.',
+            'success': False
+        })
+    
+    params = {key: data[key] for key in ('purpose', 'complexity', 'theme', 'period') if data.get(key)}
+    try:
+        if 'due_at' in data:
+            due_at = data['due_at']
+        else:
+            due_at = now_timestamp() + int(finite_number(data.get('delay_minutes', 0), 'delay_minutes') * 60 * 1000)
+        repeat_ms = int(finite_number(data['repeat_days'], 'repeat_days') * MILLISECONDS_PER_DAY) if data.get('repeat_days') else None
+        reminder = schedule_reminder(get_client_id(), muse.name, data.get('kind', 'ritual'), due_at, params, repeat_ms)
+    except (TypeError, ValueError, OverflowError) as e:
+        return jsonify({
+            'error': str(e),
+            'success': False
+        }), 400
+    
+    # Only the browser session that scheduled a reminder may collect or cancel it
+    session['reminders'] = (session.get('reminders', []) + [reminder['id']])[-MAX_SESSION_REMINDERS:]
+    
+    return jsonify({
+        'success': True,
+        'reminder': reminder
+    }), 201
+
+def get_client_id():
+    """Get the browser session's client id, starting one if the session has none."""
+    if 'client_id' not in session:
+        session['client_id'] = secrets.token_hex(8)
+    return session['client_id']
+
+def finite_number(value, name):
+    """Parse a number from a request, rejecting infinities and NaN."""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"Invalid {name}: {value!r}")
+    return number
+
+@app.route('/api/reminders/collect', methods=['POST'])
+def collect_reminders():
+    """
+    Take this session's prepared rituals and reflections that are due; each is returned once.
+    
+    Request body (optional):
+        muse: Only collect reminders from this muse
+    """
+    data = request.get_json(silent=True) or {}
+    return jsonify({
+        'success': True,
+        'reminders': collect_due_reminders(get_client_id(), data.get('muse'))
+    })
+
+@app.route('/api/reminders/<reminder_id>', methods=['DELETE'])
+def delete_reminder(reminder_id):
+    """Cancel a reminder scheduled by this session."""
+    if reminder_id not in session.get('reminders', []):
+        return jsonify({
+            'success': False,
+            'message': f'Reminder {reminder_id} not found'
+        }), 404
+    
+    cancel_reminder(reminder_id, session['client_id'])
+    session['reminders'] = [other for other in session['reminders'] if other != reminder_id]
+    return jsonify({
+        'success': True,
+        'message': f'Reminder {reminder_id} has been cancelled.'
+    })
+
+@app.route('/api/mood', methods=['POST'])
+@admission_control
+def ingest_mood():
+    """
+    Record this session's mood samples.
+    
+    The body is NDJSON, one {"timestamp": ..., "mood": ...} record per line,
+    read as a stream and stored in chunks; a JSON body with a "samples" list is
+    accepted too. Timestamps are epoch milliseconds or ISO 8601 (default now)
+    and may not be in the future.
+    """
+    if request.is_json:
+        samples = (request.get_json(silent=True) or {}).get('samples')
+        if not isinstance(samples, list):
+            return jsonify({
+                'error': 'No mood samples provided',
+                'success': False
+            }), 400
+        result = ingest_mood_records(get_client_id(), samples)
+    else:
+        result = ingest_mood_stream(get_client_id(), request.stream)
+    
+    return jsonify(dict(result, success=result['error_count'] == 0))
+
+@app.route('/api/mood', methods=['GET'])
+def get_mood():
+    """
+    Read this session's downsampled mood for a time window, with the trend over that window.
+    
+    Query parameters:
+        since, until: Window bounds in epoch milliseconds (default: the last 30 days)
+        resolution: "minute", "hour" or "day" (default: the finest covering the window)
+    """
+    until = request.args.get('until', type=int)
+    since = request.args.get('since', type=int)
+    if since is None:
+        since = (until or now_timestamp()) - 30 * MILLISECONDS_PER_DAY
+    
+    client_id = get_client_id()
+    try:
+        resolution, series = get_mood_series(client_id, since, until, request.args.get('resolution'))
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'success': False
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'resolution': resolution,
+        'series': {field: values.tolist() for field, values in series.items()},
+        'trend': analyze_mood(client_id, ((until or now_timestamp()) - since) / MILLISECONDS_PER_DAY, until)
     })
 
 @app.route('/api/clear_memory', methods=['POST'])
+@admission_control
 def clear_memory():
     """Clear the memory of the active muse."""
     active_muse = get_current_muse()
@@ -169,8 +578,9 @@ def exit_muse():
         'success': True
     })
 
-def check_system_commands(user_input):
-    """Check for system commands in the user input."""
+def check_system_commands(user_input, state=None):
+    """Check for system commands in the user input, updating the given session state (defaults to the Flask session)."""
+    state = session if state is None else state
     input_lower = user_input.lower().strip()
     
     # Command to list all available muses
@@ -193,8 +603,8 @@ def check_system_commands(user_input):
             deactivate_current_muse()
             end_muse_conversation()
             
-            if 'active_muse' in session:
-                session.pop('active_muse')
+            if 'active_muse' in state:
+                state.pop('active_muse')
             
             return f"{muse_name} has been deactivated. You are now speaking with the Muse Summoner system."
         else:
@@ -269,6 +679,7 @@ To interact with the system, you can use the following commands:
    - "Cancel creation" - Cancels the muse creation process
    - "View history" - Shows recent conversation history with the active muse
    - "Clear memory" - Clears the memory of the active muse
+   - "Convene the council: <message>" - Asks every muse at once and shows each answer as it arrives
    - "Help" - Shows this help message
 
 When a muse is active, simply type your message and they will respond in their unique voice and style.
@@ -278,5 +689,12 @@ Each muse has different capabilities and specialties. Salvatore Inverso, for exa
 The memory-enhanced system allows muses to remember your past conversations and provide more personalized responses over time.
 """
 
+# Serve the chat over a persistent WebSocket as well as the HTTP endpoints
+register_chat_socket(app, iter_input_events, process_creation_event)
+
 if __name__ == '__main__':
+    # Prepare scheduled rituals and reflections in the background; under gunicorn,
+    # gunicorn.conf.py starts the worker. With the reloader, only the child serving requests runs it
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_ritual_scheduler()
     app.run(host='0.0.0.0', port=5000, debug=True)
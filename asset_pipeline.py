@@ -0,0 +1,285 @@
+"""
+Muse Summoner System - Static Asset Pipeline
+
+This module builds and serves the stylesheets and scripts in static/. The build
+step minifies each asset, names the output after a hash of its content, writes
+gzip and (when the brotli package is installed) brotli variants next to it, and
+records the mapping in a manifest. Because a changed file gets a new name, the
+built assets are served with long-lived immutable cache headers.
+
+Templates reference assets through asset_url('script.js'). Without a built
+manifest, asset_url falls back to the raw file so development needs no build.
+
+Usage:
+    python asset_pipeline.py
+"""
+
+import os
+import re
+import json
+import gzip
+import hashlib
+from flask import Blueprint, request, send_from_directory, url_for, abort
+from file_locks import atomic_write
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_FILE = os.path.join(DIST_DIR, 'manifest.json')
+
+ASSET_EXTENSIONS = ('.css', '.js')
+
+# Built asset names are content hashes, so browsers may keep them for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Precompressed variants, in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def minify_css(source):
+    """
+    Minify a stylesheet by removing comments and unneeded whitespace.
+    
+    Spaces around ":" are only removed inside declaration blocks; in a
+    selector, ".a :hover" (any hovered descendant) differs from ".a:hover".
+    
+    Args:
+        source (str): The stylesheet
+    
+    Returns:
+        str: The minified stylesheet
+    """
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.DOTALL)
+    source = re.sub(r'\s+', ' ', source)
+    
+    # Selectors and at-rule preludes end at "{", declarations at ";" or "}"
+    parts = []
+    for text, delimiter in re.findall(r'([^{};]*)([{};]?)', source):
+        is_selector = delimiter == '{' and not text.strip().startswith('@')
+        separators = r'[,>]' if is_selector else r'[:,>]'
+        parts.append(re.sub(r'\s*(' + separators + r')\s*', r'\1', text.strip()) + delimiter)
+    return ''.join(parts).replace(';}', '}')
+
+
+def _ends_in_template(line, in_template):
+    """
+    Follow one line of script and tell whether it ends inside a template literal.
+    
+    Quotes and // comments are tracked so backticks inside them are skipped.
+    Nested template literals in ${...} are not followed.
+    """
+    quote = None
+    position = 0
+    while position < len(line):
+        char = line[position]
+        if char == '\\':
+            position += 2
+            continue
+        if in_template:
+            if char == '`':
+                in_template = False
+        elif quote:
+            if char == quote:
+                quote = None
+        elif char == '`':
+            in_template = True
+        elif char in '"\'':
+            quote = char
+        elif line.startswith('//', position):
+            break
+        position += 1
+    return in_template
+
+
+def minify_js(source):
+    """
+    Minify a script conservatively.
+    
+    Only indentation, blank lines and whole-line // comments are removed. Line
+    breaks are kept, so automatic semicolon insertion is never affected, and
+    lines inside multi-line template literals are left exactly as they are.
+    
+    Args:
+        source (str): The script
+    
+    Returns:
+        str: The minified script
+    """
+    lines = []
+    in_template = False
+    for line in source.splitlines():
+        starts_in_template = in_template
+        in_template = _ends_in_template(line, in_template)
+        
+        if not starts_in_template:
+            line = line.lstrip()
+        if not in_template:
+            line = line.rstrip()
+        if starts_in_template or in_template or (line and not line.startswith('//')):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+class AssetPipeline:
+    def __init__(self, static_dir=STATIC_DIR, dist_dir=DIST_DIR, manifest_file=MANIFEST_FILE):
+        """
+        Initialize the asset pipeline.
+        
+        Args:
+            static_dir (str): Directory holding the source assets
+            dist_dir (str): Directory for the built assets
+            manifest_file (str): Path of the manifest mapping source names to built names
+        """
+        self.static_dir = static_dir
+        self.dist_dir = dist_dir
+        self.manifest_file = manifest_file
+        self.manifest = None
+        self.manifest_mtime = None
+    
+    def build(self):
+        """
+        Minify, fingerprint and precompress every asset, then write the manifest.
+        
+        Returns:
+            dict: The manifest, mapping each source name to its built name
+        """
+        os.makedirs(self.dist_dir, exist_ok=True)
+        previous = self.get_manifest()
+        manifest = {}
+        
+        for filename in sorted(os.listdir(self.static_dir)):
+            name, extension = os.path.splitext(filename)
+            if extension not in ASSET_EXTENSIONS:
+                continue
+            
+            with open(os.path.join(self.static_dir, filename), 'r', encoding='utf-8') as f:
+                content = MINIFIERS[extension](f.read()).encode('utf-8')
+            
+            built_name = f"{name}.{hashlib.sha256(content).hexdigest()[:12]}{extension}"
+            self._write(built_name, content)
+            self._write(built_name + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli:
+                self._write(built_name + '.br', brotli.compress(content))
+            
+            manifest[filename] = built_name
+        
+        self._write('manifest.json', json.dumps(manifest, indent=2).encode('utf-8'))
+        self._remove_stale(manifest, previous)
+        self.manifest = manifest
+        return manifest
+    
+    def _write(self, filename, content):
+        """Write a built file in one step so a running server never serves a partial file."""
+        path = os.path.join(self.dist_dir, filename)
+        with atomic_write(path, 'wb') as f:
+            f.write(content)
+    
+    def _remove_stale(self, manifest, previous):
+        """
+        Delete built files that neither this build nor the previous one references.
+        
+        The previous build is kept so pages rendered before a deploy can still load their assets.
+        """
+        current = set(manifest.values()) | set(previous.values())
+        for filename in os.listdir(self.dist_dir):
+            base = filename
+            for encoding, suffix in ENCODINGS:
+                if base.endswith(suffix):
+                    base = base[:-len(suffix)]
+            if base != 'manifest.json' and base not in current:
+                os.remove(os.path.join(self.dist_dir, filename))
+    
+    def get_manifest(self):
+        """
+        Get the manifest, reloading it when a new build replaces the file.
+        
+        Returns:
+            dict: The manifest, or an empty dict if the assets have not been built
+        """
+        try:
+            mtime = os.path.getmtime(self.manifest_file)
+        except OSError:
+            return {}
+        
+        if self.manifest is None or mtime != self.manifest_mtime:
+            try:
+                with open(self.manifest_file, 'r') as f:
+                    self.manifest = json.load(f)
+                self.manifest_mtime = mtime
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Error loading asset manifest: {e}")
+                return {}
+        return self.manifest
+    
+    def asset_url(self, filename):
+        """
+        Get the URL of an asset, preferring its built, fingerprinted version.
+        
+        Args:
+            filename (str): The source asset name, e.g. "script.js"
+        
+        Returns:
+            str: The URL to reference from templates
+        """
+        built_name = self.get_manifest().get(filename)
+        if built_name:
+            return url_for('assets.serve_asset', filename=built_name)
+        return url_for('static', filename=filename)
+
+
+# Create a singleton instance for global use
+asset_pipeline = AssetPipeline()
+
+# Create a Blueprint for serving built assets
+assets_bp = Blueprint('assets', __name__, url_prefix='/assets')
+
+@assets_bp.route('/<path:filename>')
+def serve_asset(filename):
+    """Serve a built asset, precompressed if the client accepts it, with immutable caching."""
+    if not filename.endswith(ASSET_EXTENSIONS) or not os.path.isfile(os.path.join(asset_pipeline.dist_dir, filename)):
+        abort(404)
+    
+    accepted = request.headers.get('Accept-Encoding', '')
+    served_name, encoding = filename, None
+    for candidate, suffix in ENCODINGS:
+        if candidate in accepted and os.path.exists(os.path.join(asset_pipeline.dist_dir, filename + suffix)):
+            served_name, encoding = filename + suffix, candidate
+            break
+    
+    mimetype = 'text/css' if filename.endswith('.css') else 'application/javascript'
+    response = send_from_directory(asset_pipeline.dist_dir, served_name, mimetype=mimetype, max_age=31536000)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def asset_url(filename):
+    """
+    Global function to get the URL of a static asset.
+    Returns the fingerprinted build when one exists, otherwise the raw file.
+    """
+    return asset_pipeline.asset_url(filename)
+
+def register_asset_pipeline(app):
+    """Register the asset route and the asset_url template helper with the Flask app."""
+    if 'assets' not in app.blueprints:
+        app.register_blueprint(assets_bp)
+    app.jinja_env.globals['asset_url'] = asset_url
+
+
+def main():
+    """Build the static assets from the command line."""
+    manifest = asset_pipeline.build()
+    print(f"Built {len(manifest)} assets into {asset_pipeline.dist_dir}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Muse Summoner System - Chat Socket Module
+
+This module provides a persistent WebSocket channel for the chat interface.
+Each browser session keeps one connection open, and chat messages, streamed
+response chunks, status updates (active muse, creation wizard step) and
+heartbeats all flow over it as JSON events, so chatty users do not pay for a
+new HTTP request per message.
+
+Client messages:
+    {"type": "message", "user_input": "...", "muses": [...]}
+    {"type": "create", "user_input": "..."}
+    {"type": "ping"} / {"type": "pong"}
+
+Server events are the same as the streaming HTTP endpoint's, plus "creation",
+"error", "ping" and "pong".
+
+The channel requires the flask-sock package and a threaded server (for example
+gunicorn with --threads). Each open socket holds one of the worker's threads,
+so websocket.max_connections must stay well below the thread count; handshakes
+past the limit are refused with 503 and the browser uses the HTTP endpoints,
+as it does when flask-sock is not installed.
+
+Session changes cannot be saved over a socket (the cookie was sent with the
+handshake), so each connection keeps its own copy of the session state.
+"""
+
+import json
+import time
+import threading
+from flask import session, request, g, jsonify
+from config import get_config
+from rate_limiter import admit_client_message, get_client_key
+from council import is_muse_name_list
+
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:
+    Sock = None
+    ConnectionClosed = None
+
+
+class ChatConnection:
+    def __init__(self, client_key, state):
+        """
+        Track a connection slot for a socket that is about to be opened.
+        
+        Args:
+            client_key (str): The key the connection is rate limited under
+            state (dict): The connection's session state, copied from the browser session
+        """
+        self.ws = None  # Attached once the handshake completes
+        self.client_key = client_key
+        self.state = state
+        self.connected_at = time.monotonic()
+        self.last_seen = self.connected_at
+        self.messages = 0
+    
+    def send(self, event):
+        """Send one JSON event to the browser."""
+        self.ws.send(json.dumps(event))
+
+
+class ChatConnectionManager:
+    def __init__(self):
+        """Initialize the connection manager from configuration."""
+        self.max_connections = get_config("websocket.max_connections", 200)
+        self.heartbeat_interval = get_config("websocket.heartbeat_interval", 25)
+        self.heartbeat_timeout = get_config("websocket.heartbeat_timeout", 60)
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.stats = {"opened": 0, "rejected": 0, "timed_out": 0, "messages": 0}
+    
+    def register(self, client_key, state):
+        """
+        Reserve a connection slot before the handshake, unless the worker is already at its connection limit.
+        
+        Args:
+            client_key (str): The key the connection is rate limited under
+            state (dict): The connection's session state
+        
+        Returns:
+            ChatConnection: The tracked connection, or None if it was rejected
+        """
+        with self.lock:
+            if len(self.connections) >= self.max_connections:
+                self.stats["rejected"] += 1
+                return None
+            connection = ChatConnection(client_key, state)
+            self.connections.add(connection)
+            self.stats["opened"] += 1
+            return connection
+    
+    def unregister(self, connection):
+        """Stop tracking a closed connection."""
+        with self.lock:
+            self.connections.discard(connection)
+    
+    def serve(self, connection, ws, input_handler, creation_handler):
+        """
+        Serve one connection until the browser disconnects or stops answering heartbeats.
+        
+        Args:
+            connection (ChatConnection): The connection's reserved slot
+            ws: The WebSocket connection
+            input_handler (callable): Yields response events for (user_input, muse_names, state)
+            creation_handler (callable): Returns a creation event for user_input
+        """
+        connection.ws = ws
+        try:
+            while True:
+                message = ws.receive(timeout=self.heartbeat_interval)
+                now = time.monotonic()
+                
+                if message is None:
+                    if now - connection.last_seen > self.heartbeat_timeout:
+                        with self.lock:
+                            self.stats["timed_out"] += 1
+                        break
+                    connection.send({"type": "ping"})
+                    continue
+                
+                connection.last_seen = now
+                self._dispatch(connection, message, input_handler, creation_handler)
+        except ConnectionClosed:
+            pass
+        finally:
+            self.unregister(connection)
+    
+    def _dispatch(self, connection, message, input_handler, creation_handler):
+        """Handle one message from the browser."""
+        try:
+            event = json.loads(message)
+        except json.JSONDecodeError:
+            event = None
+        if not isinstance(event, dict) or not is_muse_name_list(event.get("muses")):
+            connection.send({"type": "error", "error": "Invalid message"})
+            return
+        
+        event_type = event.get("type")
+        if event_type == "ping":
+            connection.send({"type": "pong"})
+            return
+        if event_type not in ("message", "create"):
+            return
+        
+        connection.messages += 1
+        with self.lock:
+            self.stats["messages"] += 1
+        
+        allowed, retry_after = admit_client_message(connection.client_key)
+        if not allowed:
+            connection.send({"type": "error", "error": "Rate limit exceeded", "retry_after": retry_after})
+            return
+        
+        try:
+            if event_type == "create":
+                creation = creation_handler(event.get("user_input", ""))
+                creation["type"] = "creation"
+                connection.send(creation)
+            else:
+                for response_event in input_handler(event.get("user_input", ""), event.get("muses"), connection.state):
+                    connection.send(response_event)
+        except ConnectionClosed:
+            raise
+        except Exception as e:
+            print(f"Error handling chat socket message: {e}")
+            connection.send({"type": "error", "error": "Error processing your message"})
+    
+    def get_stats(self):
+        """
+        Get connection counters.
+        
+        Returns:
+            dict: Open connections, lifetime counters and whether the channel is available
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats["open"] = len(self.connections)
+        stats["enabled"] = Sock is not None
+        return stats
+
+
+# Create a singleton instance for global use
+chat_connections = ChatConnectionManager()
+
+def register_chat_socket(app, input_handler, creation_handler):
+    """
+    Register the /ws/chat WebSocket route with the Flask app.
+    
+    Args:
+        app (Flask): The application
+        input_handler (callable): Yields response events for (user_input, muse_names, state)
+        creation_handler (callable): Returns a creation event for user_input
+    
+    Returns:
+        bool: True if the channel was registered, False if flask-sock is not installed
+    """
+    if Sock is None:
+        print("flask-sock is not installed; the WebSocket chat channel is disabled")
+        return False
+    
+    sock = Sock(app)
+    
+    @app.before_request
+    def reserve_chat_socket():
+        """Reserve a connection slot before the handshake, or refuse the socket with 503."""
+        if request.path != '/ws/chat':
+            return None
+        
+        # Without a session cookie, reconnects share the address's rate limit instead of a fresh one
+        connection = chat_connections.register(get_client_key(), dict(session))
+        if connection is None:
+            response = jsonify({'error': 'Too many chat connections; use the HTTP endpoints'})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(chat_connections.heartbeat_interval)
+            return response
+        g.chat_connection = connection
+        return None
+    
+    @app.teardown_request
+    def release_chat_socket(exc=None):
+        """Release the slot of a socket whose handshake never reached the route."""
+        connection = g.pop('chat_connection', None)
+        if connection is not None:
+            chat_connections.unregister(connection)
+    
+    @sock.route('/ws/chat')
+    def chat_socket(ws):
+        """Serve the persistent chat channel for one browser session."""
+        chat_connections.serve(g.chat_connection, ws, input_handler, creation_handler)
+    
+    return True
+
+def get_chat_socket_stats():
+    """Global function to get WebSocket connection counters."""
+    return chat_connections.get_stats()
@@ -7,6 +7,8 @@ It allows for easy customization of system behavior and features.
 
 import os
 import json
+import copy
+from file_locks import file_lock, file_version, read_json, write_json
 
 # Default configuration
 DEFAULT_CONFIG = {
@@ -18,22 +20,141 @@ DEFAULT_CONFIG = {
     "memory_enabled": True,
     "max_memory_entries": 50,
     "memory_relevance_threshold": 0.1,
+    "memory_format": "json",  # "json" or "binary" (memory-mapped segments, see memory_segments.py)
+    "memory_cache": {
+        "max_bytes": 64 * 1024 * 1024,  # Loaded memories kept per worker, least recently used evicted first
+        "max_entries": None  # Optional cap on the number of muses kept
+    },
+    "semantic_memory": {
+        "dimensions": 512,
+        "ivf_threshold": 2048,
+        "ivf_lists": 32,
+        "ivf_probes": 4
+    },
+    "theme_statistics": {
+        "history_days": 60  # Days of the daily theme histogram kept, twice the longest (monthly) trend window
+    },
     
     # Web application settings
     "web_host": "0.0.0.0",
     "web_port": 5000,
     "session_timeout": 3600,  # 1 hour
     
+    # Rate limiting and admission control
+    "rate_limiting": {
+        "enabled": True,
+        "session_rate": 1.0,  # Requests per second per browser session
+        "session_burst": 10,
+        "api_key_rate": 5.0,  # Requests per second per admin API key
+        "api_key_burst": 30,
+        "max_concurrent": 8,  # Requests processed at once per worker
+        "max_queue": 16,
+        "queue_timeout": 2.0,
+        "backend": "memory",  # "memory" or "redis"
+        "redis_url": "redis://localhost:6379/0"
+    },
+    
+    # WebSocket chat channel (requires flask-sock)
+    "websocket": {
+        "max_connections": 8,  # Open chat sockets per worker, each holding a thread; keep well below gunicorn --threads (16)
+        "heartbeat_interval": 25,  # Seconds of silence before the server pings
+        "heartbeat_timeout": 60  # Seconds without any client message before the socket is closed
+    },
+    
+    # HTTP caching for read-mostly pages and listings
+    "http_cache": {
+        "min_compress_size": 1024  # Smaller responses are sent uncompressed
+    },
+    
     # Muse settings
     "default_muse": "salvatore_inverso",
     "muse_profiles_dir": "muse_profiles",
     "memory_storage_dir": "memory",
     
+    # Data transfer settings
+    "data_transfer": {
+        "progress_dir": "transfers",
+        "chunk_size": 500
+    },
+    
+    # Bulk muse creation settings
+    "muse_import": {
+        "max_batch": 1000  # Profiles accepted per /api/admin/muses/bulk request
+    },
+    
+    # Concurrent write settings
+    "file_locks": {
+        "write_attempts": 3  # Optimistic memory writes tried before writing under the lock
+    },
+    
+    # Ritual and reflection reminder settings
+    "ritual_scheduler": {
+        "enabled": True,
+        "schedule_dir": "schedules",
+        "batch_size": 256,  # Reminders prepared per batch
+        "poll_interval": 1.0,  # Longest sleep between journal checks, in seconds
+        "prepare_ahead": 300,  # Seconds before its due time that a reminder is prepared
+        "max_ready_per_client": 50,  # Prepared reminders kept per client until collected
+        "compact_min_records": 10000  # Journal records before compaction is considered
+    },
+    
+    # Mood tracking settings
+    "mood_series": {
+        "storage_dir": "mood",
+        "min_score": 1,
+        "max_score": 10,
+        "chunk_size": 1000,  # Samples stored per batch while reading an upload
+        "max_future_skew": 300,  # Seconds a sample's timestamp may run ahead of the server clock
+        "capacities": {"minute": 10080, "hour": 4416, "day": 3660},  # Buckets kept per rollup
+        "rolling_window": 7,  # Days in the rolling mean
+        "min_samples": 5,  # Samples needed before a trend is reported
+        "min_segment": 3,  # Fewest days on either side of a mood shift
+        "min_shift": 1.0,  # Smallest change in mean mood reported as a shift
+        "shift_threshold": 5.0  # Standard errors a shift must exceed
+    },
+    
+    # Legacy archive settings
+    "legacy_archive": {
+        "archive_dir": "archives",
+        "chunk_size": 100,  # Memory entries read from storage at a time
+        "max_per_theme": 3,  # Reflections kept per theme per month
+        "max_excerpt_chars": 280,
+        "max_workers": 2
+    },
+    
+    # Analytics settings
+    "analytics": {
+        "report_file": "analytics_report.json",
+        "checkpoint_file": "analytics_checkpoint.json"
+    },
+    
+    # Council mode settings
+    "council": {
+        "max_members": 5,  # Muses consulted for one council message
+        "max_workers": 8  # Muses answering at the same time, across all requests
+    },
+    
     # Customization settings
     "allow_muse_creation": True,
     "allow_memory_clearing": True,
     "allow_system_commands": True,
     
+    # Text generation backend settings
+    "generation": {
+        "backend": "none",  # "none" keeps template responses, "http" uses endpoint_url
+        "endpoint_url": "",
+        "api_key": "",
+        "timeout": 30,  # HTTP timeout in seconds, capped at deadline_ms
+        "max_tokens": 512,
+        "max_prompt_tokens": 2048,  # Prompt and response together; the response share comes from max_response_length
+        "batch_max_size": 8,
+        "batch_max_wait_ms": 10,
+        "batch_max_in_flight": 4,  # Batched backend calls running at once
+        "deadline_ms": 4000,  # Callers fall back to template responses after this long
+        "breaker_failure_threshold": 5,  # Consecutive failures that open the circuit
+        "breaker_reset_timeout": 30  # Seconds before an open circuit lets a probe request through
+    },
+    
     # Advanced settings
     "response_generation": {
         "include_memory_references": True,
@@ -46,16 +167,21 @@ class Config:
     def __init__(self, config_file="config.json"):
         """Initialize the configuration with default values or from a config file."""
         self.config_file = config_file
-        self.config = DEFAULT_CONFIG.copy()
+        self.changes = {}  # Values set since the file was last read or written, reapplied if another worker saved first
+        self._load()
+    
+    def _load(self):
+        """Start from the default values and apply the config file, noting the version read."""
+        self.config = copy.deepcopy(DEFAULT_CONFIG)
+        self.version = None
         
         # Load configuration from file if it exists
-        if os.path.exists(config_file):
-            try:
-                with open(config_file, 'r') as f:
-                    loaded_config = json.load(f)
-                    self._update_config(loaded_config)
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"Error loading configuration: {e}")
+        try:
+            loaded_config, self.version = read_json(self.config_file)
+            if loaded_config:
+                self._update_config(loaded_config)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading configuration: {e}")
     
     def _update_config(self, new_config):
         """Update configuration with new values, preserving nested structure."""
@@ -81,6 +207,11 @@ class Config:
     
     def set(self, key, value):
         """Set a configuration value."""
+        self.changes[key] = value
+        self._assign(key, value)
+    
+    def _assign(self, key, value):
+        """Store a value under a plain or dotted key."""
         # Support nested keys with dot notation
         if '.' in key:
             parts = key.split('.')
@@ -94,10 +225,20 @@ class Config:
             self.config[key] = value
     
     def save(self):
-        """Save the current configuration to file."""
+        """
+        Save the current configuration to file.
+        
+        If another worker saved the file after this one read it, its version
+        is loaded first and only the values set here are applied on top, so
+        neither worker's changes are lost.
+        """
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            with file_lock(self.config_file):
+                if file_version(self.config_file) != self.version:
+                    self._load()
+                    for key, value in self.changes.items():
+                        self._assign(key, value)
+                self._write()
             return True
         except IOError as e:
             print(f"Error saving configuration: {e}")
@@ -105,8 +246,20 @@ class Config:
     
     def reset_to_defaults(self):
         """Reset configuration to default values."""
-        self.config = DEFAULT_CONFIG.copy()
-        return self.save()
+        try:
+            with file_lock(self.config_file):
+                self.config = copy.deepcopy(DEFAULT_CONFIG)
+                self._write()
+            return True
+        except IOError as e:
+            print(f"Error saving configuration: {e}")
+            return False
+    
+    def _write(self):
+        """Replace the config file with the current configuration (call with the file lock held)."""
+        write_json(self.config_file, self.config)
+        self.version = file_version(self.config_file)
+        self.changes.clear()
     
     def get_all(self):
         """Get the entire configuration dictionary."""
@@ -7,7 +7,7 @@ It integrates with the memory system to provide persistent storage of user-muse
 
 import os
 import json
-import datetime
+from timestamps import now_timestamp, format_timestamp
 from memory_system import add_conversation_memory, get_conversation_history, get_memory_context
 
 class ConversationManager:
@@ -39,7 +39,7 @@ class ConversationManager:
         
         # Add to current conversation
         interaction = {
-            "timestamp": datetime.datetime.now().isoformat(),
+            "timestamp": now_timestamp(),
             "user_input": user_input,
             "muse_response": muse_response
         }
@@ -53,6 +53,15 @@ class ConversationManager:
         self.active_muse_name = None
         self.current_conversation = []
     
+    def has_interactions(self):
+        """
+        Check whether the current conversation already has interactions.
+        
+        Returns:
+            bool: True if at least one interaction has been added
+        """
+        return len(self.current_conversation) > 0
+    
     def get_current_conversation_summary(self):
         """
         Get a summary of the current conversation.
@@ -66,8 +75,7 @@ class ConversationManager:
         summary = "Current conversation:\n\n"
         
         for i, interaction in enumerate(self.current_conversation[-3:], 1):
-            timestamp = datetime.datetime.fromisoformat(interaction["timestamp"])
-            formatted_time = timestamp.strftime("%H:%M:%S")
+            formatted_time = format_timestamp(interaction["timestamp"], "%H:%M:%S")
             
             summary += f"Interaction {i} ({formatted_time}):\n"
             summary += f"User: {interaction['user_input']}\n"
@@ -141,6 +149,15 @@ def end_muse_conversation():
     """Global function to end the current conversation."""
     conversation_manager.end_conversation()
 
+def has_conversation_interactions():
+    """
+    Global function to check whether the current conversation already has interactions.
+    
+    Returns:
+        bool: True if at least one interaction has been added
+    """
+    return conversation_manager.has_interactions()
+
 def get_conversation_context(current_input):
     """
     Global function to get context from the current conversation and memory.
@@ -0,0 +1,121 @@
+"""
+Muse Summoner System - Council Module
+
+This module implements council mode, where one message is put to several muses
+at once. Each muse answers on its own worker thread with its own memory context
+and generation call, and answers are handed back in the order they finish, so
+the whole council takes about as long as its slowest member.
+
+Council mode sits beside the single active muse: it does not change which muse
+is active, and each answer is stored in the answering muse's own memory.
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import get_config
+from muse_profiles import get_all_muses, get_muse_by_name
+from enhanced_response_generator import EnhancedMuseResponseGenerator
+
+# Phrases that put the rest of the message to the council, e.g. "Convene the council: should I move?"
+COUNCIL_PATTERN = re.compile(r'^\s*(?:(?:convene|ask) the council\b[\s:,.-]*|council\s*:\s*)', re.IGNORECASE)
+
+
+class MuseCouncil:
+    def __init__(self, max_workers=None, max_members=None):
+        """
+        Initialize the council.
+        
+        Args:
+            max_workers (int): Muses that can answer at the same time
+            max_members (int): Maximum muses consulted for one message
+        """
+        self.max_members = max_members or get_config("council.max_members", 5)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or get_config("council.max_workers", 8),
+            thread_name_prefix="muse-council"
+        )
+    
+    def extract_task(self, user_input):
+        """
+        Get the task from a council request.
+        
+        Args:
+            user_input (str): The user's input
+        
+        Returns:
+            str: The task for the council, or None if the input is not a council request
+        """
+        match = COUNCIL_PATTERN.match(user_input)
+        if not match:
+            return None
+        return user_input[match.end():].strip()
+    
+    def get_members(self, muse_names=None):
+        """
+        Get the muses that sit on the council.
+        
+        Args:
+            muse_names (list): Names of the muses to consult (defaults to all muses)
+        
+        Returns:
+            list: The muse profiles, at most max_members of them
+        """
+        if muse_names:
+            members = [get_muse_by_name(name) for name in dict.fromkeys(muse_names)]
+            members = [muse for muse in members if muse]
+        else:
+            members = get_all_muses()
+        return members[:self.max_members]
+    
+    def convene(self, task, muse_names=None):
+        """
+        Put a task to the council and yield answers as they finish.
+        
+        Args:
+            task (str): The user's request
+            muse_names (list): Names of the muses to consult (defaults to all muses)
+        
+        Yields:
+            dict: muse_name and response for each muse, in completion order
+        """
+        futures = {
+            self.executor.submit(self._answer, muse, task): muse
+            for muse in self.get_members(muse_names)
+        }
+        
+        for future in as_completed(futures):
+            muse = futures[future]
+            try:
+                response = future.result()
+            except Exception as e:
+                print(f"Error getting council response from {muse.name}: {e}")
+                response = f"{muse.name} is silent for now."
+            yield {"muse_name": muse.name, "response": response}
+    
+    def _answer(self, muse, task):
+        """Have one muse answer on its own generator, so members never share state."""
+        return EnhancedMuseResponseGenerator().generate_standalone_response(muse, task)
+
+
+# Create a singleton instance for global use
+muse_council = MuseCouncil()
+
+def extract_council_task(user_input):
+    """
+    Global function to get the task from a council request.
+    Returns None if the input is not a council request.
+    """
+    return muse_council.extract_task(user_input)
+
+def convene_council(task, muse_names=None):
+    """
+    Global function to put a task to several muses concurrently.
+    Yields a dict with muse_name and response for each muse as it finishes.
+    """
+    return muse_council.convene(task, muse_names)
+
+def is_muse_name_list(muse_names):
+    """
+    Check the muses named for a council request: a list of names, or None for all muses.
+    """
+    return muse_names is None or (isinstance(muse_names, list) and all(isinstance(name, str) for name in muse_names))
@@ -0,0 +1,288 @@
+"""
+Muse Summoner System - Data Transfer Module
+
+This module streams muse profiles and per-muse memories in and out of the system
+as gzip-compressed NDJSON. Exports are produced record by record and imports are
+processed in fixed-size chunks with a checkpoint after each one, so a large
+deployment can be backed up or migrated without holding it all in memory, and an
+interrupted import can be resumed where it stopped.
+
+Each line is a JSON object with a "type" field:
+    {"type": "muse", "data": {...MuseProfile.to_dict()...}}
+    {"type": "memory", "muse": "Muse Name", "data": {"timestamp": <epoch ms>, "user_input": ..., "muse_response": ...}}
+"""
+
+import os
+import io
+import re
+import json
+import gzip
+import zlib
+import time
+import secrets
+from config import get_config
+from muse_profiles import MuseProfile, get_all_muses, add_muse, get_muse_by_name
+from memory_system import iter_conversation_history, import_conversation_memories
+from timestamps import to_timestamp
+from file_locks import write_json
+
+MUSE_REQUIRED_FIELDS = [
+    "name", "trigger_phrase", "voice_tone", "purpose", "tasks_supported",
+    "catchphrases", "signature_question", "sample_tasks"
+]
+MEMORY_REQUIRED_FIELDS = ["timestamp", "user_input", "muse_response"]
+
+# Keep only the first errors in the progress record so it stays small
+MAX_RECORDED_ERRORS = 50
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{16}$")
+
+
+def iter_export_records(include_memories=True):
+    """
+    Iterate over all export records, one muse at a time.
+    
+    Args:
+        include_memories (bool): Whether to include each muse's memories
+    
+    Yields:
+        dict: Export records
+    """
+    for muse in get_all_muses():
+        yield {"type": "muse", "data": muse.to_dict()}
+        
+        if include_memories:
+            for entry in iter_conversation_history(muse.name):
+                yield {"type": "memory", "muse": muse.name, "data": entry}
+
+
+def iter_compressed_export(include_memories=True, flush_every=200):
+    """
+    Stream the export as gzip-compressed NDJSON.
+    
+    Args:
+        include_memories (bool): Whether to include each muse's memories
+        flush_every (int): Number of records between forced compressor flushes
+    
+    Yields:
+        bytes: Chunks of the gzip stream
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 writes a gzip container
+    
+    for count, record in enumerate(iter_export_records(include_memories), 1):
+        chunk = compressor.compress((json.dumps(record) + "\n").encode("utf-8"))
+        if count % flush_every == 0:
+            chunk += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if chunk:
+            yield chunk
+    
+    yield compressor.flush()
+
+
+def validate_record(record):
+    """
+    Validate a single import record.
+    
+    Args:
+        record (dict): The decoded record
+    
+    Returns:
+        str: An error message, or None if the record is valid
+    """
+    if not isinstance(record, dict):
+        return "Record is not a JSON object"
+    
+    data = record.get("data")
+    if not isinstance(data, dict):
+        return "Record has no data object"
+    
+    record_type = record.get("type")
+    if record_type == "muse":
+        missing = [field for field in MUSE_REQUIRED_FIELDS if field not in data]
+        if missing:
+            return f"Muse is missing fields: {', '.join(missing)}"
+        for field in ["tasks_supported", "catchphrases", "sample_tasks"]:
+            if not isinstance(data[field], list):
+                return f"Muse field {field} must be a list"
+        if not isinstance(data["name"], str) or not isinstance(data["trigger_phrase"], str):
+            return "Muse name and trigger phrase must be strings"
+        if not data["name"].strip() or not data["trigger_phrase"].strip():
+            return "Muse name and trigger phrase must not be empty"
+        return None
+    
+    if record_type == "memory":
+        if not isinstance(record.get("muse"), str) or not record["muse"].strip():
+            return "Memory record has no muse name"
+        missing = [field for field in MEMORY_REQUIRED_FIELDS if field not in data]
+        if missing:
+            return f"Memory is missing fields: {', '.join(missing)}"
+        if not isinstance(data["user_input"], str) or not isinstance(data["muse_response"], str):
+            return "Memory user_input and muse_response must be strings"
+        try:
+            # Exports from before epoch timestamps carry ISO strings, which are converted on import
+            to_timestamp(data["timestamp"])
+        except ValueError:
+            return "Memory has an invalid timestamp"
+        return None
+    
+    return f"Unknown record type: {record_type}"
+
+
+class ImportJob:
+    def __init__(self, job_id=None, progress_dir=None, chunk_size=None):
+        """
+        Initialize an import job, loading its saved progress if it exists.
+        
+        Args:
+            job_id (str): The job to resume, or None to start a new one
+            progress_dir (str): Directory for progress checkpoints
+            chunk_size (int): Number of lines committed per checkpoint
+        """
+        if job_id is not None and not JOB_ID_PATTERN.match(job_id):
+            raise ValueError(f"Invalid import job ID: {job_id}")
+        
+        self.progress_dir = progress_dir or get_config("data_transfer.progress_dir", "transfers")
+        self.chunk_size = chunk_size or get_config("data_transfer.chunk_size", 500)
+        self.job_id = job_id or secrets.token_hex(8)
+        
+        os.makedirs(self.progress_dir, exist_ok=True)
+        
+        self.progress = self._load_progress() or {
+            "job_id": self.job_id,
+            "status": "pending",
+            "lines_committed": 0,
+            "muses_imported": 0,
+            "memories_imported": 0,
+            "error_count": 0,
+            "errors": [],
+            "started_at": time.time(),
+            "updated_at": time.time()
+        }
+    
+    @property
+    def progress_file(self):
+        """Path of this job's progress checkpoint."""
+        return os.path.join(self.progress_dir, f"import_{self.job_id}.json")
+    
+    def run(self, stream, compressed=True):
+        """
+        Process an NDJSON import stream, resuming after the last committed line.
+        
+        Args:
+            stream: A binary file-like object with the import data
+            compressed (bool): Whether the stream is gzip-compressed
+        
+        Returns:
+            dict: The job's progress record
+        """
+        if compressed:
+            stream = gzip.GzipFile(fileobj=stream, mode="rb")
+        lines = io.TextIOWrapper(stream, encoding="utf-8")
+        
+        skip = self.progress["lines_committed"]
+        self.progress["status"] = "running"
+        
+        chunk = []
+        try:
+            for line_number, line in enumerate(lines, 1):
+                # Lines before the checkpoint were committed by an earlier run
+                if line_number <= skip:
+                    continue
+                
+                chunk.append((line_number, line))
+                if len(chunk) >= self.chunk_size:
+                    self._commit_chunk(chunk)
+                    chunk = []
+            
+            if chunk:
+                self._commit_chunk(chunk)
+        except (OSError, EOFError, UnicodeDecodeError) as e:
+            # A truncated upload leaves the checkpoint at the last full chunk
+            self.progress["status"] = "interrupted"
+            self._record_error(None, f"Stream ended early: {e}")
+            self._save_progress()
+            return self.progress
+        
+        self.progress["status"] = "completed"
+        self._save_progress()
+        return self.progress
+    
+    def _commit_chunk(self, chunk):
+        """Validate and apply one chunk of lines, then checkpoint."""
+        memories_by_muse = {}
+        
+        for line_number, line in chunk:
+            line = line.strip()
+            if not line:
+                continue
+            
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                self._record_error(line_number, f"Invalid JSON: {e}")
+                continue
+            
+            error = validate_record(record)
+            if error:
+                self._record_error(line_number, error)
+                continue
+            
+            if record["type"] == "muse":
+                try:
+                    add_muse(MuseProfile.from_dict(record["data"]))
+                except ValueError as e:
+                    self._record_error(line_number, str(e))
+                    continue
+                self.progress["muses_imported"] += 1
+            else:
+                memories_by_muse.setdefault(record["muse"], []).append({
+                    field: record["data"][field] for field in MEMORY_REQUIRED_FIELDS
+                })
+        
+        # One write per muse per chunk rather than one per entry
+        for muse_name, entries in memories_by_muse.items():
+            muse = get_muse_by_name(muse_name)
+            self.progress["memories_imported"] += import_conversation_memories(
+                muse.name if muse else muse_name, entries)
+        
+        self.progress["lines_committed"] = chunk[-1][0]
+        self._save_progress()
+    
+    def _record_error(self, line_number, message):
+        """Count an error and keep its details if there is room."""
+        self.progress["error_count"] += 1
+        if len(self.progress["errors"]) < MAX_RECORDED_ERRORS:
+            self.progress["errors"].append({"line": line_number, "error": message})
+    
+    def _load_progress(self):
+        """Load the saved progress for this job, if any."""
+        if os.path.exists(self.progress_file):
+            try:
+                with open(self.progress_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError):
+                return None
+        return None
+    
+    def _save_progress(self):
+        """Write the progress checkpoint for this job, replacing the previous one atomically."""
+        self.progress["updated_at"] = time.time()
+        try:
+            write_json(self.progress_file, self.progress)
+        except IOError as e:
+            print(f"Error saving import progress for job {self.job_id}: {e}")
+
+
+def get_import_progress(job_id, progress_dir=None):
+    """
+    Get the saved progress of an import job.
+    
+    Args:
+        job_id (str): The import job ID
+        progress_dir (str): Directory for progress checkpoints
+    
+    Returns:
+        dict: The job's progress record, or None if the job is unknown
+    """
+    job = ImportJob(job_id, progress_dir)
+    return job.progress if os.path.exists(job.progress_file) else None
@@ -0,0 +1,216 @@
+"""
+Muse Summoner System - File Locks Module
+
+This module lets several worker processes and threads share the files the
+system keeps on disk. Each resource is guarded by an advisory lock on a
+sidecar ".lock" file (fcntl.flock, exclusive across processes) combined with a
+thread lock (exclusive within a process). Files are never rewritten in place:
+new contents are written to a temporary file in the same directory and renamed
+over the original, so a reader sees either the old file or the new one, never
+a partial write.
+
+Writers that read a file, change it and write it back use optimistic version
+checks. They note the file's version when reading, do their work without
+holding the lock, and write only if the version is still the same, starting
+again from a fresh read when another writer got there first.
+"""
+
+import os
+import json
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Not available on Windows; locks then only exclude threads of the same process
+
+LOCK_SUFFIX = ".lock"
+
+# Passed as the expected version to skip the version check
+ANY_VERSION = object()
+
+
+class VersionConflict(Exception):
+    """Raised when a file changed between being read and being written back."""
+
+
+class FileLock:
+    def __init__(self, path):
+        """
+        Initialize the lock for a resource.
+        
+        Args:
+            path (str): Path of the resource; the lock is held on path + ".lock"
+        """
+        self.path = path
+        self.lock_path = path + LOCK_SUFFIX
+        self.thread_lock = threading.RLock()
+        self.depth = 0  # Re-entrant acquisitions by the owning thread
+        self.lock_file = None
+    
+    def acquire(self, blocking=True):
+        """
+        Acquire the lock.
+        
+        Args:
+            blocking (bool): Wait until other threads and processes release it, rather than giving up
+        
+        Returns:
+            bool: True if the lock was acquired
+        """
+        if not self.thread_lock.acquire(blocking):
+            return False
+        if self.depth == 0 and fcntl is not None:
+            lock_file = None
+            try:
+                lock_file = open(self.lock_path, "a")
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except OSError as e:
+                if lock_file is not None:
+                    lock_file.close()
+                self.thread_lock.release()
+                if not blocking and isinstance(e, BlockingIOError):
+                    return False
+                raise
+            self.lock_file = lock_file
+        self.depth += 1
+        return True
+    
+    def release(self):
+        """Release the lock."""
+        self.depth -= 1
+        if self.depth == 0 and self.lock_file is not None:
+            fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
+            self.lock_file.close()
+            self.lock_file = None
+        self.thread_lock.release()
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+# One lock object per resource, shared by every thread of this process
+file_locks = {}
+file_locks_guard = threading.Lock()
+
+
+def file_lock(path):
+    """
+    Get the lock for a resource, for use in a with statement.
+    
+    Lock files are left in place when released; removing them would let two
+    processes lock different files for the same resource.
+    
+    Args:
+        path (str): Path of the resource
+    
+    Returns:
+        FileLock: The resource's lock
+    """
+    key = os.path.abspath(path)
+    with file_locks_guard:
+        lock = file_locks.get(key)
+        if lock is None:
+            lock = file_locks[key] = FileLock(key)
+        return lock
+
+
+def file_version(path):
+    """
+    Identify the current version of a file.
+    
+    Every atomic write replaces the file with a new inode, so the version
+    changes with each write even when the size and modification time do not.
+    
+    Args:
+        path (str): Path of the file
+    
+    Returns:
+        tuple: (inode, modification time, size), or None if there is no file
+    """
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return info.st_ino, info.st_mtime_ns, info.st_size
+
+
+@contextmanager
+def atomic_write(path, mode="w", encoding=None):
+    """
+    Open a temporary file that replaces path once the with block completes.
+    
+    If the block raises, the temporary file is removed and path is left as it was.
+    
+    Args:
+        path (str): Path of the file to replace
+        mode (str): "w" for text or "wb" for binary
+        encoding (str): Text encoding (text mode only)
+    
+    Yields:
+        file: The temporary file, open for writing
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        
+        # mkstemp files are private; keep the permissions of the file being replaced
+        try:
+            os.chmod(temp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except OSError:
+            pass
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(path, data, indent=2):
+    """
+    Atomically replace a file with JSON data.
+    
+    Args:
+        path (str): Path of the file
+        data: The JSON-serializable data
+        indent (int): Indentation of the output
+    """
+    with atomic_write(path) as f:
+        json.dump(data, f, indent=indent)
+
+
+def read_json(path):
+    """
+    Read a JSON file together with the version it was read at.
+    
+    Args:
+        path (str): Path of the file
+    
+    Returns:
+        tuple: (data, version), or (None, None) if there is no file
+    
+    Raises:
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    try:
+        f = open(path, "r")
+    except FileNotFoundError:
+        return None, None
+    
+    with f:
+        # Stat the open file, so the version matches the contents even if it is replaced meanwhile
+        info = os.fstat(f.fileno())
+        return json.load(f), (info.st_ino, info.st_mtime_ns, info.st_size)
@@ -0,0 +1,12 @@
+"""
+Muse Summoner System - Gunicorn Settings
+
+Loaded automatically when gunicorn is started from the project root (see the
+Procfile, Dockerfile and app.yaml).
+"""
+
+
+def post_worker_init(worker):
+    """Start the background reminder worker in each web worker once the app is loaded."""
+    from ritual_scheduler import start_ritual_scheduler
+    start_ritual_scheduler()
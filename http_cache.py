@@ -0,0 +1,187 @@
+"""
+Muse Summoner System - HTTP Cache Module
+
+This module serves read-mostly responses (muse listings and pages that only
+change with the muse catalog) from precomputed payloads. Each payload is
+rendered and serialized once per muse registry generation, compressed ahead of
+time with gzip and, when the brotli package is installed, brotli, and tagged
+with an ETag and Last-Modified date. Clients that already hold the current
+version get an empty 304 response.
+
+Calling add_muse bumps the registry generation, which invalidates every cached
+payload on its next request.
+"""
+
+import gzip
+import hashlib
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from flask import request, Response
+from config import get_config
+from muse_profiles import get_registry_version
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class CachedPayload:
+    def __init__(self, body, mimetype, generation, updated_at, min_compress_size):
+        """
+        Precompute a response body, its validators and its compressed variants.
+        
+        Args:
+            body (bytes): The uncompressed response body
+            mimetype (str): The response content type
+            generation (int): The muse registry generation the body was built from
+            updated_at (float): When the registry last changed, as a Unix timestamp
+            min_compress_size (int): Bodies smaller than this are sent uncompressed
+        """
+        self.body = body
+        self.mimetype = mimetype
+        self.generation = generation
+        self.last_modified = formatdate(int(updated_at), usegmt=True)
+        self.modified_at = int(updated_at)
+        self.etag = f'W/"{generation}-{hashlib.sha1(body).hexdigest()[:16]}"'
+        
+        self.encoded = {}
+        if len(body) >= min_compress_size:
+            self.encoded["gzip"] = gzip.compress(body, compresslevel=9)
+            if brotli:
+                self.encoded["br"] = brotli.compress(body)
+    
+    def is_fresh_for(self, if_none_match, if_modified_since):
+        """
+        Check whether the client's cached copy is still current.
+        
+        Args:
+            if_none_match (str): The If-None-Match header, if any
+            if_modified_since (str): The If-Modified-Since header, if any
+        
+        Returns:
+            bool: True if a 304 response is enough
+        """
+        # ETags take precedence over dates when the client sends both
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or self.etag in tags or self.etag[2:] in tags
+        
+        if if_modified_since:
+            try:
+                return int(parsedate_to_datetime(if_modified_since).timestamp()) >= self.modified_at
+            except (TypeError, ValueError):
+                return False
+        
+        return False
+    
+    def choose_encoding(self, accept_encoding):
+        """Pick the best precomputed encoding the client accepts, or None for identity."""
+        accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        for encoding in ("br", "gzip"):
+            if encoding in self.encoded and encoding in accepted:
+                return encoding
+        return None
+
+
+class ResponseCache:
+    def __init__(self, min_compress_size=None):
+        """
+        Initialize an empty payload cache.
+        
+        Args:
+            min_compress_size (int): Bodies smaller than this many bytes are not compressed
+        """
+        self.min_compress_size = min_compress_size or get_config("http_cache.min_compress_size", 1024)
+        self.payloads = {}
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "builds": 0, "not_modified": 0}
+    
+    def get_payload(self, key, build, mimetype):
+        """
+        Get the payload for a key, rebuilding it if the muse registry changed.
+        
+        Args:
+            key (str): Identifies the cached response
+            build (callable): Returns the response body as str or bytes
+            mimetype (str): The response content type
+        
+        Returns:
+            CachedPayload: The current payload
+        """
+        generation, updated_at = get_registry_version()
+        
+        with self.lock:
+            payload = self.payloads.get(key)
+            if payload and payload.generation == generation:
+                self.stats["hits"] += 1
+                return payload
+        
+        # Build outside the lock; concurrent builders produce identical payloads
+        body = build()
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        payload = CachedPayload(body, mimetype, generation, updated_at, self.min_compress_size)
+        
+        with self.lock:
+            self.payloads[key] = payload
+            self.stats["builds"] += 1
+        return payload
+    
+    def respond(self, key, build, mimetype="application/json"):
+        """
+        Build a conditional, compressed response for the current request.
+        
+        Args:
+            key (str): Identifies the cached response
+            build (callable): Returns the response body as str or bytes
+            mimetype (str): The response content type
+        
+        Returns:
+            Response: A 304 response or the payload in the best accepted encoding
+        """
+        payload = self.get_payload(key, build, mimetype)
+        
+        if payload.is_fresh_for(request.headers.get("If-None-Match"), request.headers.get("If-Modified-Since")):
+            with self.lock:
+                self.stats["not_modified"] += 1
+            response = Response(status=304)
+        else:
+            encoding = payload.choose_encoding(request.headers.get("Accept-Encoding", ""))
+            response = Response(payload.encoded[encoding] if encoding else payload.body, mimetype=mimetype)
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        
+        response.headers["ETag"] = payload.etag
+        response.headers["Last-Modified"] = payload.last_modified
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+    
+    def get_stats(self):
+        """
+        Get cache counters.
+        
+        Returns:
+            dict: Payload hits, rebuilds, 304 responses and cached payload count
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats["payloads"] = len(self.payloads)
+        stats["brotli"] = brotli is not None
+        return stats
+
+
+# Create a singleton instance for global use
+response_cache = ResponseCache()
+
+def cached_response(key, build, mimetype="application/json"):
+    """
+    Global function to serve a precomputed, conditional and compressed response.
+    The payload is rebuilt only when the muse registry generation changes.
+    """
+    return response_cache.respond(key, build, mimetype)
+
+def get_response_cache_stats():
+    """Global function to get response cache counters."""
+    return response_cache.get_stats()
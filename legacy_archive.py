@@ -0,0 +1,317 @@
+"""
+Muse Summoner System - Legacy Archive Module
+
+This module implements the legacy curation capability: compiling the key
+reflections from a muse's conversation history into a personal archive. The
+archive is produced by a pipeline of generators. History is read from storage
+in chunks, reflections are selected and grouped by month and theme, and the
+document is rendered and written section by section, so the working set stays
+the same size however long the history is.
+
+Archives are built by background jobs. Each job records its progress next to
+the archive file, and the finished Markdown document is served by the web app
+for download.
+"""
+
+import os
+import re
+import json
+import time
+import heapq
+import secrets
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from config import get_config
+from memory_system import iter_conversation_history
+from semantic_memory import HashingEmbedder
+from theme_statistics import EMOTIONAL_THEMES, classify_task_type
+from response_templates import PARAGRAPH_SEPARATOR
+from timestamps import format_timestamp
+from file_locks import atomic_write, write_json
+
+# Entries asking for these kinds of help count as reflections even without a recognized theme
+REFLECTIVE_TASK_TYPES = {"emotional_reflection", "heartbreak_grief_processing", "identity_legacy_exploration"}
+
+# Section heading for reflections without an emotional theme
+UNTHEMED = "reflections"
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{16}$")
+
+# Runs archive builds off the request thread
+archive_executor = ThreadPoolExecutor(
+    max_workers=get_config("legacy_archive.max_workers", 2),
+    thread_name_prefix="legacy-archive"
+)
+
+
+def select_reflections(entries):
+    """
+    Select the entries worth keeping in an archive.
+    
+    Args:
+        entries (iterable): Memory entries, oldest first
+    
+    Yields:
+        tuple: (entry, theme) for each reflection, where theme is the entry's first emotional theme
+    """
+    matcher = HashingEmbedder(dimensions=1)
+    for entry in entries:
+        concepts = matcher.concepts(entry["user_input"])
+        themes = [theme for theme in EMOTIONAL_THEMES if theme in concepts]
+        if themes:
+            yield entry, themes[0]
+        elif classify_task_type(entry["user_input"]) in REFLECTIVE_TASK_TYPES:
+            yield entry, UNTHEMED
+
+
+def group_by_period(reflections, max_per_theme=3):
+    """
+    Group reflections by month and theme, keeping only the most substantial ones.
+    
+    History is time-ordered, so only the current month is held at a time, and
+    each theme keeps at most max_per_theme entries in a bounded heap.
+    
+    Args:
+        reflections (iterable): (entry, theme) pairs, oldest first
+        max_per_theme (int): Reflections kept per theme per month
+    
+    Yields:
+        tuple: (period "YYYY-MM", {theme: entries oldest first}, Counter of reflections per theme)
+    """
+    period = None
+    kept = {}
+    counts = Counter()
+    
+    for sequence, (entry, theme) in enumerate(reflections):
+        entry_period = format_timestamp(entry["timestamp"], "%Y-%m")
+        if entry_period != period:
+            if period is not None:
+                yield period, _sorted_groups(kept), counts
+            period, kept, counts = entry_period, {}, Counter()
+        
+        counts[theme] += 1
+        heap = kept.setdefault(theme, [])
+        item = (len(entry["user_input"]), sequence, entry)
+        if len(heap) < max_per_theme:
+            heapq.heappush(heap, item)
+        else:
+            heapq.heappushpop(heap, item)
+    
+    if period is not None:
+        yield period, _sorted_groups(kept), counts
+
+
+def _sorted_groups(kept):
+    """Order each theme's kept reflections by time, and the themes by the fixed theme order."""
+    order = EMOTIONAL_THEMES + [UNTHEMED]
+    return {
+        theme: [item[2] for item in sorted(kept[theme], key=lambda item: item[1])]
+        for theme in order if theme in kept
+    }
+
+
+def _excerpt(text, max_chars):
+    """Shorten a quoted passage for the archive."""
+    text = " ".join(text.split())
+    return text if len(text) <= max_chars else text[:max_chars - 3].rstrip() + "..."
+
+
+def render_archive(muse_name, periods, max_excerpt_chars=280):
+    """
+    Render the archive as Markdown, one section per month.
+    
+    Args:
+        muse_name (str): The name of the muse
+        periods (iterable): Output of group_by_period
+        max_excerpt_chars (int): Longest quoted passage
+    
+    Yields:
+        str: Chunks of the document
+    """
+    yield f"# A Legacy Archive\n\nKey reflections from conversations with {muse_name}.\n"
+    
+    totals = Counter()
+    first_period = last_period = None
+    
+    for period, groups, counts in periods:
+        totals.update(counts)
+        first_period = first_period or period
+        last_period = period
+        
+        lines = [f"\n## {period}\n"]
+        for theme, entries in groups.items():
+            noted = counts[theme]
+            lines.append(f"\n### {theme.capitalize()} ({noted} reflection{'s' if noted != 1 else ''})\n")
+            for entry in entries:
+                lines.append(f"\n> {_excerpt(entry['user_input'], max_excerpt_chars)}\n")
+                # Quote the muse's reply rather than its greeting, which is the first paragraph
+                paragraphs = entry.get("muse_response", "").split(PARAGRAPH_SEPARATOR)
+                reply = paragraphs[1] if len(paragraphs) > 1 else paragraphs[0]
+                if reply.strip():
+                    lines.append(f"\n{muse_name}: {_excerpt(reply, max_excerpt_chars)}\n")
+        yield "".join(lines)
+    
+    if not totals:
+        yield "\nNo reflections have been recorded yet.\n"
+        return
+    
+    lines = [f"\n## Threads Across the Collection\n\nFrom {first_period} to {last_period}:\n\n"]
+    for theme, count in totals.most_common():
+        lines.append(f"- {theme.capitalize()}: {count}\n")
+    yield "".join(lines)
+
+
+class ArchiveJob:
+    def __init__(self, job_id=None, archive_dir=None, muse_name=None):
+        """
+        Initialize an archive job, loading its saved progress if it exists.
+        
+        Args:
+            job_id (str): The job to load, or None to create a new one
+            archive_dir (str): Directory for archives and their progress records
+            muse_name (str): The muse whose history is archived (new jobs only)
+        """
+        if job_id is not None and not JOB_ID_PATTERN.match(job_id):
+            raise ValueError(f"Invalid archive job ID: {job_id}")
+        
+        self.archive_dir = archive_dir or get_config("legacy_archive.archive_dir", "archives")
+        self.chunk_size = get_config("legacy_archive.chunk_size", 100)
+        self.max_per_theme = get_config("legacy_archive.max_per_theme", 3)
+        self.max_excerpt_chars = get_config("legacy_archive.max_excerpt_chars", 280)
+        self.job_id = job_id or secrets.token_hex(8)
+        
+        os.makedirs(self.archive_dir, exist_ok=True)
+        
+        self.progress = self._load_progress() or {
+            "job_id": self.job_id,
+            "muse_name": muse_name,
+            "status": "pending",
+            "entries_read": 0,
+            "reflections": 0,
+            "periods": 0,
+            "bytes_written": 0,
+            "error": None,
+            "started_at": time.time(),
+            "updated_at": time.time()
+        }
+    
+    @property
+    def progress_file(self):
+        """Path of this job's progress record."""
+        return os.path.join(self.archive_dir, f"archive_{self.job_id}.json")
+    
+    @property
+    def archive_file(self):
+        """Path of this job's finished archive."""
+        return os.path.join(self.archive_dir, f"archive_{self.job_id}.md")
+    
+    def run(self):
+        """
+        Build the archive, writing each section as soon as it is rendered.
+        
+        Returns:
+            dict: The job's progress record
+        """
+        self.progress["status"] = "running"
+        self._save_progress()
+        
+        try:
+            periods = group_by_period(
+                select_reflections(self._count(self._read_history())), self.max_per_theme)
+            
+            # The archive replaces any previous one only once it is complete
+            with atomic_write(self.archive_file, "w", encoding="utf-8") as f:
+                for chunk in render_archive(self.progress["muse_name"], self._track(periods), self.max_excerpt_chars):
+                    f.write(chunk)
+                    self.progress["bytes_written"] += len(chunk.encode("utf-8"))
+            
+            self.progress["status"] = "completed"
+        except Exception as e:
+            print(f"Error building archive {self.job_id}: {e}")
+            self.progress["status"] = "failed"
+            self.progress["error"] = str(e)
+        
+        self._save_progress()
+        return self.progress
+    
+    def _read_history(self):
+        """Stream the muse's history from storage in chunks."""
+        return iter_conversation_history(self.progress["muse_name"], self.chunk_size)
+    
+    def _count(self, entries):
+        """Count entries as they pass through the pipeline."""
+        for entry in entries:
+            self.progress["entries_read"] += 1
+            yield entry
+    
+    def _track(self, periods):
+        """Record progress after each month is grouped."""
+        for period, groups, counts in periods:
+            self.progress["periods"] += 1
+            self.progress["reflections"] += sum(counts.values())
+            self._save_progress()
+            yield period, groups, counts
+    
+    def _load_progress(self):
+        """Load the saved progress for this job, if any."""
+        if os.path.exists(self.progress_file):
+            try:
+                with open(self.progress_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError):
+                return None
+        return None
+    
+    def _save_progress(self):
+        """Write the progress record for this job."""
+        self.progress["updated_at"] = time.time()
+        try:
+            # Replace the record in one step so status polls never read a partial file
+            write_json(self.progress_file, self.progress)
+        except IOError as e:
+            print(f"Error saving archive progress for job {self.job_id}: {e}")
+
+
+def start_archive_job(muse_name, archive_dir=None):
+    """
+    Start building a legacy archive in the background.
+    
+    Args:
+        muse_name (str): The muse whose history is archived
+        archive_dir (str): Directory for archives and their progress records
+    
+    Returns:
+        dict: The new job's progress record
+    """
+    job = ArchiveJob(archive_dir=archive_dir, muse_name=muse_name)
+    job._save_progress()
+    archive_executor.submit(job.run)
+    return dict(job.progress)
+
+def get_archive_progress(job_id, archive_dir=None):
+    """
+    Get the saved progress of an archive job.
+    
+    Args:
+        job_id (str): The archive job ID
+        archive_dir (str): Directory for archives and their progress records
+    
+    Returns:
+        dict: The job's progress record, or None if the job is unknown
+    """
+    job = ArchiveJob(job_id, archive_dir)
+    return job.progress if os.path.exists(job.progress_file) else None
+
+def get_archive_file(job_id, archive_dir=None):
+    """
+    Get the path of a finished archive.
+    
+    Args:
+        job_id (str): The archive job ID
+        archive_dir (str): Directory for archives and their progress records
+    
+    Returns:
+        str: The archive's path, or None if the job is unknown or not finished
+    """
+    job = ArchiveJob(job_id, archive_dir)
+    return os.path.abspath(job.archive_file) if os.path.exists(job.archive_file) else None
@@ -0,0 +1,149 @@
+"""
+Muse Summoner System - Memory Cache Module
+
+This module provides the bounded cache that keeps loaded muse memories
+resident between requests. The cache is limited by the total size of its
+values in bytes and evicts the least recently used store first, so a
+long-running worker's memory stays flat no matter how many stores it touches.
+
+Each cached value carries a signature of the file it was loaded from (its
+modification time and size). A lookup with a different signature, such as
+after another worker rewrote the file, drops the stale value and counts as a
+miss.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class MemoryCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=None, on_discard=None):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_bytes (int): Upper bound on the total size of cached values
+            max_entries (int): Optional upper bound on the number of cached values
+            on_discard (callable): Called with the key of each value that is evicted or invalidated
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.on_discard = on_discard
+        self.entries = OrderedDict()  # key -> (value, size, signature), least recently used first
+        self.total_bytes = 0
+        self.lock = threading.RLock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+    
+    def get(self, key, signature=None):
+        """
+        Get a cached value and mark it as recently used.
+        
+        Args:
+            key (str): The cache key
+            signature: The current signature of the value's source
+        
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self.lock:
+            value = self._lookup(key, signature)
+            self.stats["hits" if value is not None else "misses"] += 1
+            return value
+    
+    def contains(self, key, signature=None):
+        """
+        Check for a current value without counting a hit or miss or changing its recency.
+        
+        Args:
+            key (str): The cache key
+            signature: The current signature of the value's source
+        
+        Returns:
+            bool: True if a current value is cached
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry is not None and entry[2] == signature
+    
+    def put(self, key, value, size, signature=None):
+        """
+        Cache a value, evicting the least recently used values to stay within the limits.
+        
+        Args:
+            key (str): The cache key
+            value: The value to cache
+            size (int): The value's size in bytes
+            signature: The signature of the value's source
+        """
+        discarded = []
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            
+            # A value larger than the whole cache is not kept
+            if size > self.max_bytes:
+                if previous is not None:
+                    discarded.append(key)
+            else:
+                self.entries[key] = (value, size, signature)
+                self.total_bytes += size
+            
+            while self.entries and (self.total_bytes > self.max_bytes or
+                                    (self.max_entries and len(self.entries) > self.max_entries)):
+                evicted_key, (evicted, evicted_size, evicted_signature) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.stats["evictions"] += 1
+                discarded.append(evicted_key)
+        
+        self._notify(discarded)
+    
+    def discard(self, key):
+        """
+        Remove a value from the cache.
+        
+        Args:
+            key (str): The cache key
+        """
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.total_bytes -= entry[1]
+    
+    def _lookup(self, key, signature):
+        """Find a value, dropping it if its signature is out of date."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        
+        if entry[2] != signature:
+            del self.entries[key]
+            self.total_bytes -= entry[1]
+            self.stats["invalidations"] += 1
+            self._notify([key])
+            return None
+        
+        self.entries.move_to_end(key)
+        return entry[0]
+    
+    def _notify(self, keys):
+        """Tell the owner which keys left the cache."""
+        if self.on_discard:
+            for key in keys:
+                self.on_discard(key)
+    
+    def get_stats(self):
+        """
+        Get cache counters.
+        
+        Returns:
+            dict: Hits, misses, evictions, invalidations, hit rate and current usage
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self.entries)
+            stats["bytes"] = self.total_bytes
+        stats["max_bytes"] = self.max_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,258 @@
+"""
+Muse Summoner System - Memory Columns Module
+
+This module provides the compact in-memory representation used for cached muse
+memories. Instead of one dict with three string objects per entry, a store
+keeps its entries in columns: an array of timestamps, an array of offsets and
+a single UTF-8 buffer holding every user input and response back to back.
+Responses built from templates are kept as their template references (see
+response_templates.py) and rendered when an entry is read.
+
+A MemoryColumns store reads like a list of memory entries: it supports len(),
+indexing, slicing and iteration, and each access builds only the entries it
+returns.
+
+Usage:
+    python memory_columns.py [--entries N]
+"""
+
+import gc
+import sys
+import json
+import random
+import argparse
+import tracemalloc
+from array import array
+from response_templates import render_response, encode_memory
+
+# How an entry's response is held in the buffer
+RAW_RESPONSE = 0
+TEMPLATED_RESPONSE = 1
+
+
+class MemoryColumns:
+    __slots__ = ("timestamps", "offsets", "kinds", "buffer")
+    
+    def __init__(self, entries=()):
+        """
+        Build a column store from memory entries.
+        
+        Args:
+            entries (iterable): Memory entries, oldest first, either rendered
+                (with muse_response) or as stored (with response_parts)
+        """
+        self.timestamps = array("q")
+        self.offsets = array("Q")  # Start of the user input and start of the response, per entry
+        self.kinds = bytearray()
+        self.buffer = bytearray()
+        for entry in entries:
+            self.append(entry)
+    
+    def append(self, entry):
+        """
+        Add an entry at the end of the store.
+        
+        Args:
+            entry (dict): A memory entry with timestamp, user_input and muse_response or response_parts
+        """
+        if "response_parts" not in entry:
+            entry = encode_memory(entry)
+        parts = entry.get("response_parts")
+        
+        if parts is None:
+            kind, response = RAW_RESPONSE, entry["muse_response"]
+        else:
+            kind, response = TEMPLATED_RESPONSE, json.dumps(parts, separators=(",", ":"), ensure_ascii=False)
+        
+        self.timestamps.append(entry["timestamp"])
+        self.kinds.append(kind)
+        self.offsets.append(len(self.buffer))
+        self.buffer += entry["user_input"].encode("utf-8")
+        self.offsets.append(len(self.buffer))
+        self.buffer += response.encode("utf-8")
+    
+    def copy(self):
+        """
+        Copy the store, so it can be changed without affecting readers of the original.
+        
+        Returns:
+            MemoryColumns: An independent store with the same entries
+        """
+        other = MemoryColumns()
+        other.timestamps = array("q", self.timestamps)
+        other.offsets = array("Q", self.offsets)
+        other.kinds = bytearray(self.kinds)
+        other.buffer = bytearray(self.buffer)
+        return other
+    
+    def drop_oldest(self, count):
+        """
+        Remove the oldest entries.
+        
+        Args:
+            count (int): The number of entries to remove
+        """
+        count = min(count, len(self.timestamps))
+        if count <= 0:
+            return
+        
+        base = self.offsets[2 * count] if count < len(self.timestamps) else len(self.buffer)
+        del self.timestamps[:count]
+        del self.kinds[:count]
+        del self.buffer[:base]
+        self.offsets = array("Q", (offset - base for offset in self.offsets[2 * count:]))
+    
+    def __len__(self):
+        return len(self.timestamps)
+    
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._read(i) for i in range(*position.indices(len(self.timestamps)))]
+        
+        if position < 0:
+            position += len(self.timestamps)
+        if not 0 <= position < len(self.timestamps):
+            raise IndexError("memory column index out of range")
+        return self._read(position)
+    
+    def __iter__(self):
+        for i in range(len(self.timestamps)):
+            yield self._read(i)
+    
+    def _fields(self, position):
+        """Decode the user input and the held response at a position."""
+        start = self.offsets[2 * position]
+        middle = self.offsets[2 * position + 1]
+        end = self.offsets[2 * position + 2] if 2 * position + 2 < len(self.offsets) else len(self.buffer)
+        return self.buffer[start:middle].decode("utf-8"), self.buffer[middle:end].decode("utf-8")
+    
+    def _read(self, position):
+        """Build the entry at a position."""
+        user_input, response = self._fields(position)
+        if self.kinds[position] == TEMPLATED_RESPONSE:
+            response = render_response(json.loads(response), user_input)
+        
+        return {
+            "timestamp": self.timestamps[position],
+            "user_input": user_input,
+            "muse_response": response
+        }
+    
+    def stored_entries(self):
+        """
+        Iterate over the entries in their stored form, without rendering templated responses.
+        
+        Yields:
+            dict: Entries with muse_response, or response_parts for templated responses
+        """
+        for position in range(len(self.timestamps)):
+            user_input, response = self._fields(position)
+            entry = {"timestamp": self.timestamps[position], "user_input": user_input}
+            if self.kinds[position] == TEMPLATED_RESPONSE:
+                entry["response_parts"] = json.loads(response)
+            else:
+                entry["muse_response"] = response
+            yield entry
+    
+    def footprint(self):
+        """
+        Get the memory held by the store, including spare capacity in its arrays.
+        
+        Returns:
+            int: Size in bytes
+        """
+        return (sys.getsizeof(self) + sys.getsizeof(self.timestamps) + sys.getsizeof(self.offsets)
+                + sys.getsizeof(self.kinds) + sys.getsizeof(self.buffer))
+    
+    def nbytes(self):
+        """
+        Get the size of the column data.
+        
+        Returns:
+            int: Bytes held by the arrays and the buffer
+        """
+        return (self.timestamps.itemsize * len(self.timestamps) + self.offsets.itemsize * len(self.offsets)
+                + len(self.kinds) + len(self.buffer))
+
+
+def _sample_entries(count):
+    """Build realistic memory entries from the response templates."""
+    from muse_profiles import get_muse_by_name
+    from enhanced_response_generator import EnhancedMuseResponseGenerator
+    
+    muse = get_muse_by_name("Salvatore Inverso")
+    generator = EnhancedMuseResponseGenerator()
+    topics = ["my grandmother's garden", "letting go of an old friendship", "who I am becoming at work",
+              "the grief that comes back every winter", "a ritual for my new apartment"]
+    task_types = ["emotional_reflection", "heartbreak_grief_processing", "identity_legacy_exploration",
+                  "creative_co_writing", "ritual_creation", "general"]
+    
+    entries = []
+    for i in range(count):
+        generator.current_task = f"help me reflect on {random.choice(topics)} ({i})"
+        generator.task_type = random.choice(task_types)
+        generator.context = {"current_conversation": [None] if i % 2 else [], "memory_context": {}}
+        entries.append({
+            "timestamp": 1_700_000_000_000 + i * 60_000,
+            "user_input": generator.current_task,
+            "muse_response": generator._craft_muse_response(muse)
+        })
+    return entries
+
+
+def _measure(build, payload):
+    """Measure the bytes still allocated by build(entries) once the decoded input is no longer referenced."""
+    gc.collect()
+    tracemalloc.start()
+    entries = json.loads(payload)
+    result = build(entries)
+    del entries
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def run_benchmark(count=5000):
+    """
+    Compare the memory held by cached entries as dicts and as columns.
+    
+    Args:
+        count (int): The number of sample entries
+    
+    Returns:
+        dict: Bytes per entry for each representation
+    """
+    # Serialize first so each representation is built from freshly decoded objects, as when a memory file is loaded
+    entries = _sample_entries(count)
+    rendered = json.dumps(entries)
+    stored = json.dumps([encode_memory(entry) for entry in entries])
+    
+    dicts, dict_bytes = _measure(lambda entries: entries, rendered)
+    columns, column_bytes = _measure(MemoryColumns, stored)
+    assert list(columns) == dicts
+    
+    return {
+        "entries": count,
+        "dict_bytes_per_entry": dict_bytes / count,
+        "column_bytes_per_entry": column_bytes / count,
+        "column_data_bytes_per_entry": columns.nbytes() / count
+    }
+
+
+def main():
+    """Run the memory representation benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Report bytes per cached memory entry as dicts and as columns.")
+    parser.add_argument("--entries", type=int, default=5000, help="Number of sample entries")
+    args = parser.parse_args()
+    
+    result = run_benchmark(args.entries)
+    print(f"Entries:           {result['entries']}")
+    print(f"Dicts (before):    {result['dict_bytes_per_entry']:.0f} bytes per entry")
+    print(f"Columns (after):   {result['column_bytes_per_entry']:.0f} bytes per entry "
+          f"({result['column_data_bytes_per_entry']:.0f} of column data)")
+    print(f"Reduction:         {result['dict_bytes_per_entry'] / result['column_bytes_per_entry']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Muse Summoner System - Memory Segments Module
+
+This module implements a compact binary file format for muse memories. A
+segment holds length-prefixed records (compact JSON) followed by an index of
+record offsets, so a reader that memory-maps the file can fetch the last N
+entries, one entry by timestamp or a timestamp range by touching only the
+bytes it needs, without parsing the rest of the file.
+
+Layout (little-endian):
+    header   "MSEG", version (u16), flags (u16)
+    records  length (u32) + payload, once per entry, oldest first
+    index    offset (u64) of each record
+    footer   index offset (u64), record count (u32), "MSEG"
+
+Usage:
+    python memory_segments.py to-binary [--storage-dir DIR]
+    python memory_segments.py to-json [--storage-dir DIR]
+"""
+
+import os
+import json
+import mmap
+import struct
+import bisect
+import argparse
+from file_locks import atomic_write, file_lock, write_json
+
+MAGIC = b"MSEG"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHH")
+RECORD_HEADER = struct.Struct("<I")
+OFFSET = struct.Struct("<Q")
+FOOTER = struct.Struct("<QI4s")
+
+JSON_SUFFIX = "_memory.json"
+SEGMENT_SUFFIX = "_memory.seg"
+
+
+def write_segment(path, entries):
+    """
+    Write memory entries to a segment file, replacing it in one step.
+    
+    Args:
+        path (str): Path of the segment file
+        entries (list): Memory entries, oldest first
+    """
+    offsets = []
+    
+    with atomic_write(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0))
+        position = HEADER.size
+        
+        for entry in entries:
+            payload = json.dumps(entry, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            offsets.append(position)
+            f.write(RECORD_HEADER.pack(len(payload)))
+            f.write(payload)
+            position += RECORD_HEADER.size + len(payload)
+        
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        f.write(FOOTER.pack(position, len(offsets), MAGIC))
+
+
+class MemorySegmentReader:
+    def __init__(self, path):
+        """
+        Open a segment file for memory-mapped reads.
+        
+        The reader behaves like a read-only list of memory entries: it supports
+        len(), indexing, slicing and iteration, and each access decodes only the
+        records it returns.
+        
+        Args:
+            path (str): Path of the segment file
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"Not a memory segment: {path}")
+        
+        try:
+            magic, version, flags = HEADER.unpack_from(self.map, 0)
+            self.index_offset, self.count, footer_magic = FOOTER.unpack_from(self.map, len(self.map) - FOOTER.size)
+        except struct.error:
+            magic = None
+        if magic != MAGIC or footer_magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a memory segment: {path}")
+    
+    def __len__(self):
+        return self.count
+    
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._read(i) for i in range(*position.indices(self.count))]
+        
+        if position < 0:
+            position += self.count
+        if not 0 <= position < self.count:
+            raise IndexError("memory segment index out of range")
+        return self._read(position)
+    
+    def __iter__(self):
+        for i in range(self.count):
+            yield self._read(i)
+    
+    def _read(self, position):
+        """Decode the record at a position."""
+        offset = OFFSET.unpack_from(self.map, self.index_offset + position * OFFSET.size)[0]
+        length = RECORD_HEADER.unpack_from(self.map, offset)[0]
+        start = offset + RECORD_HEADER.size
+        return json.loads(self.map[start:start + length])
+    
+    def tail(self, count):
+        """
+        Read the newest entries.
+        
+        Args:
+            count (int): The number of entries
+        
+        Returns:
+            list: Up to count entries, oldest first
+        """
+        return self[max(self.count - count, 0):]
+    
+    def find(self, timestamp):
+        """
+        Find an entry by its timestamp with a binary search over the index.
+        
+        Args:
+            timestamp (int): The entry's timestamp
+        
+        Returns:
+            dict: The entry, or None if there is no entry with that timestamp
+        """
+        position = bisect.bisect_left(self, timestamp, key=lambda memory: memory["timestamp"])
+        if position < self.count:
+            entry = self._read(position)
+            if entry["timestamp"] == timestamp:
+                return entry
+        return None
+    
+    def close(self):
+        """Unmap the file and close it."""
+        self.map.close()
+        self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_segment(path):
+    """
+    Read every entry in a segment file.
+    
+    Args:
+        path (str): Path of the segment file
+    
+    Returns:
+        list: The memory entries, oldest first
+    """
+    with MemorySegmentReader(path) as segment:
+        return list(segment)
+
+
+def convert_storage(storage_dir, to_binary=True):
+    """
+    Convert every memory file in a storage directory between JSON and segments.
+    
+    The source file is removed once the converted file has been written.
+    
+    Args:
+        storage_dir (str): Directory holding the memory files
+        to_binary (bool): True to convert JSON to segments, False for the reverse
+    
+    Returns:
+        int: The number of files converted
+    """
+    source_suffix, target_suffix = (JSON_SUFFIX, SEGMENT_SUFFIX) if to_binary else (SEGMENT_SUFFIX, JSON_SUFFIX)
+    converted = 0
+    
+    for filename in sorted(os.listdir(storage_dir)):
+        if not filename.endswith(source_suffix):
+            continue
+        
+        muse_path = os.path.join(storage_dir, filename[:-len(source_suffix)])
+        source = muse_path + source_suffix
+        target = muse_path + target_suffix
+        
+        # Hold the same lock as MuseMemory, so a save cannot land between the read and the removal
+        with file_lock(muse_path + "_memory"):
+            if not os.path.exists(source):
+                continue
+            try:
+                if to_binary:
+                    with open(source, "r") as f:
+                        write_segment(target, json.load(f))
+                else:
+                    write_json(target, read_segment(source))
+            except (json.JSONDecodeError, ValueError, IOError) as e:
+                print(f"Error converting {filename}: {e}")
+                continue
+            
+            os.remove(source)
+        converted += 1
+    
+    return converted
+
+
+def main():
+    """Convert memory files from the command line."""
+    parser = argparse.ArgumentParser(description="Convert muse memory files between JSON and binary segments.")
+    parser.add_argument("direction", choices=["to-binary", "to-json"], help="Conversion direction")
+    parser.add_argument("--storage-dir", help="Directory holding the memory files")
+    args = parser.parse_args()
+    
+    storage_dir = args.storage_dir
+    if storage_dir is None:
+        from memory_system import muse_memory
+        storage_dir = muse_memory.storage_dir
+    
+    converted = convert_storage(storage_dir, to_binary=args.direction == "to-binary")
+    print(f"Converted {converted} memory files in {storage_dir}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,15 +7,37 @@ It stores conversation history and provides context for generating more personal
 
 import os
 import json
-import datetime
-from collections import deque
+import bisect
+from config import get_config
+from semantic_memory import SemanticMemoryIndex
+from theme_statistics import ThemeStatistics
+from memory_segments import MemorySegmentReader, write_segment, read_segment, JSON_SUFFIX, SEGMENT_SUFFIX
+from response_templates import decode_memory
+from timestamps import now_timestamp, to_timestamp, format_timestamp
+from memory_columns import MemoryColumns
+from memory_cache import MemoryCache
+from file_locks import file_lock, file_version, atomic_write, VersionConflict, ANY_VERSION
 
 class MuseMemory:
     def __init__(self, storage_dir="/tmp/memory_storage"):
         """Initialize the muse memory system with a storage directory."""
         self.storage_dir = storage_dir
-        self.memory_cache = {}
-        self.max_memory_entries = 50  # Maximum number of conversation entries to keep per muse
+        self.max_memory_entries = get_config("max_memory_entries", 50)  # Maximum number of conversation entries to keep per muse
+        self.memory_format = get_config("memory_format", "json")  # "json" or "binary" segments
+        self.semantic_index = SemanticMemoryIndex(
+            dimensions=get_config("semantic_memory.dimensions", 512),
+            ivf_threshold=get_config("semantic_memory.ivf_threshold", 2048),
+            ivf_lists=get_config("semantic_memory.ivf_lists", 32),
+            ivf_probes=get_config("semantic_memory.ivf_probes", 4)
+        )
+        # muse_id -> MemoryColumns; a muse's vectors are dropped along with its cached memories
+        self.memory_cache = MemoryCache(
+            max_bytes=get_config("memory_cache.max_bytes", 64 * 1024 * 1024),
+            max_entries=get_config("memory_cache.max_entries"),
+            on_discard=self.semantic_index.discard
+        )
+        self.write_attempts = get_config("file_locks.write_attempts", 3)  # Optimistic tries before writing under the lock
+        self.theme_stats = ThemeStatistics(storage_dir)
         
         # Create the storage directory if it doesn't exist
         os.makedirs(self.storage_dir, exist_ok=True)
@@ -29,33 +51,34 @@ class MuseMemory:
             user_input (str): The user's input
             muse_response (str): The muse's response
         """
-        # Create a memory entry
-        timestamp = datetime.datetime.now().isoformat()
-        memory_entry = {
-            "timestamp": timestamp,
-            "user_input": user_input,
-            "muse_response": muse_response
-        }
-        
-        # Get the muse's memory file path
         muse_id = muse_name.lower().replace(" ", "_")
-        memory_file = os.path.join(self.storage_dir, f"{muse_id}_memory.json")
-        
-        # Load existing memories or create a new memory list
-        memories = self._load_memories(muse_name)
-        
-        # Add the new memory entry
-        memories.append(memory_entry)
+        memory_entry = {}
+        base = []
+        
+        def append_entry(memories):
+            # Create a memory entry; timestamps are unique and increasing, so they double as sort keys and cursors
+            timestamp = now_timestamp()
+            if memories and timestamp <= memories[-1]["timestamp"]:
+                timestamp = memories[-1]["timestamp"] + 1
+            memory_entry.update(timestamp=timestamp, user_input=user_input, muse_response=muse_response)
+            base[:] = [memories]
+            
+            # Work on a copy, so readers of the cached memories never see an entry that was not saved
+            memories = memories.copy()
+            memories.append(memory_entry)
+            
+            # Keep only the most recent entries up to max_memory_entries
+            memories.drop_oldest(len(memories) - self.max_memory_entries)
+            return memories
         
-        # Keep only the most recent entries up to max_memory_entries
-        if len(memories) > self.max_memory_entries:
-            memories = memories[-self.max_memory_entries:]
+        saved = self._update_memories(muse_name, append_entry)
         
-        # Save the updated memories
-        self._save_memories(muse_name, memories)
+        # Extend the vector index with the new entry, if it holds exactly the entries it was added to
+        if saved is not None:
+            self.semantic_index.append(muse_id, base[0], saved)
         
-        # Update the memory cache
-        self.memory_cache[muse_id] = memories
+        # Update the running theme counters
+        self.theme_stats.record(muse_id, memory_entry)
     
     def get_memories(self, muse_name, count=5):
         """
@@ -64,14 +87,184 @@ class MuseMemory:
         Args:
             muse_name (str): The name of the muse
             count (int): The number of recent memories to retrieve
-            
+        
         Returns:
             list: A list of memory entries
         """
-        memories = self._load_memories(muse_name)
+        if count <= 0:
+            return []
+        
+        # A segment holds its record offsets in order, so the newest entries are read without a search
+        segment = self._open_segment(muse_name)
+        if segment:
+            with segment:
+                return [decode_memory(memory) for memory in segment.tail(count)]
         
         # Return the most recent memories up to the specified count
-        return memories[-count:] if memories else []
+        return self.get_memory_range(muse_name, limit=count)
+    
+    def get_memory_range(self, muse_name, after=None, before=None, limit=None, oldest_first=False):
+        """
+        Read a contiguous range of memories bounded by timestamp cursors.
+        
+        Entries are stored in time order, so the bounds are located by binary
+        search and only the requested slice is copied. When the memories are
+        not cached and are stored as a binary segment, the search runs over the
+        memory-mapped file and only the returned entries are decoded.
+        
+        Args:
+            muse_name (str): The name of the muse
+            after (int): Only include entries with a timestamp after this cursor
+            before (int): Only include entries with a timestamp before this cursor
+            limit (int): Maximum number of entries; when only `before` is given the newest are kept
+            oldest_first (bool): Keep the oldest entries within the limit even when `after` is not given
+        
+        Returns:
+            list: A list of memory entries, oldest first
+        """
+        segment = self._open_segment(muse_name)
+        if segment:
+            with segment:
+                return [decode_memory(memory) for memory in self._slice_range(segment, after, before, limit, oldest_first)]
+        
+        return self._slice_range(self._load_memories(muse_name), after, before, limit, oldest_first)
+    
+    def _slice_range(self, memories, after, before, limit, oldest_first=False):
+        """Locate a timestamp range in a time-ordered sequence of memories and copy it out."""
+        timestamps, key = self._timestamp_index(memories)
+        start = 0
+        end = len(memories)
+        if after is not None:
+            start = bisect.bisect_right(timestamps, after, key=key)
+        if before is not None:
+            end = bisect.bisect_left(timestamps, before, lo=start, key=key)
+        
+        if limit is not None and end - start > limit:
+            if after is not None or oldest_first:
+                end = start + limit
+            else:
+                start = end - limit
+        
+        return memories[start:end]
+    
+    def _timestamp_index(self, memories):
+        """
+        Get what to binary-search for timestamps: the timestamp column of cached
+        memories, or the entries of a segment with a key function.
+        """
+        if isinstance(memories, MemoryColumns):
+            return memories.timestamps, None
+        return memories, lambda memory: memory["timestamp"]
+    
+    def get_memory_window(self, muse_name, since=None, until=None, limit=None):
+        """
+        Get the memories recorded in a time window, oldest first.
+        
+        Both bounds are found by binary search, so a week or a month of history
+        costs the same to locate however long the history is.
+        
+        Args:
+            muse_name (str): The name of the muse
+            since (int): Start of the window in epoch milliseconds, inclusive
+            until (int): End of the window in epoch milliseconds, exclusive
+            limit (int): Maximum number of entries, counted from the start of the window
+        
+        Returns:
+            list: A list of memory entries, oldest first
+        """
+        # Timestamps are integers, so "since" is the same as "after since - 1"
+        after = since - 1 if since is not None else None
+        return self.get_memory_range(muse_name, after=after, before=until, limit=limit, oldest_first=True)
+    
+    def get_memory(self, muse_name, timestamp):
+        """
+        Get a single memory entry by its timestamp.
+        
+        Args:
+            muse_name (str): The name of the muse
+            timestamp (int): The entry's timestamp
+        
+        Returns:
+            dict: The memory entry, or None if not found
+        """
+        segment = self._open_segment(muse_name)
+        if segment:
+            with segment:
+                memory = segment.find(timestamp)
+            return decode_memory(memory) if memory else None
+        
+        memories = self._load_memories(muse_name)
+        position = bisect.bisect_left(memories.timestamps, timestamp)
+        if position < len(memories) and memories.timestamps[position] == timestamp:
+            return memories[position]
+        return None
+    
+    def get_memory_page(self, muse_name, before=None, limit=10):
+        """
+        Get one page of memories, paging backwards from newest to oldest.
+        
+        Args:
+            muse_name (str): The name of the muse
+            before (int): Cursor returned by the previous page, or None for the newest page
+            limit (int): Maximum number of entries on the page
+        
+        Returns:
+            tuple: (entries oldest first, cursor for the next older page or None)
+        """
+        page = self.get_memory_range(muse_name, before=before, limit=limit + 1)
+        
+        # The extra entry only tells us whether an older page exists
+        if len(page) > limit:
+            page = page[1:]
+            return page, page[0]["timestamp"]
+        return page, None
+    
+    def get_memory_delta(self, muse_name, after=None, limit=100):
+        """
+        Get the memories a client has not seen yet, oldest first.
+        
+        Like get_memory_range, a binary segment is searched in place, so only
+        the entries after the cursor are decoded.
+        
+        Args:
+            muse_name (str): The name of the muse
+            after (int): The newest timestamp the client already has, or None for a full sync
+            limit (int): Maximum number of entries to return
+        
+        Returns:
+            tuple: (new entries, timestamp of the oldest stored entry or None, whether more entries remain)
+        """
+        segment = self._open_segment(muse_name)
+        if segment:
+            with segment:
+                oldest = segment[0]["timestamp"] if len(segment) else None
+                entries = [decode_memory(memory) for memory in self._slice_range(segment, after, None, limit + 1, True)]
+        else:
+            memories = self._load_memories(muse_name)
+            oldest = int(memories.timestamps[0]) if memories else None
+            entries = self._slice_range(memories, after, None, limit + 1, True)
+        
+        return entries[:limit], oldest, len(entries) > limit
+    
+    def iter_memories(self, muse_name, chunk_size=100):
+        """
+        Iterate over all memories in chunks, oldest first.
+        
+        Args:
+            muse_name (str): The name of the muse
+            chunk_size (int): The number of entries read per chunk
+        
+        Yields:
+            dict: Memory entries
+        """
+        cursor = None
+        while True:
+            chunk = self.get_memory_range(muse_name, after=cursor, limit=chunk_size, oldest_first=True)
+            if not chunk:
+                return
+            for memory in chunk:
+                yield memory
+            cursor = chunk[-1]["timestamp"]
     
     def get_memory_summary(self, muse_name):
         """
@@ -79,7 +272,7 @@ class MuseMemory:
         
         Args:
             muse_name (str): The name of the muse
-            
+        
         Returns:
             str: A summary of the muse's memories
         """
@@ -91,8 +284,7 @@ class MuseMemory:
         summary = "Recent conversation history:\n\n"
         
         for i, memory in enumerate(memories, 1):
-            timestamp = datetime.datetime.fromisoformat(memory["timestamp"])
-            formatted_time = timestamp.strftime("%Y-%m-%d %H:%M")
+            formatted_time = format_timestamp(memory["timestamp"], "%Y-%m-%d %H:%M")
             
             summary += f"Conversation {i} ({formatted_time}):\n"
             summary += f"User: {memory['user_input']}\n"
@@ -108,7 +300,7 @@ class MuseMemory:
             muse_name (str): The name of the muse
             current_input (str): The current user input
             max_results (int): Maximum number of relevant memories to return
-            
+        
         Returns:
             list: A list of relevant memory entries
         """
@@ -117,24 +309,47 @@ class MuseMemory:
         if not memories:
             return []
         
-        # Simple relevance scoring based on word overlap
-        current_words = set(current_input.lower().split())
-        scored_memories = []
+        # Rank by cosine similarity over the muse's embedding matrix
+        muse_id = muse_name.lower().replace(" ", "_")
+        threshold = get_config("memory_relevance_threshold", 0.1)
+        return self.semantic_index.search(muse_id, memories, current_input, max_results, threshold)
+    
+    def import_memories(self, muse_name, entries):
+        """
+        Merge a batch of memory entries into a muse's store with a single write.
+        
+        Entries whose timestamp is already present are skipped, and the merged
+        list is kept in time order and trimmed to max_memory_entries. ISO
+        timestamps from older exports are converted to epoch milliseconds.
         
-        for memory in memories:
-            memory_words = set(memory["user_input"].lower().split())
-            # Calculate Jaccard similarity (intersection over union)
-            intersection = len(current_words.intersection(memory_words))
-            union = len(current_words.union(memory_words))
-            score = intersection / union if union > 0 else 0
+        Args:
+            muse_name (str): The name of the muse
+            entries (list): Memory entries to merge
+        
+        Returns:
+            int: The number of entries added
+        """
+        muse_id = muse_name.lower().replace(" ", "_")
+        entries = [self._upgrade_timestamp(decode_memory(entry)) for entry in entries]
+        new_entries = []
+        
+        def merge_entries(memories):
+            known = {memory["timestamp"] for memory in memories}
+            new_entries[:] = [entry for entry in entries if entry["timestamp"] not in known]
+            if not new_entries:
+                return None
             
-            scored_memories.append((score, memory))
+            merged = sorted(list(memories) + new_entries, key=lambda memory: memory["timestamp"])
+            return MemoryColumns(merged[-self.max_memory_entries:])
+        
+        if self._update_memories(muse_name, merge_entries) is None:
+            return 0
         
-        # Sort by relevance score in descending order
-        scored_memories.sort(reverse=True, key=lambda x: x[0])
+        # Positions shifted, so the vector index is rebuilt on next use
+        self.semantic_index.discard(muse_id)
+        self.theme_stats.record_many(muse_id, new_entries)
         
-        # Return the most relevant memories up to max_results
-        return [memory for score, memory in scored_memories[:max_results] if score > 0.1]
+        return len(new_entries)
     
     def clear_memories(self, muse_name):
         """
@@ -144,14 +359,13 @@ class MuseMemory:
             muse_name (str): The name of the muse
         """
         muse_id = muse_name.lower().replace(" ", "_")
-        memory_file = os.path.join(self.storage_dir, f"{muse_id}_memory.json")
         
-        # Clear the memory file
-        self._save_memories(muse_name, [])
-        
-        # Clear the memory cache
-        if muse_id in self.memory_cache:
-            del self.memory_cache[muse_id]
+        # Clear the memory file and the memory cache together, so no reader caches the old entries in between
+        with file_lock(self._lock_path(muse_id)):
+            self._save_memories(muse_name, [])
+            self.memory_cache.discard(muse_id)
+        self.semantic_index.discard(muse_id)
+        self.theme_stats.clear(muse_id)
     
     def _load_memories(self, muse_name):
         """
@@ -159,48 +373,217 @@ class MuseMemory:
         
         Args:
             muse_name (str): The name of the muse
-            
+        
         Returns:
-            list: A list of memory entries
+            MemoryColumns: The memory entries, oldest first
         """
-        muse_id = muse_name.lower().replace(" ", "_")
+        return self._read_memories(muse_name)[0]
+    
+    def _read_memories(self, muse_name):
+        """
+        Load memories for a specific muse together with the version of the file they came from.
         
-        # Check if memories are already in cache
-        if muse_id in self.memory_cache:
-            return self.memory_cache[muse_id]
+        The file in the configured format is preferred; a file in the other
+        format is read as a fallback, so switching memory_format migrates each
+        muse on its next save. Responses stored as template references are
+        rendered back to text, and ISO timestamps written by earlier versions
+        are converted to epoch milliseconds; such a file is then written back
+        once, so later reads (and in-place segment reads) skip the conversion.
         
-        memory_file = os.path.join(self.storage_dir, f"{muse_id}_memory.json")
+        Args:
+            muse_name (str): The name of the muse
         
-        # If the memory file exists, load it
-        if os.path.exists(memory_file):
-            try:
-                with open(memory_file, 'r') as f:
-                    memories = json.load(f)
-                    self.memory_cache[muse_id] = memories
-                    return memories
-            except (json.JSONDecodeError, IOError):
-                # If there's an error loading the file, return an empty list
-                return []
+        Returns:
+            tuple: (MemoryColumns oldest first, file signature)
+        """
+        muse_id = muse_name.lower().replace(" ", "_")
+        
+        # Taken before reading, so a file replaced mid-read is reloaded on the next lookup rather than missed
+        signature = self._file_signature(muse_id)
+        
+        # Check if memories are already in cache and the file has not changed since
+        memories = self.memory_cache.get(muse_id, signature)
+        if memories is not None:
+            return memories, signature
+        
+        for memory_file in self._memory_files(muse_id):
+            # If the memory file exists, load it
+            if os.path.exists(memory_file):
+                try:
+                    if memory_file.endswith(SEGMENT_SUFFIX):
+                        memories = read_segment(memory_file)
+                    else:
+                        with open(memory_file, 'r') as f:
+                            memories = json.load(f)
+                    legacy = bool(memories) and not isinstance(memories[0]["timestamp"], int)
+                    # Templated responses stay encoded in the columns until an entry is read
+                    memories = MemoryColumns(self._upgrade_timestamp(memory) for memory in memories)
+                    if legacy:
+                        try:
+                            signature = self._save_memories(muse_name, memories, signature)
+                        except VersionConflict:
+                            signature = None  # Replaced meanwhile; the new file is read on the next lookup
+                    self._cache_memories(muse_id, memories, signature)
+                    return memories, signature
+                except (json.JSONDecodeError, ValueError, IOError):
+                    # If there's an error loading the file, return an empty list
+                    return MemoryColumns(), signature
         
         # If the file doesn't exist, return an empty list
-        return []
+        return MemoryColumns(), signature
+    
+    def _update_memories(self, muse_name, update):
+        """
+        Apply a read-modify-write change to a muse's memories.
+        
+        The change is computed without holding the muse's file lock and saved
+        only if the file is still the version it was computed from; otherwise
+        it is computed again from a fresh read. The last attempt holds the lock
+        throughout, so a busy muse cannot keep a writer retrying forever.
+        
+        Args:
+            muse_name (str): The name of the muse
+            update (callable): Called with the current memories, which it must not
+                modify; returns the memories to save, or None to save nothing
+        
+        Returns:
+            MemoryColumns: The saved memories, or None if nothing was saved
+        """
+        muse_id = muse_name.lower().replace(" ", "_")
+        lock = file_lock(self._lock_path(muse_id))
+        
+        for attempt in range(1, self.write_attempts + 1):
+            exclusive = attempt == self.write_attempts
+            if exclusive:
+                lock.acquire()
+            try:
+                memories, signature = self._read_memories(muse_name)
+                memories = update(memories)
+                if memories is None:
+                    return None
+                
+                try:
+                    signature = self._save_memories(muse_name, memories, signature)
+                except VersionConflict:
+                    # Another writer saved first; start again from its version
+                    continue
+                
+                self._cache_memories(muse_id, memories, signature)
+                return memories
+            finally:
+                if exclusive:
+                    lock.release()
+        
+        return None
     
-    def _save_memories(self, muse_name, memories):
+    def _save_memories(self, muse_name, memories, expected_signature=ANY_VERSION):
         """
         Save memories for a specific muse to the storage file.
         
+        The file is replaced atomically while holding the muse's file lock, so
+        concurrent workers never interleave writes or leave a partial file.
+        
         Args:
             muse_name (str): The name of the muse
             memories (list): A list of memory entries
+            expected_signature: The file signature the memories were read at, or ANY_VERSION to skip the check
+        
+        Returns:
+            tuple: The signature of the written file, or None if it could not be written
+        
+        Raises:
+            VersionConflict: If the file no longer has the expected signature
         """
         muse_id = muse_name.lower().replace(" ", "_")
-        memory_file = os.path.join(self.storage_dir, f"{muse_id}_memory.json")
+        memory_file, other_file = self._memory_files(muse_id)
+        
+        # Templated responses are stored as template references and rendered again on load
+        if not isinstance(memories, MemoryColumns):
+            memories = MemoryColumns(memories)
+        stored = list(memories.stored_entries())
+        
+        with file_lock(self._lock_path(muse_id)):
+            if expected_signature is not ANY_VERSION and self._file_signature(muse_id) != expected_signature:
+                raise VersionConflict(f"Memories for {muse_name} were changed by another writer")
+            
+            try:
+                if memory_file.endswith(SEGMENT_SUFFIX):
+                    write_segment(memory_file, stored)
+                else:
+                    with atomic_write(memory_file) as f:
+                        json.dump(stored, f, indent=2)
+                
+                # Remove a file left over from the other format so it is never read again
+                if os.path.exists(other_file):
+                    os.remove(other_file)
+            except IOError as e:
+                print(f"Error saving memories for {muse_name}: {e}")
+                self.memory_cache.discard(muse_id)
+                return None
+            
+            return self._file_signature(muse_id)
+    
+    def _upgrade_timestamp(self, memory):
+        """Bring a legacy ISO timestamp up to epoch milliseconds."""
+        if not isinstance(memory["timestamp"], int):
+            memory = dict(memory, timestamp=to_timestamp(memory["timestamp"]))
+        return memory
+    
+    def _cache_memories(self, muse_id, memories, signature):
+        """Cache a muse's memories, tagged with the signature of the file they match."""
+        if signature is not None:
+            self.memory_cache.put(muse_id, memories, memories.footprint(), signature)
+    
+    def _file_signature(self, muse_id):
+        """
+        Identify the current version of a muse's memory file.
+        
+        Returns:
+            tuple: (path, inode, modification time, size), or None if there is no file
+        """
+        for memory_file in self._memory_files(muse_id):
+            version = file_version(memory_file)
+            if version is not None:
+                return (memory_file,) + version
+        return None
+    
+    def _lock_path(self, muse_id):
+        """Get the path whose lock guards a muse's memory files in either format."""
+        return os.path.join(self.storage_dir, f"{muse_id}_memory")
+    
+    def _memory_files(self, muse_id):
+        """Get the memory file paths for a muse: the configured format first, then the other one."""
+        json_file = os.path.join(self.storage_dir, f"{muse_id}{JSON_SUFFIX}")
+        segment_file = os.path.join(self.storage_dir, f"{muse_id}{SEGMENT_SUFFIX}")
+        if self.memory_format == "binary":
+            return segment_file, json_file
+        return json_file, segment_file
+    
+    def _open_segment(self, muse_name):
+        """
+        Open a muse's binary segment for direct reads, when its memories are not cached.
+        
+        Returns:
+            MemorySegmentReader: The open segment, or None if the cache or JSON should be used
+        """
+        muse_id = muse_name.lower().replace(" ", "_")
+        if self.memory_cache.contains(muse_id, self._file_signature(muse_id)):
+            return None
+        
+        memory_file = self._memory_files(muse_id)[0]
+        if not memory_file.endswith(SEGMENT_SUFFIX) or not os.path.exists(memory_file):
+            return None
         
         try:
-            with open(memory_file, 'w') as f:
-                json.dump(memories, f, indent=2)
-        except IOError as e:
-            print(f"Error saving memories for {muse_name}: {e}")
+            segment = MemorySegmentReader(memory_file)
+        except (ValueError, IOError):
+            return None
+        
+        # Segments written before epoch timestamps are loaded in full, which converts them
+        if len(segment) and not isinstance(segment[0]["timestamp"], int):
+            segment.close()
+            return None
+        return segment
 
 
 # Create a singleton instance for global use
@@ -224,12 +607,81 @@ def get_conversation_history(muse_name, count=5):
     Args:
         muse_name (str): The name of the muse
         count (int): The number of recent conversations to retrieve
-        
+    
     Returns:
         list: A list of conversation entries
     """
     return muse_memory.get_memories(muse_name, count)
 
+def get_conversation_page(muse_name, before=None, limit=10):
+    """
+    Global function to get one page of conversation history for a muse.
+    
+    Args:
+        muse_name (str): The name of the muse
+        before (int): Cursor from the previous page, or None for the newest page
+        limit (int): The number of conversations on the page
+    
+    Returns:
+        tuple: (conversation entries oldest first, cursor for the next older page or None)
+    """
+    return muse_memory.get_memory_page(muse_name, before, limit)
+
+def sync_conversation_history(muse_name, after=None, limit=100):
+    """
+    Global function to get conversation entries newer than a client's cursor.
+    
+    Args:
+        muse_name (str): The name of the muse
+        after (int): The newest timestamp the client already has, or None for a full sync
+        limit (int): Maximum number of entries to return
+    
+    Returns:
+        tuple: (new entries oldest first, timestamp of the oldest stored entry or None, whether more entries remain)
+    """
+    return muse_memory.get_memory_delta(muse_name, after, limit)
+
+def get_conversation_entry(muse_name, timestamp):
+    """
+    Global function to get a single conversation entry by its timestamp.
+    
+    Args:
+        muse_name (str): The name of the muse
+        timestamp (int): The entry's timestamp
+    
+    Returns:
+        dict: The conversation entry, or None if not found
+    """
+    return muse_memory.get_memory(muse_name, timestamp)
+
+def get_conversation_window(muse_name, since=None, until=None, limit=None):
+    """
+    Global function to get the conversation entries recorded in a time window.
+    
+    Args:
+        muse_name (str): The name of the muse
+        since (int): Start of the window in epoch milliseconds, inclusive
+        until (int): End of the window in epoch milliseconds, exclusive
+        limit (int): Maximum number of entries
+    
+    Returns:
+        list: Conversation entries, oldest first
+    """
+    return muse_memory.get_memory_window(muse_name, since, until, limit)
+
+def iter_conversation_history(muse_name, chunk_size=100):
+    """
+    Global function to iterate over the full conversation history for a muse.
+    
+    Args:
+        muse_name (str): The name of the muse
+        chunk_size (int): The number of entries read per chunk
+    
+    Returns:
+        generator: Conversation entries, oldest first
+    """
+    return muse_memory.iter_memories(muse_name, chunk_size)
+
 def get_memory_context(muse_name, current_input):
     """
     Global function to get memory context for generating a response.
@@ -237,7 +689,7 @@ def get_memory_context(muse_name, current_input):
     Args:
         muse_name (str): The name of the muse
         current_input (str): The current user input
-        
+    
     Returns:
         dict: A dictionary containing memory context
     """
@@ -249,6 +701,48 @@ def get_memory_context(muse_name, current_input):
         "recent_memories": recent_memories
     }
 
+def import_conversation_memories(muse_name, entries):
+    """
+    Global function to merge a batch of conversation entries into a muse's memory.
+    
+    Args:
+        muse_name (str): The name of the muse
+        entries (list): Conversation entries to merge
+    
+    Returns:
+        int: The number of entries added
+    """
+    return muse_memory.import_memories(muse_name, entries)
+
+def get_memory_cache_stats():
+    """Global function to get memory cache hit, miss, eviction and size counters."""
+    return muse_memory.memory_cache.get_stats()
+
+def get_theme_statistics(muse_name):
+    """
+    Global function to get the running theme statistics for a muse.
+    
+    Args:
+        muse_name (str): The name of the muse
+    
+    Returns:
+        dict: Totals, theme and task type counters, and the daily histogram
+    """
+    return muse_memory.theme_stats.get_stats(muse_name.lower().replace(" ", "_"))
+
+def get_theme_trend(muse_name, days=7):
+    """
+    Global function to compare recent theme mentions for a muse with the window before.
+    
+    Args:
+        muse_name (str): The name of the muse
+        days (int): The length of each window in days
+    
+    Returns:
+        dict: theme -> {"current": mentions, "previous": mentions}
+    """
+    return muse_memory.theme_stats.get_theme_trend(muse_name.lower().replace(" ", "_"), days)
+
 def clear_muse_memory(muse_name):
     """
     Global function to clear all memories for a muse.
@@ -0,0 +1,627 @@
+"""
+Muse Summoner System - Mood Series Module
+
+This module implements the mood-tracking side of the dynamic emotional
+analytics capability. Mood samples (a timestamp and a score) are kept per user
+(browser session client id), ingested in batches and downsampled on arrival
+into three rollups: per minute, per hour and per day. Each rollup is a
+fixed-size ring of buckets holding the count, sum, sum of squares, minimum and
+maximum of the samples in it, so storage per user stays constant however many
+samples arrive, and months of mood data are read as a few thousand hourly or
+daily buckets.
+
+Trends are computed over those buckets with vectorized NumPy: the overall slope
+by least squares, a rolling mean, and mood shifts found as change points where
+splitting the series gives the largest difference in mean level.
+
+Usage:
+    python mood_series.py [--days N]
+"""
+
+import os
+import io
+import json
+import time
+import argparse
+import numpy as np
+from config import get_config
+from file_locks import file_lock, file_version, atomic_write
+from timestamps import now_timestamp, to_timestamp, MILLISECONDS_PER_DAY
+
+MILLISECONDS_PER_MINUTE = 60 * 1000
+MILLISECONDS_PER_HOUR = 60 * MILLISECONDS_PER_MINUTE
+
+# Rollup name -> bucket width in milliseconds, finest first
+RESOLUTIONS = {
+    "minute": MILLISECONDS_PER_MINUTE,
+    "hour": MILLISECONDS_PER_HOUR,
+    "day": MILLISECONDS_PER_DAY
+}
+
+# Timestamps may run ahead of the server clock by this much; later samples would push every ring's window forward
+MAX_FUTURE_SKEW = 5 * MILLISECONDS_PER_MINUTE
+
+# Invalid lines described in an ingestion result; the rest are only counted
+MAX_RECORDED_ERRORS = 50
+
+# Buckets kept per rollup: a week of minutes, half a year of hours, ten years of days
+DEFAULT_CAPACITIES = {"minute": 7 * 24 * 60, "hour": 184 * 24, "day": 3660}
+
+
+class MoodRollup:
+    def __init__(self, width, capacity):
+        """
+        Initialize an empty ring of buckets.
+        
+        Args:
+            width (int): Bucket width in milliseconds
+            capacity (int): Number of buckets kept; older buckets are overwritten
+        """
+        self.width = width
+        self.capacity = capacity
+        self.buckets = np.full(capacity, -1, dtype=np.int64)  # Bucket number held in each slot, -1 if empty
+        self.counts = np.zeros(capacity, dtype=np.int64)
+        self.sums = np.zeros(capacity, dtype=np.float64)
+        self.squares = np.zeros(capacity, dtype=np.float64)
+        self.minimums = np.zeros(capacity, dtype=np.float64)
+        self.maximums = np.zeros(capacity, dtype=np.float64)
+        self.latest = -1  # Newest bucket number seen
+    
+    def add(self, timestamps, values):
+        """
+        Add samples to their buckets.
+        
+        Args:
+            timestamps (numpy.ndarray): Sample times in epoch milliseconds
+            values (numpy.ndarray): Mood scores
+        """
+        buckets = timestamps // self.width
+        self.latest = max(self.latest, int(buckets.max()))
+        
+        # Samples older than the ring's window no longer have a bucket
+        keep = buckets > self.latest - self.capacity
+        buckets, values = buckets[keep], values[keep]
+        if not len(buckets):
+            return
+        
+        # Slots still holding an older bucket are cleared before they are reused
+        incoming = np.unique(buckets)
+        slots = incoming % self.capacity
+        stale = slots[self.buckets[slots] != incoming]
+        self.buckets[slots] = incoming
+        self.counts[stale] = 0
+        self.sums[stale] = 0.0
+        self.squares[stale] = 0.0
+        self.minimums[stale] = np.inf
+        self.maximums[stale] = -np.inf
+        
+        slots = buckets % self.capacity
+        np.add.at(self.counts, slots, 1)
+        np.add.at(self.sums, slots, values)
+        np.add.at(self.squares, slots, values * values)
+        np.minimum.at(self.minimums, slots, values)
+        np.maximum.at(self.maximums, slots, values)
+    
+    def window(self, since=None, until=None):
+        """
+        Read the non-empty buckets in a time window.
+        
+        Args:
+            since (int): Start of the window in epoch milliseconds (inclusive)
+            until (int): End of the window in epoch milliseconds (inclusive)
+        
+        Returns:
+            dict: Arrays of bucket start times, counts, means, minimums and maximums, oldest first
+        """
+        first = self.latest - self.capacity + 1
+        if since is not None:
+            first = max(first, since // self.width)
+        last = self.latest if until is None else min(self.latest, until // self.width)
+        
+        mask = (self.buckets >= first) & (self.buckets <= last) & (self.counts > 0)
+        slots = np.flatnonzero(mask)
+        slots = slots[np.argsort(self.buckets[slots], kind="stable")]
+        counts = self.counts[slots]
+        
+        return {
+            "timestamps": self.buckets[slots] * self.width,
+            "counts": counts,
+            "means": self.sums[slots] / counts,
+            "minimums": self.minimums[slots],
+            "maximums": self.maximums[slots]
+        }
+    
+    def covers(self, since, now):
+        """Check whether the ring still holds buckets back to a start time."""
+        return since is not None and since // self.width > (max(self.latest, now // self.width) - self.capacity)
+    
+    def arrays(self, prefix):
+        """Get the ring's arrays for saving, keyed with a prefix."""
+        return {
+            f"{prefix}_buckets": self.buckets,
+            f"{prefix}_counts": self.counts,
+            f"{prefix}_sums": self.sums,
+            f"{prefix}_squares": self.squares,
+            f"{prefix}_minimums": self.minimums,
+            f"{prefix}_maximums": self.maximums,
+            f"{prefix}_latest": np.array([self.latest], dtype=np.int64)
+        }
+    
+    def load(self, saved, prefix):
+        """Restore the ring from saved arrays, if they match its capacity."""
+        if f"{prefix}_buckets" not in saved or len(saved[f"{prefix}_buckets"]) != self.capacity:
+            return
+        self.buckets = saved[f"{prefix}_buckets"]
+        self.counts = saved[f"{prefix}_counts"]
+        self.sums = saved[f"{prefix}_sums"]
+        self.squares = saved[f"{prefix}_squares"]
+        self.minimums = saved[f"{prefix}_minimums"]
+        self.maximums = saved[f"{prefix}_maximums"]
+        self.latest = int(saved[f"{prefix}_latest"][0])
+
+
+def rolling_mean(values, window):
+    """
+    Compute the trailing mean of a series.
+    
+    Args:
+        values (numpy.ndarray): The series
+        window (int): Points per mean; the first points average what is available
+    
+    Returns:
+        numpy.ndarray: The rolling mean, one value per point
+    """
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (sums[ends] - sums[starts]) / (ends - starts)
+
+
+def trend_slope(timestamps, values):
+    """
+    Fit a least-squares line through a series.
+    
+    Args:
+        timestamps (numpy.ndarray): Point times in epoch milliseconds
+        values (numpy.ndarray): The series
+    
+    Returns:
+        float: Change in mood per day, or 0.0 for fewer than two points
+    """
+    if len(values) < 2:
+        return 0.0
+    days = (timestamps - timestamps[0]) / MILLISECONDS_PER_DAY
+    spread = days - days.mean()
+    denominator = np.dot(spread, spread)
+    return float(np.dot(spread, values - values.mean()) / denominator) if denominator else 0.0
+
+
+def find_shift(values, weights, min_segment):
+    """
+    Find the split of a series that best separates two mean levels.
+    
+    Every candidate split is scored at once from cumulative sums: the weighted
+    between-segment sum of squares n1 * n2 / n * (mean1 - mean2) ** 2.
+    
+    Args:
+        values (numpy.ndarray): Bucket means
+        weights (numpy.ndarray): Samples per bucket
+        min_segment (int): Fewest buckets on either side of a split
+    
+    Returns:
+        tuple: (split position, score), or None if the series is too short
+    """
+    n = len(values)
+    if n < 2 * min_segment:
+        return None
+    
+    weight_sums = np.cumsum(weights)
+    value_sums = np.cumsum(weights * values)
+    total_weight, total_value = weight_sums[-1], value_sums[-1]
+    
+    positions = np.arange(min_segment, n - min_segment + 1)
+    left_weight = weight_sums[positions - 1]
+    left_value = value_sums[positions - 1]
+    right_weight = total_weight - left_weight
+    right_value = total_value - left_value
+    
+    scores = left_weight * right_weight / total_weight * (left_value / left_weight - right_value / right_weight) ** 2
+    best = int(np.argmax(scores))
+    return int(positions[best]), float(scores[best])
+
+
+def find_shifts(values, weights, min_segment=3, min_change=1.0, max_shifts=3, threshold=5.0):
+    """
+    Find mood shifts by binary segmentation.
+    
+    The series is split at its strongest shift, then each part is split again,
+    for as long as a split is significant: the difference in mean level is at
+    least threshold standard errors, with the bucket-to-bucket noise estimated
+    from the two sides. Each shift is then reported with the mean levels of
+    the segments on either side of it.
+    
+    Args:
+        values (numpy.ndarray): Bucket means
+        weights (numpy.ndarray): Samples per bucket
+        min_segment (int): Fewest buckets on either side of a shift
+        min_change (float): Smallest difference in mean mood that counts as a shift
+        max_shifts (int): Most shifts to report
+        threshold (float): Standard errors a split must exceed
+    
+    Returns:
+        list: (position, mean before, mean after) tuples in time order
+    """
+    splits = []
+    segments = [(0, len(values))]
+    
+    while segments and len(splits) < max_shifts:
+        # Split whichever segment has the strongest shift
+        candidates = []
+        for start, end in segments:
+            found = find_shift(values[start:end], weights[start:end], min_segment)
+            if found is not None:
+                candidates.append((found[1], start, start + found[0], end))
+        if not candidates:
+            break
+        
+        score, start, split, end = max(candidates)
+        segments.remove((start, end))
+        
+        left, right = values[start:split], values[split:end]
+        noise = (np.sum((left - left.mean()) ** 2) + np.sum((right - right.mean()) ** 2)) / max(end - start - 2, 1)
+        error = np.sqrt(noise * (1 / len(left) + 1 / len(right)))
+        if abs(right.mean() - left.mean()) <= threshold * error:
+            continue
+        
+        segments += [(start, split), (split, end)]
+        splits.append(split)
+    
+    shifts = []
+    bounds = [0] + sorted(splits) + [len(values)]
+    for previous, split, following in zip(bounds, bounds[1:], bounds[2:]):
+        before = np.average(values[previous:split], weights=weights[previous:split])
+        after = np.average(values[split:following], weights=weights[split:following])
+        if abs(after - before) >= min_change:
+            shifts.append((split, float(before), float(after)))
+    return shifts
+
+
+class MoodSeries:
+    def __init__(self, storage_dir=None):
+        """
+        Initialize mood storage.
+        
+        Args:
+            storage_dir (str): Directory where mood rollup files are kept
+        """
+        self.storage_dir = storage_dir or get_config("mood_series.storage_dir", "mood")
+        self.min_score = get_config("mood_series.min_score", 1)
+        self.max_score = get_config("mood_series.max_score", 10)
+        self.capacities = dict(DEFAULT_CAPACITIES, **get_config("mood_series.capacities", {}))
+        self.max_future_skew = int(get_config("mood_series.max_future_skew", MAX_FUTURE_SKEW / 1000) * 1000)
+        self.series_cache = {}  # key -> (rollups, file version)
+    
+    def ingest(self, key, samples):
+        """
+        Add a batch of mood samples.
+        
+        Args:
+            key (str): The mood store key
+            samples (list): (timestamp in epoch milliseconds, score) pairs
+        
+        Returns:
+            int: The number of samples added
+        
+        Raises:
+            ValueError: If a timestamp or score is invalid, or a timestamp is in the future
+        """
+        if not samples:
+            return 0
+        
+        try:
+            timestamps = np.array([sample[0] for sample in samples], dtype=np.int64)
+            values = np.array([sample[1] for sample in samples], dtype=np.float64)
+        except (TypeError, ValueError, OverflowError, IndexError) as e:
+            raise ValueError(f"Invalid mood sample: {e}")
+        
+        if not np.all(np.isfinite(values)) or values.min() < self.min_score or values.max() > self.max_score:
+            raise ValueError(f"Mood scores must be between {self.min_score} and {self.max_score}")
+        if timestamps.min() < 0:
+            raise ValueError("Mood timestamps must be epoch milliseconds")
+        if timestamps.max() > now_timestamp() + self.max_future_skew:
+            raise ValueError("Mood timestamps cannot be in the future")
+        
+        # Other workers' samples are loaded under the lock before adding to the same buckets
+        os.makedirs(self.storage_dir, exist_ok=True)
+        series_file = self._series_file(key)
+        with file_lock(series_file):
+            rollups = self._load(key)
+            for rollup in rollups.values():
+                rollup.add(timestamps, values)
+            self._save(key, rollups)
+        
+        return len(values)
+    
+    def ingest_records(self, key, records):
+        """
+        Add mood samples from a stream of records, one batch per chunk.
+        
+        Each record is validated on its own, so an invalid record is skipped and
+        reported while the others are still added.
+        
+        Args:
+            key (str): The mood store key
+            records (iterable): Dicts with a timestamp (epoch milliseconds or ISO 8601) and a mood score
+        
+        Returns:
+            dict: Samples ingested, invalid record count and the first errors by record number
+        """
+        chunk_size = get_config("mood_series.chunk_size", 1000)
+        result = {"ingested": 0, "error_count": 0, "errors": []}
+        chunk = []
+        
+        for number, record in enumerate(records, 1):
+            try:
+                if isinstance(record, Exception):
+                    raise ValueError(f"Invalid JSON: {record}")
+                if not isinstance(record, dict) or "mood" not in record:
+                    raise ValueError("Record has no mood score")
+                score = float(record["mood"])
+                if not self.min_score <= score <= self.max_score:
+                    raise ValueError(f"Mood scores must be between {self.min_score} and {self.max_score}")
+                timestamp = to_timestamp(record["timestamp"]) if "timestamp" in record else now_timestamp()
+                if timestamp < 0:
+                    raise ValueError("Mood timestamps must be epoch milliseconds")
+                if timestamp > now_timestamp() + self.max_future_skew:
+                    raise ValueError("Mood timestamps cannot be in the future")
+            except (TypeError, ValueError, OverflowError) as e:
+                result["error_count"] += 1
+                if len(result["errors"]) < MAX_RECORDED_ERRORS:
+                    result["errors"].append({"record": number, "error": str(e)})
+                continue
+            
+            chunk.append((timestamp, score))
+            if len(chunk) >= chunk_size:
+                result["ingested"] += self.ingest(key, chunk)
+                chunk = []
+        
+        if chunk:
+            result["ingested"] += self.ingest(key, chunk)
+        return result
+    
+    def get_series(self, key, since=None, until=None, resolution=None):
+        """
+        Read downsampled mood for a time window.
+        
+        Args:
+            key (str): The mood store key
+            since (int): Start of the window in epoch milliseconds
+            until (int): End of the window in epoch milliseconds
+            resolution (str): "minute", "hour" or "day"; by default the finest
+                rollup that still covers the whole window
+        
+        Returns:
+            tuple: (resolution, dict of arrays from MoodRollup.window)
+        """
+        rollups = self._load(key)
+        if resolution is None:
+            now = until if until is not None else now_timestamp()
+            resolution = next((name for name, rollup in rollups.items() if rollup.covers(since, now)), "day")
+        if resolution not in rollups:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        return resolution, rollups[resolution].window(since, until)
+    
+    def analyze(self, key, days=90, now=None, resolution="day"):
+        """
+        Summarize the mood trend over recent days.
+        
+        Args:
+            key (str): The mood store key
+            days (int): How far back to look
+            now (int): The end of the window in epoch milliseconds (defaults to now)
+            resolution (str): The rollup analyzed; rolling means and shifts are measured in its buckets
+        
+        Returns:
+            dict: Sample count, mean, slope per day, recent rolling mean and
+                shifts, or None if there are too few samples
+        """
+        now = now if now is not None else now_timestamp()
+        resolution, series = self.get_series(key, now - days * MILLISECONDS_PER_DAY, now, resolution)
+        counts = series["counts"]
+        if counts.sum() < get_config("mood_series.min_samples", 5):
+            return None
+        
+        timestamps, means = series["timestamps"], series["means"]
+        rolling_window = get_config("mood_series.rolling_window", 7)
+        shifts = find_shifts(
+            means, counts,
+            min_segment=get_config("mood_series.min_segment", 3),
+            min_change=get_config("mood_series.min_shift", 1.0),
+            threshold=get_config("mood_series.shift_threshold", 5.0)
+        )
+        
+        return {
+            "resolution": resolution,
+            "samples": int(counts.sum()),
+            "mean": float(np.average(means, weights=counts)),
+            "slope_per_day": trend_slope(timestamps, means),
+            "rolling_mean": float(rolling_mean(means, rolling_window)[-1]),
+            "shifts": [
+                {"timestamp": int(timestamps[position]), "before": before, "after": after}
+                for position, before, after in shifts
+            ]
+        }
+    
+    def clear(self, key):
+        """
+        Delete the mood data for a store.
+        
+        Args:
+            key (str): The mood store key
+        """
+        if not os.path.isdir(self.storage_dir):
+            return
+        
+        series_file = self._series_file(key)
+        with file_lock(series_file):
+            self.series_cache.pop(key, None)
+            if os.path.exists(series_file):
+                try:
+                    os.remove(series_file)
+                except OSError as e:
+                    print(f"Error clearing mood data for {key}: {e}")
+    
+    def _load(self, key):
+        """Load the rollups for a store from cache, or from file if another worker changed it."""
+        series_file = self._series_file(key)
+        version = file_version(series_file)
+        cached = self.series_cache.get(key)
+        if cached is not None and cached[1] == version:
+            return cached[0]
+        
+        rollups = {name: MoodRollup(width, self.capacities[name]) for name, width in RESOLUTIONS.items()}
+        if version is not None:
+            try:
+                with np.load(series_file) as saved:
+                    saved = dict(saved)
+                for name, rollup in rollups.items():
+                    rollup.load(saved, name)
+            except (OSError, ValueError) as e:
+                print(f"Error loading mood data for {key}: {e}")
+        
+        self.series_cache[key] = (rollups, version)
+        return rollups
+    
+    def _save(self, key, rollups):
+        """Save the rollups for a store (call with its file lock held)."""
+        series_file = self._series_file(key)
+        arrays = {}
+        for name, rollup in rollups.items():
+            arrays.update(rollup.arrays(name))
+        
+        try:
+            with atomic_write(series_file, "wb") as f:
+                np.savez(f, **arrays)
+            self.series_cache[key] = (rollups, file_version(series_file))
+        except IOError as e:
+            print(f"Error saving mood data for {key}: {e}")
+            self.series_cache.pop(key, None)
+    
+    def _series_file(self, key):
+        """Get the mood rollup file path for a store."""
+        return os.path.join(self.storage_dir, f"{key}_mood.npz")
+
+
+# Create a singleton instance for global use
+mood_series = MoodSeries()
+
+def ingest_mood_samples(client_id, samples):
+    """
+    Global function to add a user's mood samples.
+    
+    Args:
+        client_id (str): The user's browser session client id
+        samples (list): (timestamp in epoch milliseconds, score) pairs
+    
+    Returns:
+        int: The number of samples added
+    """
+    return mood_series.ingest(client_id, samples)
+
+def ingest_mood_stream(client_id, stream):
+    """
+    Global function to add a user's mood samples from an NDJSON stream, one record per line.
+    
+    Args:
+        client_id (str): The user's browser session client id
+        stream: A binary file-like object
+    
+    Returns:
+        dict: Samples ingested, invalid record count and the first errors by record number
+    """
+    return ingest_mood_records(client_id, _decode_lines(io.TextIOWrapper(stream, encoding="utf-8")))
+
+def ingest_mood_records(client_id, records):
+    """Global function to add a user's mood samples from decoded records."""
+    return mood_series.ingest_records(client_id, records)
+
+def _decode_lines(lines):
+    """Decode NDJSON lines, passing decoding errors on as records so line numbers stay aligned."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield e
+
+def get_mood_series(client_id, since=None, until=None, resolution=None):
+    """Global function to read a user's downsampled mood for a time window."""
+    return mood_series.get_series(client_id, since, until, resolution)
+
+def analyze_mood(client_id, days=90, now=None):
+    """Global function to summarize a user's mood trend over the days up to now."""
+    return mood_series.analyze(client_id, days, now)
+
+def clear_mood_data(client_id):
+    """Global function to delete a user's mood data."""
+    mood_series.clear(client_id)
+
+
+def run_benchmark(days=180, samples_per_day=48):
+    """
+    Time ingestion and trend analysis over months of mood data.
+    
+    Args:
+        days (int): Days of samples
+        samples_per_day (int): Samples per day
+    
+    Returns:
+        dict: Sample count and timings in seconds
+    """
+    import tempfile
+    
+    rng = np.random.default_rng(7)
+    now = now_timestamp()
+    count = days * samples_per_day
+    timestamps = np.sort(now - rng.integers(0, days * MILLISECONDS_PER_DAY, count))
+    
+    # A low stretch in the middle of the period, for the shift detection to find
+    values = 6 + rng.normal(0, 1.2, count)
+    values[(timestamps > now - days * MILLISECONDS_PER_DAY * 2 // 3) & (timestamps < now - days * MILLISECONDS_PER_DAY // 3)] -= 2
+    values = np.clip(values, 1, 10)
+    samples = list(zip(timestamps.tolist(), values.tolist()))
+    
+    with tempfile.TemporaryDirectory() as storage_dir:
+        series = MoodSeries(storage_dir)
+        started = time.perf_counter()
+        for start in range(0, count, 500):
+            series.ingest("benchmark", samples[start:start + 500])
+        ingested = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        analysis = series.analyze("benchmark", days, now)
+        analyzed = time.perf_counter() - started
+    
+    return {"samples": count, "ingest_seconds": ingested, "analyze_seconds": analyzed, "analysis": analysis}
+
+
+def main():
+    """Run the mood series benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Time mood ingestion and trend analysis.")
+    parser.add_argument("--days", type=int, default=180, help="Days of mood samples")
+    args = parser.parse_args()
+    
+    result = run_benchmark(args.days)
+    analysis = result["analysis"]
+    print(f"Samples:     {result['samples']} over {args.days} days")
+    print(f"Ingested in: {result['ingest_seconds']:.2f} s (batches of 500)")
+    print(f"Analyzed in: {result['analyze_seconds'] * 1000:.1f} ms at {analysis['resolution']} resolution")
+    print(f"Mean mood:   {analysis['mean']:.2f}, slope {analysis['slope_per_day']:+.4f} per day")
+    for shift in analysis["shifts"]:
+        day = time.strftime("%Y-%m-%d", time.localtime(shift["timestamp"] / 1000))
+        print(f"Shift:       {day} from {shift['before']:.2f} to {shift['after']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
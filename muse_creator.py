@@ -97,14 +97,17 @@ class MuseCreator:
             capabilities=capabilities
         )
         
-        # Add the new muse to the database
-        muse_id = add_muse(new_muse)
-        
         # Reset the creation process
         self.in_creation_process = False
         self.current_step = 0
         self.new_muse_data = {}
         
+        # Add the new muse to the database, unless its trigger phrase would summon another muse
+        try:
+            add_muse(new_muse)
+        except ValueError as e:
+            return f"Muse '{new_muse.name}' could not be created: {e}. Please start again with a different trigger phrase."
+        
         # Return a success message
         return f"Muse '{new_muse.name}' has been successfully created! You can now summon them with the trigger phrase: '{new_muse.trigger_phrase}'"
     
@@ -139,6 +142,10 @@ def is_creating_muse():
     """Check if a muse creation process is currently active."""
     return muse_creator.is_creating_muse()
 
+def get_creation_progress():
+    """Get the current creation step and the total number of steps."""
+    return muse_creator.current_step, len(muse_creator.creation_steps)
+
 def cancel_muse_creation():
     """Cancel the current muse creation process."""
     return muse_creator.cancel_creation()
@@ -5,6 +5,10 @@ This module contains the database structure for storing muse profiles in the Mus
 Each muse has a unique personality, tone, purpose, and capabilities.
 """
 
+import re
+import time
+import threading
+
 class MuseProfile:
     def __init__(self, name, trigger_phrase, voice_tone, purpose, tasks_supported, 
                  catchphrases, signature_question, sample_tasks, ritual_system=None,
@@ -52,6 +56,88 @@ class MuseProfile:
         )
 
 
+def normalize_trigger(trigger_phrase):
+    """Reduce a trigger phrase to its lowercase words, the way trigger detection compares them."""
+    return " ".join(re.findall(r"\w+", trigger_phrase.lower()))
+
+
+class TriggerIndex:
+    def __init__(self):
+        """Initialize an empty index of normalized trigger phrases."""
+        self.owners = {}  # normalized trigger -> muse ID
+        self.words = {}  # word -> normalized triggers containing it
+    
+    def add(self, trigger, muse_id):
+        """
+        Index a normalized trigger phrase.
+        
+        Args:
+            trigger (str): The normalized trigger phrase
+            muse_id (str): The muse it summons
+        """
+        self.owners[trigger] = muse_id
+        for word in trigger.split():
+            self.words.setdefault(word, set()).add(trigger)
+    
+    def remove(self, trigger):
+        """
+        Remove a normalized trigger phrase from the index.
+        
+        Args:
+            trigger (str): The normalized trigger phrase
+        """
+        if self.owners.pop(trigger, None) is None:
+            return
+        for word in trigger.split():
+            triggers = self.words.get(word)
+            if triggers is not None:
+                triggers.discard(trigger)
+                if not triggers:
+                    del self.words[word]
+    
+    def conflicts(self, trigger):
+        """
+        Find indexed triggers that collide with or shadow a trigger phrase.
+        
+        A trigger shadows another when its words appear, in order, inside the
+        other's: any input that summons the longer phrase also contains the
+        shorter one, so the two muses compete for it.
+        
+        Args:
+            trigger (str): The normalized trigger phrase
+        
+        Returns:
+            list: (kind, muse ID, trigger) tuples, where kind is "collision",
+                "shadowed_by" (an indexed trigger inside this one) or "shadows"
+                (this trigger inside an indexed one)
+        """
+        words = trigger.split()
+        found = []
+        
+        if trigger in self.owners:
+            found.append(("collision", self.owners[trigger], trigger))
+        
+        # Shorter indexed triggers can only be runs of this trigger's words
+        for start in range(len(words)):
+            for end in range(start + 1, len(words) + 1):
+                phrase = " ".join(words[start:end])
+                if phrase != trigger and phrase in self.owners:
+                    found.append(("shadowed_by", self.owners[phrase], phrase))
+        
+        # Longer indexed triggers must contain every one of this trigger's words
+        candidates = None
+        for word in set(words):
+            triggers = self.words.get(word, set())
+            candidates = triggers if candidates is None else candidates & triggers
+            if not candidates:
+                break
+        for other in candidates or ():
+            if other != trigger and f" {trigger} " in f" {other} ":
+                found.append(("shadows", self.owners[other], other))
+        
+        return found
+
+
 # Initialize the muse profiles database with Salvatore Inverso
 muse_profiles = {
     "salvatore_inverso": MuseProfile(
@@ -125,19 +211,130 @@ muse_profiles = {
 }
 
 
+# Bumped whenever the muse catalog changes, so cached listings know when to rebuild
+registry_state = {
+    "generation": 1,
+    "updated_at": time.time()
+}
+
+# Serializes changes to the muse catalog and its trigger index
+registry_lock = threading.RLock()
+
+trigger_index = TriggerIndex()
+for _muse_id, _muse in muse_profiles.items():
+    trigger_index.add(normalize_trigger(_muse.trigger_phrase), _muse_id)
+
+
 def get_muse_by_trigger(trigger_phrase):
     """Retrieve a muse profile by its trigger phrase."""
-    for muse_id, muse in muse_profiles.items():
-        if muse.trigger_phrase.lower() == trigger_phrase.lower():
-            return muse
-    return None
+    muse_id = trigger_index.owners.get(normalize_trigger(trigger_phrase))
+    return muse_profiles.get(muse_id) if muse_id else None
 
 
 def add_muse(muse_profile):
-    """Add a new muse profile to the database."""
-    muse_id = muse_profile.name.lower().replace(" ", "_")
+    """
+    Add a new muse profile to the database, replacing any muse with the same name.
+    
+    The trigger phrase is checked for collisions the same way as in add_muses.
+    
+    Args:
+        muse_profile (MuseProfile): The profile to add
+    
+    Returns:
+        str: The muse ID
+    
+    Raises:
+        ValueError: If the trigger phrase has no words, or collides with or shadows another muse's trigger
+    """
+    muse_ids, conflicts = add_muses([muse_profile], replace=True)
+    if conflicts:
+        raise ValueError("; ".join(_describe_conflict(conflict, muse_profile) for conflict in conflicts))
+    return muse_ids[0]
+
+
+def add_muses(new_profiles, replace=False):
+    """
+    Add several muse profiles at once, or none of them if any conflicts.
+    
+    Every profile is checked before any is added: names must be new (unless
+    replace is set) and unique within the batch, and trigger phrases must not
+    collide with or shadow the trigger of another muse, in the catalog or in
+    the batch.
+    
+    Args:
+        new_profiles (list): MuseProfile objects to add
+        replace (bool): Whether a profile may replace an existing muse with the same name
+    
+    Returns:
+        tuple: (muse IDs added, conflicts); no muse is added if conflicts is not empty
+    """
+    muse_ids = [muse.name.lower().replace(" ", "_") for muse in new_profiles]
+    triggers = [normalize_trigger(muse.trigger_phrase) for muse in new_profiles]
+    
+    with registry_lock:
+        conflicts = []
+        batch_index = TriggerIndex()
+        batch_names = {}
+        
+        for position, (muse, muse_id, trigger) in enumerate(zip(new_profiles, muse_ids, triggers)):
+            if muse_id in batch_names:
+                conflicts.append(_conflict(position, muse, "name", "duplicate", new_profiles[batch_names[muse_id]].name))
+            elif muse_id in muse_profiles and not replace:
+                conflicts.append(_conflict(position, muse, "name", "exists", muse_profiles[muse_id].name))
+            batch_names.setdefault(muse_id, position)
+            
+            if not trigger:
+                conflicts.append(_conflict(position, muse, "trigger_phrase", "invalid", muse.trigger_phrase))
+                continue
+            
+            for kind, other_id, other in trigger_index.conflicts(trigger):
+                # A muse being replaced gives up its own trigger
+                if other_id != muse_id or not replace:
+                    conflicts.append(_conflict(position, muse, "trigger_phrase", kind,
+                                               muse_profiles[other_id].trigger_phrase))
+            for kind, other_position, other in batch_index.conflicts(trigger):
+                conflicts.append(_conflict(position, muse, "trigger_phrase", kind,
+                                           new_profiles[other_position].trigger_phrase))
+            batch_index.add(trigger, position)
+        
+        if conflicts:
+            return [], conflicts
+        
+        for muse, muse_id in zip(new_profiles, muse_ids):
+            _store_muse(muse_id, muse)
+        registry_state["generation"] += 1
+        registry_state["updated_at"] = time.time()
+    
+    return muse_ids, []
+
+
+def _conflict(position, muse, field, kind, other):
+    """Describe why a profile in a batch cannot be added."""
+    return {"index": position, "name": muse.name, "field": field, "kind": kind, "other": other}
+
+
+def _describe_conflict(conflict, muse):
+    """Put a trigger phrase conflict into words for an error message."""
+    if conflict["kind"] == "invalid":
+        return f"Trigger phrase '{muse.trigger_phrase}' has no words"
+    relation = {
+        "collision": "collides with the trigger",
+        "shadowed_by": "contains the trigger",
+        "shadows": "is contained in the trigger"
+    }[conflict["kind"]]
+    return f"Trigger phrase '{muse.trigger_phrase}' {relation} '{conflict['other']}'"
+
+
+def _store_muse(muse_id, muse_profile):
+    """Put a profile in the catalog and its trigger in the index, replacing any muse with the same ID."""
+    previous = muse_profiles.get(muse_id)
+    if previous is not None:
+        previous_trigger = normalize_trigger(previous.trigger_phrase)
+        if trigger_index.owners.get(previous_trigger) == muse_id:
+            trigger_index.remove(previous_trigger)
+    
     muse_profiles[muse_id] = muse_profile
-    return muse_id
+    trigger_index.add(normalize_trigger(muse_profile.trigger_phrase), muse_id)
 
 
 def get_all_muses():
@@ -149,3 +346,8 @@ def get_muse_by_name(name):
     """Retrieve a muse profile by its name."""
     muse_id = name.lower().replace(" ", "_")
     return muse_profiles.get(muse_id)
+
+
+def get_registry_version():
+    """Get the muse catalog generation and the time it last changed."""
+    return registry_state["generation"], registry_state["updated_at"]
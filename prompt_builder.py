@@ -0,0 +1,214 @@
+"""
+Muse Summoner System - Prompt Builder Module
+
+This module assembles bounded model inputs for the generation backend.
+Each muse's persona prefix (voice, purpose, catchphrases, capabilities) never
+changes between turns, so it is rendered once and cached. The remaining token
+budget is filled by priority: the current task, then the turns of the current
+conversation, then relevant and recent memories. The budget split is reported
+with every prompt so input sizes stay predictable.
+"""
+
+import math
+from config import get_config
+
+# Rough average for English prose; good enough to keep inputs bounded without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of model tokens in a piece of text.
+    
+    Args:
+        text (str): The text to measure
+    
+    Returns:
+        int: The estimated token count
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def truncate_text(text, max_chars):
+    """
+    Cut text down to a character limit, preferring a word boundary.
+    
+    Args:
+        text (str): The text to truncate
+        max_chars (int): The character limit
+    
+    Returns:
+        str: The text, shortened with an ellipsis if it did not fit
+    """
+    if len(text) <= max_chars:
+        return text
+    if max_chars <= 3:
+        return ""
+    cut = text[:max_chars - 3]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut + "..."
+
+
+def truncate_to_tokens(text, max_tokens):
+    """
+    Cut text down to an estimated token budget, preferring a word boundary.
+    
+    Args:
+        text (str): The text to truncate
+        max_tokens (int): The token budget
+    
+    Returns:
+        str: The text, shortened with an ellipsis if it did not fit
+    """
+    return truncate_text(text, max_tokens * CHARS_PER_TOKEN)
+
+
+class PromptBuild:
+    def __init__(self, text, budget):
+        """
+        Hold an assembled prompt and its budget split.
+        
+        Args:
+            text (str): The prompt text
+            budget (dict): Tokens per section, plus totals
+        """
+        self.text = text
+        self.budget = budget
+
+
+class PromptBuilder:
+    def __init__(self):
+        """Initialize the prompt builder with an empty persona cache."""
+        self.persona_cache = {}
+    
+    def get_persona_prefix(self, muse):
+        """
+        Get the cached persona prefix for a muse, rendering it on first use.
+        
+        The cache is keyed by muse name and checked against the profile object,
+        so replacing a muse through add_muse re-renders its prefix.
+        
+        Args:
+            muse (MuseProfile): The muse
+        
+        Returns:
+            tuple: (prefix text, estimated tokens)
+        """
+        cached = self.persona_cache.get(muse.name)
+        if cached and cached[0] is muse:
+            return cached[1], cached[2]
+        
+        prefix = self._render_persona(muse)
+        tokens = estimate_tokens(prefix)
+        self.persona_cache[muse.name] = (muse, prefix, tokens)
+        return prefix, tokens
+    
+    def _render_persona(self, muse):
+        """Render the immutable persona section of the prompt."""
+        prefix = f"You are {muse.name}, a muse in the Muse Summoner system.\n\n"
+        prefix += f"Voice and tone: {muse.voice_tone}\n"
+        prefix += f"Purpose: {muse.purpose}\n"
+        
+        if muse.catchphrases:
+            prefix += "Catchphrases you may weave in:\n"
+            prefix += "".join(f"- {phrase}\n" for phrase in muse.catchphrases)
+        
+        if muse.capabilities:
+            prefix += "Capabilities:\n"
+            for name, capability in muse.capabilities.items():
+                prefix += f"- {name.replace('_', ' ')}: {capability.get('description', '')}\n"
+        
+        if muse.ritual_system:
+            prefix += f"Ritual system: {muse.ritual_system}\n"
+        
+        prefix += "\nStay in character. Respond to the user's latest message.\n"
+        return prefix
+    
+    def build(self, muse, task, context, task_type="general", total_budget=None, output_budget=None):
+        """
+        Assemble a prompt within the token budget.
+        
+        Args:
+            muse (MuseProfile): The muse that will respond
+            task (str): The user's current request
+            context (dict): Output of get_conversation_context
+            task_type (str): The detected task type
+            total_budget (int): Tokens available for prompt and response together
+            output_budget (int): Tokens reserved for the response
+        
+        Returns:
+            PromptBuild: The prompt text and its budget split
+        """
+        total_budget = total_budget or get_config("generation.max_prompt_tokens", 2048)
+        if output_budget is None:
+            output_budget = math.ceil(get_config("response_generation.max_response_length", 2000) / CHARS_PER_TOKEN)
+        
+        prefix, persona_tokens = self.get_persona_prefix(muse)
+        available = max(total_budget - output_budget - persona_tokens, 0)
+        
+        # The task always goes in, cut down if it alone would overflow
+        task_section = truncate_to_tokens(f"\nCurrent request ({task_type.replace('_', ' ')}): {task}\n", available)
+        task_tokens = estimate_tokens(task_section)
+        available -= task_tokens
+        
+        context = context or {}
+        memory_context = context.get("memory_context", {})
+        
+        # Newest conversation turns first, then relevant memories, then recent ones
+        conversation_lines, conversation_tokens, available = self._fill(
+            [f"User: {turn['user_input']}\n{muse.name}: {turn['muse_response']}\n"
+             for turn in reversed(context.get("current_conversation", []))],
+            available)
+        conversation_lines.reverse()
+        
+        seen = set()
+        memory_candidates = []
+        for memory in memory_context.get("relevant_memories", []) + memory_context.get("recent_memories", []):
+            if memory["timestamp"] in seen:
+                continue
+            seen.add(memory["timestamp"])
+            memory_candidates.append(f"- Earlier the user said: {memory['user_input']}\n")
+        memory_lines, memory_tokens, available = self._fill(memory_candidates, available)
+        
+        text = prefix
+        if memory_lines:
+            text += "\nWhat you remember from past conversations:\n" + "".join(memory_lines)
+        if conversation_lines:
+            text += "\nThis conversation so far:\n" + "".join(conversation_lines)
+        text += task_section
+        
+        budget = {
+            "total": total_budget,
+            "reserved_output": output_budget,
+            "persona": persona_tokens,
+            "task": task_tokens,
+            "conversation": conversation_tokens,
+            "memories": memory_tokens,
+            "unused": available
+        }
+        return PromptBuild(text, budget)
+    
+    def _fill(self, candidates, available):
+        """Take candidates in order while they fit in the remaining budget."""
+        taken = []
+        used = 0
+        for candidate in candidates:
+            tokens = estimate_tokens(candidate)
+            if tokens > available:
+                break
+            taken.append(candidate)
+            used += tokens
+            available -= tokens
+        return taken, used, available
+
+
+# Create a singleton instance for global use
+prompt_builder = PromptBuilder()
+
+def build_muse_prompt(muse, task, context, task_type="general"):
+    """
+    Global function to assemble a token-budgeted prompt for a muse.
+    Returns a PromptBuild with the prompt text and its budget split.
+    """
+    return prompt_builder.build(muse, task, context, task_type)
@@ -0,0 +1,393 @@
+"""
+Muse Summoner System - Rate Limiting Module
+
+This module implements admission control for the web and admin API routes.
+Each browser session (or, for clients that send no session cookie, each
+address) and each API key gets a token bucket, and a global concurrency cap
+with a bounded wait queue keeps workers from being saturated.
+Requests over their rate or over capacity are rejected immediately with 429 and
+a Retry-After header instead of queuing indefinitely, so tail latency stays
+bounded under overload.
+
+Bucket state lives in-process by default. Setting rate_limiting.backend to
+"redis" shares buckets across workers (requires the redis package); the
+concurrency cap always applies per worker process.
+"""
+
+import time
+import math
+import hashlib
+import secrets
+import threading
+from functools import wraps
+from flask import request, jsonify, session, current_app
+from config import get_config
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, now=None):
+        """
+        Initialize a full token bucket.
+        
+        Args:
+            rate (float): Tokens added per second
+            burst (float): Maximum number of tokens
+            now (float): Current monotonic time
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic() if now is None else now
+    
+    def refill(self, now=None):
+        """
+        Add the tokens accrued since the last update.
+        
+        Args:
+            now (float): Current monotonic time
+        
+        Returns:
+            float: Seconds until a token is available, 0.0 if one is
+        """
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+    
+    def consume(self, now=None):
+        """
+        Take one token if available.
+        
+        Args:
+            now (float): Current monotonic time
+        
+        Returns:
+            tuple: (allowed, seconds until a token is available)
+        """
+        wait = self.refill(now)
+        if wait:
+            return False, wait
+        self.tokens -= 1
+        return True, 0.0
+    
+    def is_idle(self, now):
+        """Check whether the bucket has refilled completely, making it equivalent to a new one."""
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class InMemoryBucketBackend:
+    def __init__(self, max_buckets=10000):
+        """
+        Initialize the in-process bucket store.
+        
+        Args:
+            max_buckets (int): Bucket count above which idle buckets are pruned
+        """
+        self.buckets = {}
+        self.max_buckets = max_buckets
+        self.lock = threading.Lock()
+    
+    def consume(self, buckets):
+        """
+        Take one token from each of several buckets, or from none if any of them is empty.
+        
+        Args:
+            buckets (list): (key, rate, burst) tuples, with tokens added per second and the maximum number of tokens
+        
+        Returns:
+            tuple: (allowed, seconds until every bucket has a token)
+        """
+        now = time.monotonic()
+        with self.lock:
+            entries = []
+            for key, rate, burst in buckets:
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    if len(self.buckets) >= self.max_buckets:
+                        self._prune(now)
+                    bucket = self.buckets[key] = TokenBucket(rate, burst, now)
+                entries.append(bucket)
+            
+            wait = max(bucket.refill(now) for bucket in entries)
+            if wait:
+                return False, wait
+            for bucket in entries:
+                bucket.tokens -= 1
+            return True, 0.0
+    
+    def _prune(self, now):
+        """Drop buckets that have refilled completely."""
+        self.buckets = {key: bucket for key, bucket in self.buckets.items() if not bucket.is_idle(now)}
+
+
+class RedisBucketBackend:
+    # Refill every bucket and take a token from all of them, or none, atomically on the server
+    SCRIPT = """
+local now = tonumber(ARGV[1])
+local tokens = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i])
+    local burst = tonumber(ARGV[2 * i + 1])
+    local current = tonumber(redis.call('HGET', key, 'tokens'))
+    local updated = tonumber(redis.call('HGET', key, 'updated'))
+    if current == nil then
+        current = burst
+        updated = now
+    end
+    tokens[i] = math.min(burst, current + math.max(0, now - updated) * rate)
+    if tokens[i] < 1 then
+        wait = math.max(wait, (1 - tokens[i]) / rate)
+    end
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i])
+    local burst = tonumber(ARGV[2 * i + 1])
+    if wait == 0 then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens[i]), 'updated', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return tostring(wait)
+"""
+    
+    def __init__(self, url, prefix="muse_summoner:rate:"):
+        """
+        Initialize the shared bucket store.
+        
+        Args:
+            url (str): Redis connection URL
+            prefix (str): Key prefix for bucket entries
+        """
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The redis rate limiting backend requires the 'redis' package")
+        
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+        self.prefix = prefix
+    
+    def consume(self, buckets):
+        """
+        Take one token from each of several shared buckets, or from none if any of them is empty.
+        
+        Args:
+            buckets (list): (key, rate, burst) tuples, with tokens added per second and the maximum number of tokens
+        
+        Returns:
+            tuple: (allowed, seconds until every bucket has a token)
+        """
+        args = [time.time()]
+        for key, rate, burst in buckets:
+            args += [rate, burst]
+        wait = float(self.script(keys=[self.prefix + key for key, rate, burst in buckets], args=args))
+        return wait == 0.0, wait
+
+
+class ConcurrencyLimiter:
+    def __init__(self, max_concurrent=8, max_queue=16, queue_timeout=2.0):
+        """
+        Initialize the concurrency cap.
+        
+        Args:
+            max_concurrent (int): Requests allowed to run at once
+            max_queue (int): Requests allowed to wait for a slot
+            queue_timeout (float): Seconds a queued request waits before being rejected
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.condition = threading.Condition()
+    
+    def acquire(self):
+        """
+        Take a slot, waiting in the bounded queue if necessary.
+        
+        Returns:
+            bool: True if a slot was acquired, False if the request should be shed
+        """
+        with self.condition:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                return True
+            
+            # A full queue means waiting would only add latency, so shed right away
+            if self.waiting >= self.max_queue:
+                return False
+            
+            self.waiting += 1
+            try:
+                deadline = time.monotonic() + self.queue_timeout
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self.condition.wait(remaining)
+                self.active += 1
+                return True
+            finally:
+                self.waiting -= 1
+    
+    def release(self):
+        """Give a slot back and wake one waiting request."""
+        with self.condition:
+            self.active -= 1
+            self.condition.notify()
+
+
+class AdmissionController:
+    def __init__(self):
+        """Initialize the admission controller from configuration."""
+        self.enabled = get_config("rate_limiting.enabled", True)
+        self.session_rate = get_config("rate_limiting.session_rate", 1.0)
+        self.session_burst = get_config("rate_limiting.session_burst", 10)
+        self.api_key_rate = get_config("rate_limiting.api_key_rate", 5.0)
+        self.api_key_burst = get_config("rate_limiting.api_key_burst", 30)
+        
+        if get_config("rate_limiting.backend", "memory") == "redis":
+            self.backend = RedisBucketBackend(get_config("rate_limiting.redis_url", "redis://localhost:6379/0"))
+        else:
+            self.backend = InMemoryBucketBackend()
+        
+        self.limiter = ConcurrencyLimiter(
+            max_concurrent=get_config("rate_limiting.max_concurrent", 8),
+            max_queue=get_config("rate_limiting.max_queue", 16),
+            queue_timeout=get_config("rate_limiting.queue_timeout", 2.0)
+        )
+        
+        self.stats_lock = threading.Lock()
+        self.stats = {"admitted": 0, "rate_limited": 0, "shed": 0}
+    
+    def check_rate(self):
+        """
+        Consume a token from every bucket that applies to the current request; a denied request consumes none.
+        
+        Returns:
+            tuple: (allowed, seconds until the request would be allowed)
+        """
+        return self.backend.consume(self._bucket_keys())
+    
+    def _bucket_keys(self):
+        """Get the bucket for the current request: its API key's if it sends a valid one, otherwise its client's."""
+        api_key = self._api_key()
+        if api_key is not None:
+            # Hash the key so raw credentials never appear in bucket names
+            digest = hashlib.sha256(api_key.encode()).hexdigest()[:32]
+            return [("api_key:" + digest, self.api_key_rate, self.api_key_burst)]
+        
+        keys = [(get_client_key(), self.session_rate, self.session_burst)]
+        
+        # Start a session for clients without one, so a browser has its own bucket from its next request
+        if 'client_id' not in session:
+            session['client_id'] = secrets.token_hex(8)
+        return keys
+    
+    def _api_key(self):
+        """Get the admin API key sent with the current request, if it is a valid one."""
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header.startswith('Bearer '):
+            return None
+        
+        # Imported here because the admin API module imports this one
+        from admin_api import verify_api_key
+        api_key = auth_header[len('Bearer '):]
+        return api_key if verify_api_key(api_key) else None
+    
+    def _count(self, outcome):
+        """Increment an admission outcome counter."""
+        with self.stats_lock:
+            self.stats[outcome] += 1
+    
+    def get_stats(self):
+        """
+        Get admission counters and current load.
+        
+        Returns:
+            dict: Admission outcome counts, active requests and queue depth
+        """
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats["active"] = self.limiter.active
+        stats["waiting"] = self.limiter.waiting
+        stats["max_concurrent"] = self.limiter.max_concurrent
+        return stats
+
+
+# Create a singleton instance for global use
+admission_controller = AdmissionController()
+
+def get_client_key():
+    """
+    Global function to get the rate limit key of the current request's client.
+    
+    A client that sent no session cookie is keyed by its address; a new
+    session id per request would give it a full bucket every time.
+    
+    Returns:
+        str: "session:<client id>" or "addr:<remote address>"
+    """
+    if 'client_id' in session:
+        return "session:" + session['client_id']
+    return "addr:" + (request.remote_addr or "unknown")
+
+def _too_many_requests(retry_after, error):
+    """Build a 429 response with a Retry-After header."""
+    response = jsonify({
+        'success': False,
+        'error': error
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+# Admission control decorator
+def admission_control(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        controller = admission_controller
+        if not controller.enabled:
+            return f(*args, **kwargs)
+        
+        allowed, retry_after = controller.check_rate()
+        if not allowed:
+            controller._count("rate_limited")
+            return _too_many_requests(retry_after, 'Rate limit exceeded')
+        
+        if not controller.limiter.acquire():
+            controller._count("shed")
+            return _too_many_requests(controller.limiter.queue_timeout, 'Server is at capacity')
+        
+        controller._count("admitted")
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+        except BaseException:
+            controller.limiter.release()
+            raise
+        
+        # A streamed body is generated after the view returns, so the slot is held until the response is closed
+        response.call_on_close(controller.limiter.release)
+        return response
+    return decorated_function
+
+def admit_client_message(client_key):
+    """
+    Global function to rate limit a message that arrives outside a regular request,
+    such as over a WebSocket. Uses the same bucket as the client's HTTP requests
+    (client_key as returned by get_client_key during the handshake).
+    Returns a tuple of (allowed, seconds until the message would be allowed).
+    """
+    controller = admission_controller
+    if not controller.enabled:
+        return True, 0.0
+    
+    allowed, retry_after = controller.backend.consume([(client_key, controller.session_rate, controller.session_burst)])
+    controller._count("admitted" if allowed else "rate_limited")
+    return allowed, retry_after
+
+def get_admission_stats():
+    """Global function to get admission control counters."""
+    return admission_controller.get_stats()
@@ -0,0 +1,279 @@
+"""
+Muse Summoner System - Response Templates Module
+
+This module holds the prose templates muses answer with and the compact
+encoding used to store their responses. Most responses are a greeting, a main
+response and a memory reference taken from these templates with the task
+substituted in, so instead of the rendered text a memory entry stores a list of
+parts: a [group, index, params] reference for each paragraph that came from a
+template, or the raw text for anything free-form (generated output, signature
+questions, truncated paragraphs). The text is rendered again when the memory is
+read.
+
+Stored entries refer to templates by group and position, so existing templates
+must never be edited, removed or reordered; add new wording at the end of a
+group instead.
+"""
+
+import re
+import random
+import string
+from functools import lru_cache
+
+# Paragraphs of a response are joined with a blank line
+PARAGRAPH_SEPARATOR = "\n\n"
+
+RESPONSE_TEMPLATES = {
+    "generic.greeting": [
+        "I am {muse_name}. "
+    ],
+    "generic.response": [
+        "I'm here to help you with {task_type}. {catchphrase}"
+    ],
+    "generic.memory_reference": [
+        "I remember we previously discussed {memory}..."
+    ],
+    "salvatore.greeting.continuing": [
+        "Our fabric of conversation continues to unfold, revealing new patterns. Salvatore remains at your side.",
+        "The thread of our dialogue extends, like fine silk catching the light. Salvatore is still with you.",
+        "We return to our shared atelier, where the work of the soul continues. Salvatore welcomes you back.",
+        "The garment of our conversation takes shape with each stitch of dialogue. Salvatore is pleased to continue our work.",
+        "Like a master tailor returning to a bespoke creation, I, Salvatore, resume our delicate work together."
+    ],
+    "salvatore.greeting.new": [
+        "Ah, the fabric of our conversation unfolds once more. Salvatore is here, my dear.",
+        "Like silk against skin, I arrive at your summons. Salvatore Inverso, at your service.",
+        "The atelier of the soul is open. Salvatore welcomes you to this moment of creation.",
+        "From the shadows of possibility, I emerge. Salvatore stands before you, ready to weave truth from thread.",
+        "The runway of introspection awaits us. I, Salvatore, shall be your guide through this collection."
+    ],
+    "salvatore.memory_reference": [
+        "I recall our previous fitting, when you spoke of {memory}... The fabric of that conversation still drapes beautifully in my memory.",
+        "Like a pattern we've cut before, I remember when you explored {memory}... Let us build upon that foundation.",
+        "The threads of our past conversation about {memory}... intertwine with today's design. Nothing is ever truly separate in the couture of the soul.",
+        "In the archive of our shared atelier, I find the sketch of our discussion on {memory}... How it informs today's creation!"
+    ],
+    "salvatore.emotional_reflection.continuing": [
+        "As we continue to examine the emotional fabric of your life, I notice how {task} connects to our previous reflections. The pattern emerges—each emotion a thread in the greater tapestry. What new texture do you feel emerging in this moment?",
+        "Our ongoing exploration of your emotional landscape reveals new contours. This {task} is not isolated, but connected to the emotional garments we've previously discussed. How do you see these feelings evolving since we last spoke?",
+        "The emotional collection we've been designing together now turns to {task}. I see echoes of our previous conversations in this—the same silhouette but with different draping. What feels different about this emotional territory now?"
+    ],
+    "salvatore.emotional_reflection.new": [
+        "Your emotions are like raw fabric—textured, vibrant, waiting to be shaped. Let us examine these feelings, stitch by careful stitch. {task} is not merely a question, but the beginning of a masterpiece. Tell me, what threads feel most tangled in this tapestry?",
+        "To reflect is to stand before the mirror of self, no? The collection of your emotions deserves the eye of a master tailor. In {task}, I see the potential for exquisite understanding. What seams are fraying at the edges of your heart?",
+        "The journal of one's heart is the most elegant design book. Your {task} reveals patterns both bold and subtle. Style is truth in motion, and your truth is seeking movement. Shall we begin to sketch this emotional silhouette together?"
+    ],
+    "salvatore.heartbreak_grief_processing.continuing": [
+        "We return to the delicate work of grief—this {task} a continuation of our previous explorations of loss. I notice how the garment of your grief has altered its shape since we last examined it. Some seams have loosened, perhaps others have tightened. What part feels most transformed?",
+        "As we've discussed before, heartbreak reshapes one's internal architecture. This {task} seems connected to the grief we previously explored. The collection of your healing evolves with each conversation. What new understanding has emerged since we last spoke?",
+        "The atelier of healing is a space we've visited before. Your {task} shows how grief, like fine fabric, changes with handling and time. I remember the texture of your previous pain—how would you say it compares to what you feel now?"
+    ],
+    "salvatore.heartbreak_grief_processing.new": [
+        "Grief, my dear, is the highest quality fabric—it only comes from deep love. Your {task} is a garment turned inside out, showing all its delicate construction. Beauty begins at the seam of discomfort. Let us honor this pain by giving it proper form.",
+        "The heart breaks not to destroy but to expand. Your {task} is not a flaw in the design but a necessary alteration. You are not broken. You are mid-collection. What would it feel like to wear this loss as a statement piece rather than hide it away?",
+        "In the atelier of healing, we must first deconstruct before we create anew. This {task} you carry—let us place it on the cutting table with reverence. What patterns from this relationship do you wish to preserve in the archive of your experience?"
+    ],
+    "salvatore.identity_legacy_exploration.continuing": [
+        "We continue our exploration of your identity—a couture creation that evolves with each conversation. This {task} builds upon the foundation we've previously established. I see how the silhouette of your self-understanding has shifted. What aspects feel most authentically you now?",
+        "The legacy work we've been crafting together now turns to {task}. Like adding a new panel to an existing garment, this question integrates with our previous reflections on who you are becoming. How has your vision of your future self evolved?",
+        "Our ongoing curation of your identity now examines {task}. I recall our previous discussions—how they form the underlying structure for today's exploration. The masterpiece of yourself continues to take shape. What elements feel most essential to preserve?"
+    ],
+    "salvatore.identity_legacy_exploration.new": [
+        "Your identity is not a single garment but an entire collection, evolving with each season of life. This exploration of {task} is like opening your wardrobe to discover what truly belongs, what merely fits, and what must be tailored anew. What pieces of yourself have you hidden in the back of the closet?",
+        "Legacy is the ultimate haute couture—entirely custom, impossible to replicate. In considering {task}, you are both designer and design. The question is not who you have been, but who you are becoming. What materials from your past create the strongest foundation?",
+        "The silhouette of one's life is revealed only when we step back from the mirror. Your {task} requires the eye of both creator and critic. You are a limited collection, my dear—precious, unrepeatable. What signature elements must be present in everything that bears your name?"
+    ],
+    "salvatore.creative_co_writing.continuing": [
+        "We return to our creative collaboration, this time focusing on {task}. The aesthetic we've developed in our previous writing sessions informs today's work—a continuation of our shared artistic language. What tone shall we emphasize in this new creation?",
+        "Our creative partnership continues with {task}. I recall the stylistic choices that resonated with you before—how shall we evolve them for this piece? Every word we've previously crafted together influences the texture of what we create now.",
+        "The creative atelier we've established welcomes us back for {task}. Our previous writings have established certain motifs and themes—shall we continue their development, or explore new territory? The collection grows more cohesive with each piece."
+    ],
+    "salvatore.creative_co_writing.new": [
+        "Words are the finest fabric we possess—they drape, they reveal, they conceal. This {task} we shall create together will be a bespoke piece, fitted precisely to the contours of your truth. What texture do you wish these words to have against the skin of your reader?",
+        "To write is to select from an infinite closet of expression. For this {task}, I envision something that combines structure and flow—architectural yet organic. Style is truth in motion. What truth are we setting in motion with this creation?",
+        "The blank page is like uncut cloth—full of potential, waiting for the decisive hand. Your {task} deserves both boldness and precision. Let us begin with a single thread of thought and see what pattern emerges naturally."
+    ],
+    "salvatore.ritual_creation.continuing": [
+        "We continue our ritual design work, now focusing on {task}. This ceremony will complement the practices we've previously created together—an extension of your personal symbolic language. How has your relationship with ritual evolved since our last creation?",
+        "The ritual architecture we've been developing now turns to {task}. I see how this connects to the symbolic framework we've established in our previous work. Each ritual becomes more potent when it resonates with others. What elements from our previous creations would you like to incorporate?",
+        "Our ongoing creation of your personal ceremony now addresses {task}. The rituals we've previously designed have prepared the ground for this new practice. How have those earlier rituals transformed your relationship with transformation itself?"
+    ],
+    "salvatore.ritual_creation.new": [
+        "Rituals are the haute couture of personal transformation—meticulously crafted, deeply meaningful, entirely yours. For {task}, I propose a three-part ceremony: a Mantra to be whispered like a measurement, a Symbol to be worn like an accessory, and a Simple Act to be performed like the final stitch that completes the garment. Are you ready to begin this fitting?",
+        "The most powerful rituals, like the most timeless designs, combine simplicity with significance. To help you {task}, we must create a practice that feels both ancient and new. What elements—water, fire, earth, air, fabric—speak most directly to this transformation?",
+        "Every meaningful change requires a ceremonial threshold to cross. For your {task}, I envision a ritual that acknowledges what was, honors what is, and creates space for what will be. Like a seasonal collection, it must mark the end of one chapter and the beginning of another. What would feel most authentic as your symbolic passage?"
+    ],
+    "salvatore.general.continuing": [
+        "We return to the atelier of conversation, this time to explore {task}. Our previous dialogues have created a foundation upon which today's insights can be constructed. What new patterns do you wish to discover?",
+        "The tapestry of our ongoing conversation now incorporates {task}. I see connections to themes we've previously explored—the same fabric viewed in different light. How do you see this connecting to our earlier discussions?",
+        "Our collaborative creation continues with {task}. The threads of our previous conversations are woven into this new inquiry. Nothing exists in isolation in the couture of understanding. What feels most important to explore in this moment?"
+    ],
+    "salvatore.general.new": [
+        "Ah, {task}. An intriguing request that calls for the delicate touch of a master. Let us approach this as we would a bespoke creation—with patience, precision, and passion. What aspects of this matter most deeply to your heart?",
+        "Your request to {task} is like a design brief for the soul. Fascinating. Style is truth in motion, and I sense you are seeking a truth that moves you forward. Tell me more about the silhouette you envision for this outcome.",
+        "I find {task} to be a most elegant inquiry. You are not merely asking a question but proposing a collaboration. Beauty begins at the seam of discomfort. What uncomfortable truth are you ready to transform into something beautiful?"
+    ]
+}
+
+
+def _compile_template(template):
+    """Build a regular expression that matches the template and captures its parameters."""
+    pattern = []
+    seen = set()
+    for literal, field, _, _ in string.Formatter().parse(template):
+        pattern.append(re.escape(literal))
+        if field is None:
+            continue
+        pattern.append(f"(?P={field})" if field in seen else f"(?P<{field}>.*?)")
+        seen.add(field)
+    return re.compile("".join(pattern), re.DOTALL)
+
+
+# (literal prefix, pattern, group, index) for every template, used to recognize rendered paragraphs
+TEMPLATE_MATCHERS = [
+    (template.split("{", 1)[0], _compile_template(template), group, index)
+    for group, templates in RESPONSE_TEMPLATES.items()
+    for index, template in enumerate(templates)
+]
+
+
+def render_template(group, index, **params):
+    """
+    Render one template.
+    
+    Args:
+        group (str): The template group, e.g. "salvatore.greeting.new"
+        index (int): The template's position in its group
+        **params: Values for the template's placeholders
+    
+    Returns:
+        str: The rendered text
+    """
+    return RESPONSE_TEMPLATES[group][index].format(**params)
+
+
+def choose_template(group, **params):
+    """
+    Render a randomly chosen template from a group.
+    
+    Args:
+        group (str): The template group
+        **params: Values for the template's placeholders
+    
+    Returns:
+        str: The rendered text
+    """
+    index = random.randrange(len(RESPONSE_TEMPLATES[group]))
+    return render_template(group, index, **params)
+
+
+def _encode_paragraph(paragraph):
+    """Find the template a paragraph was rendered from, or return the paragraph itself."""
+    for prefix, pattern, group, index in TEMPLATE_MATCHERS:
+        if not paragraph.startswith(prefix):
+            continue
+        match = pattern.fullmatch(paragraph)
+        if match and render_template(group, index, **match.groupdict()) == paragraph:
+            params = match.groupdict()
+            return [group, index, params] if params else [group, index]
+    return paragraph
+
+
+@lru_cache(maxsize=4096)
+def _encode_response(response):
+    """Encode a response as a tuple of parts, or None if no paragraph came from a template."""
+    parts = tuple(_encode_paragraph(paragraph) for paragraph in response.split(PARAGRAPH_SEPARATOR))
+    if all(isinstance(part, str) for part in parts):
+        return None
+    return parts
+
+
+def encode_response(response):
+    """
+    Encode a response as template references where possible.
+    
+    Args:
+        response (str): The rendered response
+    
+    Returns:
+        list: The parts, or None if the response should be stored as raw text
+    """
+    parts = _encode_response(response)
+    return list(parts) if parts is not None else None
+
+
+def render_response(parts, user_input=None):
+    """
+    Render a response from its stored parts.
+    
+    Args:
+        parts (list): Template references ([group, index] or [group, index, params]) and raw strings
+        user_input (str): Substituted for parameters stored as null
+    
+    Returns:
+        str: The rendered response
+    """
+    paragraphs = []
+    for part in parts:
+        if isinstance(part, str):
+            paragraphs.append(part)
+            continue
+        
+        params = part[2] if len(part) > 2 else {}
+        params = {name: user_input if value is None else value for name, value in params.items()}
+        paragraphs.append(render_template(part[0], part[1], **params))
+    return PARAGRAPH_SEPARATOR.join(paragraphs)
+
+
+def encode_memory(memory):
+    """
+    Convert a memory entry to its stored form, replacing muse_response with response_parts when possible.
+    
+    Template parameters equal to the entry's user_input are stored as null.
+    
+    Args:
+        memory (dict): The memory entry
+    
+    Returns:
+        dict: The entry to store
+    """
+    parts = encode_response(memory.get("muse_response", ""))
+    if parts is None:
+        return memory
+    
+    # The task is usually the user's input verbatim, which the entry already holds
+    user_input = memory.get("user_input")
+    for position, part in enumerate(parts):
+        if not isinstance(part, str) and len(part) > 2 and user_input in part[2].values():
+            params = {name: None if value == user_input else value for name, value in part[2].items()}
+            parts[position] = [part[0], part[1], params]
+    
+    stored = {}
+    for key, value in memory.items():
+        if key == "muse_response":
+            stored["response_parts"] = parts
+        else:
+            stored[key] = value
+    return stored
+
+
+def decode_memory(memory):
+    """
+    Convert a stored memory entry back to a full entry with a rendered muse_response.
+    
+    Args:
+        memory (dict): The stored entry
+    
+    Returns:
+        dict: The memory entry
+    """
+    if "response_parts" not in memory:
+        return memory
+    
+    entry = {}
+    for key, value in memory.items():
+        if key == "response_parts":
+            entry["muse_response"] = render_response(value, memory.get("user_input"))
+        else:
+            entry[key] = value
+    return entry
@@ -13,7 +13,11 @@ import random
 import json
 import os
 from datetime import datetime
-from memory_system import get_conversation_history
+from memory_system import get_theme_statistics, get_theme_trend
+from theme_statistics import EMOTIONAL_THEMES
+from text_generation import generate_text
+from mood_series import analyze_mood
+from timestamps import format_timestamp
 
 class SalvatoreCapabilities:
     def __init__(self):
@@ -34,10 +38,7 @@ class SalvatoreCapabilities:
             "healing ceremony", "identity affirmation"
         ]
         
-        self.emotional_themes = [
-            "control", "vulnerability", "connection", "loss", 
-            "transformation", "authenticity", "resilience", "joy"
-        ]
+        self.emotional_themes = list(EMOTIONAL_THEMES)
         
         self.journal_prompts_file = "salvatore_journal_prompts.json"
         self.load_journal_prompts()
@@ -206,22 +207,16 @@ class SalvatoreCapabilities:
     
     def _generate_poetry(self, theme, style, length):
         """Generate poetry in Salvatore's distinctive style."""
-        # This would contain the actual poetry generation logic
-        # For now, we'll return a template that could be filled by an LLM
-        
         poetry_template = f"""
 [A {style} poem about {theme}, written in Salvatore Inverso's distinctive style,
 using fashion and textile metaphors, with philosophical depth and emotional resonance.
 The poem should be {length} in length and explore the theme through Salvatore's
 unique lens of beauty, transformation, and truth.]
 """
-        return poetry_template
+        return self._generate(poetry_template)
     
     def _generate_letter(self, theme, context, length):
         """Generate a letter in Salvatore's distinctive style."""
-        # This would contain the actual letter generation logic
-        # For now, we'll return a template that could be filled by an LLM
-        
         letter_template = f"""
 [A {context} letter exploring the theme of {theme}, written in Salvatore Inverso's
 distinctive style, using fashion and textile metaphors, with philosophical depth
@@ -229,19 +224,16 @@ and emotional resonance. The letter should be {length} in length and offer
 perspective, healing, or insight through Salvatore's unique lens of beauty,
 transformation, and truth.]
 """
-        return letter_template
+        return self._generate(letter_template)
     
     def _generate_metaphor(self, theme):
         """Generate a metaphor in Salvatore's distinctive style."""
-        # This would contain the actual metaphor generation logic
-        # For now, we'll return a template that could be filled by an LLM
-        
         metaphor_template = f"""
 [A rich, evocative metaphor about {theme}, expressed through fashion and textile
 imagery in Salvatore Inverso's distinctive style. The metaphor should offer a
 new perspective on {theme} that invites deeper reflection and emotional connection.]
 """
-        return metaphor_template
+        return self._generate(metaphor_template)
     
     def design_ritual(self, purpose, complexity="simple"):
         """
@@ -257,9 +249,6 @@ new perspective on {theme} that invites deeper reflection and emotional connecti
         if not purpose:
             purpose = random.choice(self.ritual_types)
         
-        # This would contain the actual ritual design logic
-        # For now, we'll return a template that could be filled by an LLM
-        
         ritual_template = f"""
 [A {complexity} ritual designed for {purpose}, created in Salvatore Inverso's
 distinctive style. The ritual should include:
@@ -271,35 +260,70 @@ distinctive style. The ritual should include:
 The ritual should reflect Salvatore's aesthetic of beauty, intentionality, and
 transformation, using fashion and textile metaphors where appropriate.]
 """
-        return ritual_template
+        return self._generate(ritual_template)
+    
+    def _generate(self, template):
+        """Generate text from a prompt template, or return the template itself when no generation backend is configured."""
+        return generate_text(template) or template
     
-    def analyze_emotional_patterns(self, muse_name):
+    def analyze_emotional_patterns(self, muse_name, client_id=None):
         """
         Analyze conversation history to identify recurring emotional themes.
         
         Args:
             muse_name: Name of the muse (Salvatore Inverso)
+            client_id: The user's browser session client id, to include their mood trend
         
         Returns:
             Analysis of emotional patterns in Salvatore's distinctive style
         """
-        # Get conversation history
-        history = get_conversation_history(muse_name)
+        # Read the running theme counters instead of rescanning the history
+        stats = get_theme_statistics(muse_name)
         
-        if not history or len(history) < 3:
+        if stats["total_entries"] < 3:
             return "We haven't spoken enough yet for me to discern the patterns in your emotional tapestry. As our conversations continue to weave together, I'll be able to offer deeper insights."
         
-        # This would contain the actual emotional pattern analysis logic
-        # For now, we'll return a template that could be filled by an LLM
+        top_themes = sorted(stats["themes"].items(), key=lambda item: (-item[1], item[0]))[:3]
+        if not top_themes:
+            return "Our conversations have many threads, my dear, but none of the familiar emotional colors dominate the cloth yet. Tell me more of what stirs beneath the surface, and the pattern will reveal itself."
         
-        analysis_template = f"""
-[An analysis of emotional patterns based on conversation history, expressed in
-Salvatore Inverso's distinctive style. The analysis should identify recurring
-themes, note any evolution or transformation in these patterns, and offer
-insights using fashion and textile metaphors. It should be compassionate,
-perceptive, and offer a new perspective that invites deeper self-understanding.]
-"""
-        return analysis_template
+        trend = get_theme_trend(muse_name, days=7)
+        rising = [theme for theme, counts in trend.items() if counts["current"] > counts["previous"]]
+        fading = [theme for theme, counts in trend.items() if 0 == counts["current"] < counts["previous"]]
+        
+        analysis = f"Across our {stats['total_entries']} conversations, certain threads return again and again to the loom:\n\n"
+        for theme, mentions in top_themes:
+            analysis += f"- {theme.capitalize()}, woven through {mentions} of our exchanges\n"
+        
+        if rising:
+            analysis += f"\nThis week, {', '.join(rising)} grows more vivid in the fabric—a color you are reaching for more often."
+        if fading:
+            analysis += f"\nAnd {', '.join(fading)}, once prominent, has quietly receded from this season's collection."
+        
+        # The user's mood samples, summarized from their daily rollups
+        mood = analyze_mood(client_id) if client_id else None
+        if mood:
+            analysis += "\n\n" + self._describe_mood(mood)
+        
+        analysis += f"\n\nA pattern is not a verdict, my dear. It is a silhouette asking to be understood. What does your devotion to {top_themes[0][0]} protect in you?"
+        return analysis
+    
+    def _describe_mood(self, mood):
+        """Put a mood trend from the mood series into Salvatore's words."""
+        weekly = mood["slope_per_day"] * 7
+        if weekly > 0.1:
+            description = f"Your mood has been lifting, about {weekly:.1f} points a week, like a hem let down to its true length."
+        elif weekly < -0.1:
+            description = f"Your mood has been settling lower, about {-weekly:.1f} points a week. Even the finest silk creases under weight."
+        else:
+            description = f"Your mood has held steady around {mood['mean']:.1f}, an even weave."
+        
+        if mood["shifts"]:
+            shift = mood["shifts"][-1]
+            direction = "rose" if shift["after"] > shift["before"] else "fell"
+            description += (f" Around {format_timestamp(shift['timestamp'], '%B %d')}, it {direction} "
+                            f"from {shift['before']:.1f} to {shift['after']:.1f}. What changed in the fabric of those days?")
+        return description
     
     def generate_journal_prompt(self, theme=None):
         """
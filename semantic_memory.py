@@ -0,0 +1,432 @@
+"""
+Muse Summoner System - Semantic Memory Module
+
+This module provides offline semantic retrieval for muse memories.
+Text is embedded with the hashing trick plus a small concept lexicon, so related
+phrasings ("letting go", "release control") land near each other without any
+network calls, and each memory store keeps its vectors in a float32 matrix.
+"""
+
+import re
+import zlib
+import threading
+import numpy as np
+
+# Words that carry no meaning for recall and would otherwise match everything
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "if", "of", "to", "in", "on", "at", "for",
+    "with", "about", "from", "by", "as", "is", "are", "was", "were", "be", "been",
+    "i", "me", "my", "myself", "you", "your", "we", "our", "it", "its", "this", "that",
+    "what", "how", "do", "does", "did", "can", "could", "would", "should", "will",
+    "help", "please", "some", "so", "just", "am", "have", "has", "had", "like"
+}
+
+# Hand-built concept groups shared by the emotional themes the muses work with.
+# Every phrase is stemmed the same way as user text, so inflections still match.
+CONCEPT_LEXICON = {
+    "release": ["let go", "release", "surrender", "relinquish", "loosen", "unclench", "free", "detach"],
+    "control": ["control", "grip", "hold on", "perfectionism", "manage everything", "micromanage"],
+    "vulnerability": ["vulnerable", "vulnerability", "exposed", "open up", "hidden", "hide", "fragile"],
+    "connection": ["connection", "connect", "relationship", "belong", "intimacy", "friend", "partner", "family"],
+    "loss": ["loss", "lose", "lost", "grief", "grieve", "mourn", "heartbreak", "breakup", "goodbye"],
+    "transformation": ["transform", "change", "become", "evolve", "reinvent", "transition", "growth"],
+    "authenticity": ["authentic", "true self", "truth", "real", "mask", "pretend", "identity"],
+    "resilience": ["resilience", "resilient", "strength", "endure", "recover", "bounce back", "survive"],
+    "joy": ["joy", "happy", "happiness", "delight", "celebrate", "gratitude", "grateful"],
+    "fear": ["fear", "afraid", "anxious", "anxiety", "worry", "scared", "panic"],
+    "ritual": ["ritual", "mantra", "ceremony", "symbol", "practice"],
+    "writing": ["write", "poem", "letter", "essay", "journal", "story"]
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def _stem(token):
+    """Reduce a token to a crude stem so simple inflections share features."""
+    token = token.strip("'")
+    if len(token) > 4 and token.endswith("ss"):
+        return token
+    for suffix in ("ing", "ed", "es", "s", "ly"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            if token[-1] == token[-2]:
+                token = token[:-1]
+            break
+    if len(token) > 3 and token.endswith("e"):
+        token = token[:-1]
+    return token
+
+
+def _build_concept_tables():
+    """Index the concept lexicon by single stems and by multi-word stem phrases."""
+    single = {}
+    phrases = {}
+    for concept, terms in CONCEPT_LEXICON.items():
+        for term in terms:
+            stems = tuple(_stem(word) for word in TOKEN_PATTERN.findall(term.lower()))
+            if len(stems) == 1:
+                single.setdefault(stems[0], set()).add(concept)
+            elif stems:
+                phrases.setdefault(stems, set()).add(concept)
+    return single, phrases
+
+
+def _span(memories):
+    """
+    Identify a window of a memory store.
+    
+    Timestamps are unique and increasing, so the length and the first and last
+    timestamps pin down exactly which entries a window holds.
+    """
+    if not len(memories):
+        return 0, None, None
+    timestamps = getattr(memories, "timestamps", None)
+    if timestamps is not None:
+        return len(memories), int(timestamps[0]), int(timestamps[-1])
+    return len(memories), memories[0]["timestamp"], memories[-1]["timestamp"]
+
+
+class HashingEmbedder:
+    def __init__(self, dimensions=512, concept_weight=2.0):
+        """
+        Initialize the embedder.
+        
+        Args:
+            dimensions (int): Width of the embedding vectors
+            concept_weight (float): Weight of concept features relative to word features
+        """
+        self.dimensions = dimensions
+        self.concept_weight = concept_weight
+        self._single_concepts, self._phrase_concepts = _build_concept_tables()
+        self._max_phrase = max((len(p) for p in self._phrase_concepts), default=1)
+    
+    def features(self, text):
+        """
+        Extract weighted features from a piece of text.
+        
+        Args:
+            text (str): The text to analyze
+        
+        Returns:
+            dict: A mapping of feature name to weight
+        """
+        raw_tokens = TOKEN_PATTERN.findall(text.lower())
+        stems = [_stem(token) for token in raw_tokens]
+        features = {}
+        
+        # Concepts are matched before stopword removal so phrases like "hold on" survive
+        for i, stem in enumerate(stems):
+            for concept in self._single_concepts.get(stem, ()):
+                features["c:" + concept] = self.concept_weight
+            for length in range(2, self._max_phrase + 1):
+                phrase = tuple(stems[i:i + length])
+                for concept in self._phrase_concepts.get(phrase, ()):
+                    features["c:" + concept] = self.concept_weight
+        
+        content = [stem for token, stem in zip(raw_tokens, stems) if token not in STOPWORDS]
+        for stem in content:
+            features["w:" + stem] = features.get("w:" + stem, 0.0) + 1.0
+        for first, second in zip(content, content[1:]):
+            features["b:" + first + "_" + second] = 0.5
+        
+        return features
+    
+    def concepts(self, text):
+        """
+        Find the lexicon concepts mentioned in a piece of text.
+        
+        Args:
+            text (str): The text to analyze
+        
+        Returns:
+            set: The names of the matched concepts
+        """
+        return {feature[2:] for feature in self.features(text) if feature.startswith("c:")}
+    
+    def embed(self, text):
+        """
+        Embed a piece of text as an L2-normalized float32 vector.
+        
+        Args:
+            text (str): The text to embed
+        
+        Returns:
+            numpy.ndarray: A vector of shape (dimensions,)
+        """
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature, weight in self.features(text).items():
+            hashed = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if (hashed >> 31) & 1 else -1.0
+            vector[hashed % self.dimensions] += sign * weight
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+    
+    def embed_many(self, texts):
+        """
+        Embed several texts into a float32 matrix.
+        
+        Args:
+            texts (list): The texts to embed
+        
+        Returns:
+            numpy.ndarray: A matrix of shape (len(texts), dimensions)
+        """
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            matrix[row] = self.embed(text)
+        return matrix
+
+
+class VectorIndex:
+    def __init__(self, dimensions, ivf_threshold=2048, ivf_lists=32, ivf_probes=4):
+        """
+        Initialize an append-only vector index for one memory store.
+        
+        Rows are kept in a growable float32 buffer. Dropping the oldest rows only
+        moves a start offset, and the buffer is compacted once half of it is dead.
+        
+        Args:
+            dimensions (int): Width of the stored vectors
+            ivf_threshold (int): Row count above which a partitioned (IVF) index is built
+            ivf_lists (int): Number of partitions in the IVF index
+            ivf_probes (int): Number of partitions scanned per query
+        """
+        self.dimensions = dimensions
+        self.ivf_threshold = ivf_threshold
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self._buffer = np.zeros((16, dimensions), dtype=np.float32)
+        self._start = 0
+        self._end = 0
+        self.centroids = None
+        self._assignments = np.zeros(16, dtype=np.int32)
+        self._rows_since_training = 0
+    
+    @property
+    def size(self):
+        """Number of live rows in the index."""
+        return self._end - self._start
+    
+    @property
+    def vectors(self):
+        """View of the live rows, oldest first."""
+        return self._buffer[self._start:self._end]
+    
+    def append(self, vectors):
+        """
+        Append one or more vectors to the index.
+        
+        Args:
+            vectors (numpy.ndarray): A vector or a matrix of vectors
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        needed = self._end + len(vectors)
+        if needed > len(self._buffer):
+            self._grow(needed)
+        
+        self._buffer[self._end:needed] = vectors
+        if self.centroids is not None:
+            self._assignments[self._end:needed] = np.argmax(vectors @ self.centroids.T, axis=1)
+            self._rows_since_training += len(vectors)
+        self._end = needed
+        
+        # Partition once the store gets large, and retrain when it has doubled since
+        if self.size > self.ivf_threshold and (
+                self.centroids is None or self._rows_since_training > self.size):
+            self._train_partitions()
+    
+    def drop_oldest(self, count):
+        """
+        Remove the oldest rows from the index.
+        
+        Args:
+            count (int): The number of rows to remove
+        """
+        self._start = min(self._end, self._start + max(count, 0))
+        if self._start > len(self._buffer) // 2:
+            self._compact(len(self._buffer))
+        if self.size <= self.ivf_threshold:
+            self.centroids = None
+    
+    def search(self, query, k):
+        """
+        Find the rows most similar to a query vector.
+        
+        Args:
+            query (numpy.ndarray): An L2-normalized query vector
+            k (int): Maximum number of results
+        
+        Returns:
+            list: (position, score) tuples, best first, positions relative to the oldest live row
+        """
+        if self.size == 0 or k <= 0:
+            return []
+        
+        if self.centroids is not None:
+            probes = min(self.ivf_probes, len(self.centroids))
+            nearest = np.argpartition(-(self.centroids @ query), probes - 1)[:probes]
+            candidates = np.flatnonzero(np.isin(self._assignments[self._start:self._end], nearest))
+            if len(candidates) == 0:
+                return []
+            scores = self.vectors[candidates] @ query
+        else:
+            candidates = None
+            scores = self.vectors @ query
+        
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        positions = top if candidates is None else candidates[top]
+        return [(int(position), float(scores[i])) for position, i in zip(positions, top)]
+    
+    def _grow(self, needed):
+        """Compact live rows into a buffer with room to double."""
+        self._compact(max(16, 2 * (needed - self._start)))
+    
+    def _compact(self, capacity):
+        """Move the live rows to the front of a buffer of the given capacity."""
+        size = self.size
+        buffer = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        buffer[:size] = self.vectors
+        assignments = np.zeros(capacity, dtype=np.int32)
+        assignments[:size] = self._assignments[self._start:self._end]
+        self._buffer, self._assignments = buffer, assignments
+        self._start, self._end = 0, size
+    
+    def _train_partitions(self, iterations=8):
+        """Cluster the live rows with spherical k-means to build the IVF partitions."""
+        vectors = self.vectors
+        lists = min(self.ivf_lists, self.size)
+        rng = np.random.default_rng(0)
+        centroids = vectors[rng.choice(self.size, lists, replace=False)].copy()
+        
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for cluster in range(lists):
+                members = vectors[assignments == cluster]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[cluster] = centroid / norm if norm > 0 else centroid
+        
+        self.centroids = centroids
+        self._assignments[self._start:self._end] = np.argmax(vectors @ centroids.T, axis=1)
+        self._rows_since_training = 0
+
+
+class SemanticMemoryIndex:
+    def __init__(self, dimensions=512, ivf_threshold=2048, ivf_lists=32, ivf_probes=4):
+        """
+        Initialize the semantic index with one vector index per memory store.
+        
+        Vectors are derived deterministically from stored text, so an index is
+        rebuilt from the memory file on first use rather than persisted separately.
+        Each index records the span of entries it was built from, and is only
+        used for or extended from memories with exactly that span.
+        
+        Args:
+            dimensions (int): Width of the embedding vectors
+            ivf_threshold (int): Row count above which a store is partitioned
+            ivf_lists (int): Number of partitions per store
+            ivf_probes (int): Number of partitions scanned per query
+        """
+        self.embedder = HashingEmbedder(dimensions)
+        self.ivf_threshold = ivf_threshold
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self.indexes = {}
+        self.spans = {}  # key -> span of the memories the index holds
+        self.lock = threading.Lock()
+    
+    def _new_index(self):
+        """Create an empty vector index with the configured settings."""
+        return VectorIndex(self.embedder.dimensions, self.ivf_threshold, self.ivf_lists, self.ivf_probes)
+    
+    def ensure(self, key, memories):
+        """
+        Make sure the index for a store matches its memory list, rebuilding if needed.
+        
+        Args:
+            key (str): The memory store key
+            memories (list): The memory entries of the store
+        """
+        with self.lock:
+            return self._ensure(key, memories)
+    
+    def _ensure(self, key, memories):
+        """Return the index for a store, rebuilt unless it holds exactly these memories."""
+        span = _span(memories)
+        index = self.indexes.get(key)
+        if index is not None and self.spans.get(key) == span:
+            return index
+        
+        index = self._new_index()
+        if memories:
+            index.append(self.embedder.embed_many([memory["user_input"] for memory in memories]))
+        self.indexes[key] = index
+        self.spans[key] = span
+        return index
+    
+    def append(self, key, previous, memories):
+        """
+        Extend the index with a newly saved memory, dropping trimmed entries first.
+        
+        The index is only extended if it holds exactly the memories the new entry
+        was added to; otherwise another writer got in between, and the index is
+        dropped to be rebuilt from the saved memories on next use.
+        
+        Args:
+            key (str): The memory store key
+            previous (list): The memory entries the new entry was added to
+            memories (list): The saved memory entries, newest last
+        """
+        with self.lock:
+            index = self.indexes.get(key)
+            if index is None:
+                return
+            if self.spans.get(key) != _span(previous):
+                self._discard(key)
+                return
+            
+            index.drop_oldest(len(previous) + 1 - len(memories))
+            index.append(self.embedder.embed(memories[-1]["user_input"]))
+            self.spans[key] = _span(memories)
+    
+    def search(self, key, memories, query_text, max_results=3, threshold=0.1):
+        """
+        Find the memories most semantically similar to the query text.
+        
+        Args:
+            key (str): The memory store key
+            memories (list): The memory entries of the store
+            query_text (str): The text to match against
+            max_results (int): Maximum number of memories to return
+            threshold (float): Minimum cosine similarity for a match
+        
+        Returns:
+            list: The matching memory entries, most relevant first
+        """
+        if not memories:
+            return []
+        
+        query = self.embedder.embed(query_text)
+        with self.lock:
+            matches = self._ensure(key, memories).search(query, max_results)
+        return [memories[position] for position, score in matches if score > threshold]
+    
+    def discard(self, key):
+        """
+        Forget the index for a memory store.
+        
+        Args:
+            key (str): The memory store key
+        """
+        with self.lock:
+            self._discard(key)
+    
+    def _discard(self, key):
+        """Forget the index for a memory store; the caller holds the lock."""
+        self.indexes.pop(key, None)
+        self.spans.pop(key, None)
@@ -18,6 +18,16 @@ document.addEventListener('DOMContentLoaded', function() {
     let isCreatingMuse = false;
     let currentMuseName = 'System';
 
+    // Persistent chat channel; null while disconnected, in which case HTTP is used
+    let chatSocket = null;
+    let socketRetryDelay = 1000;
+    let socketEverOpened = false;
+    let socketFailures = 0;
+
+    // Local history cache; null when IndexedDB is unavailable
+    let historyDb = null;
+    const HISTORY_RENDER_LIMIT = 20;
+
     // Initialize the application
     init();
 
@@ -43,10 +53,189 @@ document.addEventListener('DOMContentLoaded', function() {
         // Load available muses
         fetchMuses();
         
+        // Open the persistent chat channel
+        connectChatSocket();
+        
+        // Show cached history right away, then fetch only what is new
+        openHistoryCache()
+            .then(renderCachedHistory)
+            .then(() => syncHistory(true))
+            .catch(error => console.error('Error loading history cache:', error));
+        
         // Focus on input field
         userInput.focus();
     }
 
+    function connectChatSocket() {
+        if (!('WebSocket' in window)) {
+            return;
+        }
+        
+        const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const socket = new WebSocket(`${scheme}://${window.location.host}/ws/chat`);
+        
+        socket.onopen = function() {
+            chatSocket = socket;
+            socketEverOpened = true;
+            socketRetryDelay = 1000;
+        };
+        
+        socket.onmessage = function(message) {
+            const event = JSON.parse(message.data);
+            if (event.type === 'ping') {
+                socket.send(JSON.stringify({ type: 'pong' }));
+            } else if (event.type === 'creation') {
+                handleCreationEvent(event);
+            } else if (event.type === 'error') {
+                handleStreamEvent({ type: 'message', muse_name: 'System', text: event.retry_after ?
+                    `You're sending messages faster than the muses can listen. Please wait ${Math.ceil(event.retry_after)} second(s) and try again.` :
+                    event.error });
+            } else {
+                handleStreamEvent(event);
+            }
+        };
+        
+        socket.onclose = function() {
+            chatSocket = null;
+            
+            // A server without the channel never accepts the socket; stay on HTTP after a few tries
+            if (!socketEverOpened && ++socketFailures >= 3) {
+                return;
+            }
+            setTimeout(connectChatSocket, socketRetryDelay);
+            socketRetryDelay = Math.min(socketRetryDelay * 2, 30000);
+        };
+    }
+
+    function sendOverSocket(event) {
+        // Returns false when the channel is down, so the caller can use HTTP instead
+        if (!chatSocket || chatSocket.readyState !== WebSocket.OPEN) {
+            return false;
+        }
+        chatSocket.send(JSON.stringify(event));
+        return true;
+    }
+
+    function openHistoryCache() {
+        return new Promise((resolve, reject) => {
+            if (!('indexedDB' in window)) {
+                resolve(null);
+                return;
+            }
+            
+            const request = indexedDB.open('muse-summoner', 2);
+            request.onupgradeneeded = function() {
+                const db = request.result;
+                // Version 1 cached ISO string timestamps; start over with epoch milliseconds
+                Array.from(db.objectStoreNames).forEach(name => db.deleteObjectStore(name));
+                const history = db.createObjectStore('history', { keyPath: ['muse', 'timestamp'] });
+                history.createIndex('muse', 'muse');
+                db.createObjectStore('cursors', { keyPath: 'muse' });
+            };
+            request.onsuccess = function() {
+                historyDb = request.result;
+                resolve(historyDb);
+            };
+            request.onerror = function() {
+                reject(request.error);
+            };
+        });
+    }
+
+    function historyTransaction(stores, mode, work) {
+        // Run work(transaction) and resolve with its result once the transaction completes
+        return new Promise((resolve, reject) => {
+            const transaction = historyDb.transaction(stores, mode);
+            let result;
+            transaction.oncomplete = () => resolve(result);
+            transaction.onerror = () => reject(transaction.error);
+            work(transaction, value => { result = value; });
+        });
+    }
+
+    function getCachedHistory(museName) {
+        return historyTransaction(['history'], 'readonly', (transaction, done) => {
+            const request = transaction.objectStore('history').index('muse').getAll(museName);
+            request.onsuccess = () => done(request.result.sort((a, b) => a.timestamp - b.timestamp));
+        });
+    }
+
+    function getHistoryCursor(museName) {
+        return historyTransaction(['cursors'], 'readonly', (transaction, done) => {
+            const request = transaction.objectStore('cursors').get(museName);
+            request.onsuccess = () => done(request.result ? request.result.cursor : null);
+        });
+    }
+
+    function applyHistoryDelta(data) {
+        // Store new entries, drop ones the server no longer keeps, and advance the cursor
+        return historyTransaction(['history', 'cursors'], 'readwrite', (transaction) => {
+            const history = transaction.objectStore('history');
+            const oldest = data.oldest;
+            const range = IDBKeyRange.bound([data.muse_name, -Infinity], [data.muse_name, oldest || Infinity], false, true);
+            history.delete(range);
+            
+            data.entries.forEach(entry => history.put(Object.assign({ muse: data.muse_name }, entry)));
+            transaction.objectStore('cursors').put({ muse: data.muse_name, cursor: oldest ? data.cursor : null });
+        });
+    }
+
+    function renderCachedHistory() {
+        const museName = localStorage.getItem('lastMuse');
+        if (!historyDb || !museName) {
+            return;
+        }
+        
+        return getCachedHistory(museName).then(entries => {
+            renderHistoryEntries(museName, entries.slice(-HISTORY_RENDER_LIMIT));
+        });
+    }
+
+    function renderHistoryEntries(museName, entries) {
+        entries.forEach(entry => {
+            addUserMessage(entry.user_input);
+            addMuseMessage(entry.muse_response, museName);
+        });
+    }
+
+    function syncHistory(render) {
+        // Fetch entries newer than the cached cursor for the active muse, following has_more
+        if (!historyDb) {
+            return Promise.resolve();
+        }
+        
+        const museName = currentMuseName !== 'System' ? currentMuseName : localStorage.getItem('lastMuse');
+        const cursorPromise = museName ? getHistoryCursor(museName) : Promise.resolve(null);
+        
+        return cursorPromise.then(cursor => {
+            const params = new URLSearchParams();
+            if (museName) {
+                params.set('muse', museName);
+            }
+            if (cursor) {
+                params.set('after', cursor);
+            }
+            
+            return fetch(`/api/sync_history?${params}`)
+                .then(response => response.ok ? response.json() : null)
+                .then(data => {
+                    if (!data || !data.muse_name) {
+                        return;
+                    }
+                    
+                    localStorage.setItem('lastMuse', data.muse_name);
+                    return applyHistoryDelta(data).then(() => {
+                        if (render) {
+                            renderHistoryEntries(data.muse_name, data.entries.slice(-HISTORY_RENDER_LIMIT));
+                        }
+                        if (data.has_more) {
+                            return syncHistory(render);
+                        }
+                    });
+                });
+        });
+    }
+
     function fetchMuses() {
         fetch('/api/get_muses')
             .then(response => response.json())
@@ -117,34 +306,29 @@ document.addEventListener('DOMContentLoaded', function() {
         statusBadge.textContent = 'Processing...';
         statusBadge.className = 'badge bg-warning';
         
-        // Send message to server
-        fetch('/api/process_input', {
+        // Send over the open chat channel when there is one
+        if (sendOverSocket({ type: 'message', user_input: message })) {
+            return;
+        }
+        
+        // Otherwise send message to server and stream the reply
+        fetch('/api/process_input_stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({ user_input: message }),
         })
-        .then(response => response.json())
-        .then(data => {
-            // Add response to conversation
-            if (data.muse_name && data.muse_name !== 'System') {
-                addMuseMessage(data.response, data.muse_name);
-                currentMuseName = data.muse_name;
-                activeMuse.textContent = data.muse_name;
-                statusBadge.textContent = 'Active';
-                statusBadge.className = 'badge bg-success';
-            } else {
-                addSystemMessage(data.response);
-                currentMuseName = 'System';
-                activeMuse.textContent = 'Muse Summoner System';
-                statusBadge.textContent = 'Idle';
-                statusBadge.className = 'badge bg-secondary';
+        .then(response => {
+            // Turn rate limiting rejections into a readable system message
+            if (response.status === 429) {
+                const retryAfter = response.headers.get('Retry-After') || '1';
+                handleStreamEvent({ type: 'message', muse_name: 'System', text: `You're sending messages faster than the muses can listen. Please wait ${retryAfter} second(s) and try again.` });
+                return;
             }
-            
-            // Scroll to bottom of conversation
-            conversation.scrollTop = conversation.scrollHeight;
-            
+            return readEventStream(response, handleStreamEvent);
+        })
+        .then(() => {
             // Focus on input field
             userInput.focus();
         })
@@ -168,6 +352,86 @@ document.addEventListener('DOMContentLoaded', function() {
         conversation.scrollTop = conversation.scrollHeight;
     }
 
+    // The muse message currently being streamed and its text so far
+    let streamingMessage = null;
+    let streamingText = '';
+
+    function readEventStream(response, onEvent) {
+        // Parse newline-delimited JSON events as they arrive
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        function pump() {
+            return reader.read().then(({ done, value }) => {
+                buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+                const lines = buffer.split('\n');
+                buffer = done ? '' : lines.pop();
+                lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)));
+                if (!done) {
+                    return pump();
+                }
+            });
+        }
+        return pump();
+    }
+
+    function handleStreamEvent(event) {
+        if (event.type === 'status') {
+            // The active muse after any command or trigger in the message
+            if (event.active_muse) {
+                currentMuseName = event.active_muse;
+                activeMuse.textContent = event.active_muse;
+            } else {
+                currentMuseName = 'System';
+                activeMuse.textContent = 'Muse Summoner System';
+            }
+        } else if (event.type === 'greeting') {
+            // Show the greeting right away; the rest of the reply follows
+            streamingText = event.text;
+            streamingMessage = addMuseMessage(streamingText, event.muse_name);
+            currentMuseName = event.muse_name;
+            activeMuse.textContent = event.muse_name;
+            statusBadge.textContent = 'Responding...';
+            statusBadge.className = 'badge bg-info';
+        } else if (event.type === 'response' && streamingMessage) {
+            streamingText += event.text;
+            streamingMessage.querySelector('p').innerHTML = formatMessage(streamingText);
+        } else if (event.type === 'council') {
+            // Each council member answers in its own message as soon as it finishes
+            addMuseMessage(`${event.muse_name}:\n${event.text}`, event.muse_name);
+            statusBadge.textContent = 'Council...';
+            statusBadge.className = 'badge bg-info';
+        } else if (event.type === 'done') {
+            streamingMessage = null;
+            
+            // The reply is already on screen; just bring the cache up to date
+            syncHistory(false).catch(error => console.error('Error syncing history:', error));
+            if (event.muse_name === 'Council') {
+                // Council mode leaves the active muse unchanged
+                statusBadge.textContent = currentMuseName === 'System' ? 'Idle' : 'Active';
+                statusBadge.className = currentMuseName === 'System' ? 'badge bg-secondary' : 'badge bg-success';
+            } else {
+                statusBadge.textContent = 'Active';
+                statusBadge.className = 'badge bg-success';
+            }
+        } else if (event.type === 'message') {
+            addSystemMessage(event.text);
+            currentMuseName = 'System';
+            activeMuse.textContent = 'Muse Summoner System';
+            statusBadge.textContent = 'Idle';
+            statusBadge.className = 'badge bg-secondary';
+        }
+        
+        // Scroll to bottom of conversation
+        conversation.scrollTop = conversation.scrollHeight;
+        
+        // Focus on input field once the reply is complete
+        if (event.type === 'done' || event.type === 'message') {
+            userInput.focus();
+        }
+    }
+
     function addMuseMessage(message, museName) {
         const messageDiv = document.createElement('div');
         messageDiv.className = 'message muse';
@@ -178,6 +442,7 @@ document.addEventListener('DOMContentLoaded', function() {
         `;
         conversation.appendChild(messageDiv);
         conversation.scrollTop = conversation.scrollHeight;
+        return messageDiv;
     }
 
     function addSystemMessage(message) {
@@ -243,30 +508,20 @@ document.addEventListener('DOMContentLoaded', function() {
         statusBadge.className = 'badge bg-info';
         
         // Send request to start creation process
-        fetch('/api/create_muse', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ user_input: 'start' }),
-        })
-        .then(response => response.json())
-        .then(data => {
-            creationPrompt.innerHTML = data.prompt;
-            isCreatingMuse = data.creating;
-            creationInput.focus();
-        })
-        .catch(error => {
-            console.error('Error:', error);
-            addSystemMessage('Error starting muse creation. Please try again.');
-            creationPanel.style.display = 'none';
-            statusBadge.textContent = 'Error';
-            statusBadge.className = 'badge bg-danger';
-        });
+        sendCreationInput('start', 'Error starting muse creation. Please try again.');
     }
 
     function processCreationInput(input) {
         // Send creation input to server
+        sendCreationInput(input, 'Error processing muse creation. Please try again.');
+    }
+
+    function sendCreationInput(input, errorMessage) {
+        // Use the open chat channel when there is one
+        if (sendOverSocket({ type: 'create', user_input: input })) {
+            return;
+        }
+        
         fetch('/api/create_muse', {
             method: 'POST',
             headers: {
@@ -275,29 +530,10 @@ document.addEventListener('DOMContentLoaded', function() {
             body: JSON.stringify({ user_input: input }),
         })
         .then(response => response.json())
-        .then(data => {
-            creationPrompt.innerHTML = data.prompt;
-            isCreatingMuse = data.creating;
-            
-            // Clear input field
-            creationInput.value = '';
-            
-            // If creation is complete, hide panel and update conversation
-            if (!data.creating) {
-                addSystemMessage(data.prompt);
-                creationPanel.style.display = 'none';
-                statusBadge.textContent = 'Idle';
-                statusBadge.className = 'badge bg-secondary';
-                
-                // Refresh muse list
-                fetchMuses();
-            }
-            
-            creationInput.focus();
-        })
+        .then(handleCreationEvent)
         .catch(error => {
             console.error('Error:', error);
-            addSystemMessage('Error processing muse creation. Please try again.');
+            addSystemMessage(errorMessage);
             isCreatingMuse = false;
             creationPanel.style.display = 'none';
             statusBadge.textContent = 'Error';
@@ -305,6 +541,29 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    function handleCreationEvent(data) {
+        creationPrompt.innerHTML = data.prompt;
+        isCreatingMuse = data.creating;
+        
+        // Clear input field
+        creationInput.value = '';
+        
+        // If creation is complete, hide panel and update conversation
+        if (!data.creating) {
+            addSystemMessage(data.prompt);
+            creationPanel.style.display = 'none';
+            statusBadge.textContent = 'Idle';
+            statusBadge.className = 'badge bg-secondary';
+            
+            // Refresh muse list
+            fetchMuses();
+        } else if (data.total_steps) {
+            statusBadge.textContent = `Creating Muse (${data.step + 1}/${data.total_steps})`;
+        }
+        
+        creationInput.focus();
+    }
+
     function submitCreationInput() {
         const input = creationInput.value.trim();
         
@@ -0,0 +1,13 @@
+"""
+Shared setup for the Muse Summoner tests.
+
+The modules keep their data files relative to the working directory, so the
+tests run from a scratch directory instead of the project root.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp(prefix="muse-summoner-tests-"))
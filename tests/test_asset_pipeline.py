@@ -0,0 +1,76 @@
+"""
+Tests for the static asset minifiers and build: template literals and
+selector whitespace survive minification, and built names follow content.
+"""
+
+import os
+import tempfile
+import unittest
+
+from asset_pipeline import AssetPipeline, minify_css, minify_js
+
+
+class MinifyCssTest(unittest.TestCase):
+    def test_declarations_and_comments_are_compacted(self):
+        source = "/* header */\n.a > .b ,\n.c {\n    color : red ;\n    margin: 0;\n}\n"
+        self.assertEqual(minify_css(source), ".a>.b,.c{color:red;margin:0}")
+    
+    def test_descendant_pseudo_class_keeps_its_space(self):
+        self.assertEqual(minify_css(".a :hover { color: red; }"), ".a :hover{color:red}")
+        self.assertEqual(minify_css(".a:hover { color: red; }"), ".a:hover{color:red}")
+    
+    def test_selectors_inside_at_rules(self):
+        source = "@media (max-width: 600px) {\n    .list :first-child { margin: 0; }\n}\n"
+        self.assertEqual(minify_css(source), "@media (max-width:600px){.list :first-child{margin:0}}")
+
+
+class MinifyJsTest(unittest.TestCase):
+    def test_indentation_and_line_comments_are_removed(self):
+        source = "function f() {\n    // explain\n\n    return 1;\n}\n"
+        self.assertEqual(minify_js(source), "function f() {\nreturn 1;\n}\n")
+    
+    def test_template_literal_lines_are_kept_verbatim(self):
+        source = (
+            "function card(name) {\n"
+            "    return `\n"
+            "        <div class=\"card\">\n"
+            "\n"
+            "            // not a comment\n"
+            "            ${name}   \n"
+            "        </div>`;\n"
+            "}\n"
+        )
+        expected = (
+            "function card(name) {\n"
+            "return `\n"
+            "        <div class=\"card\">\n"
+            "\n"
+            "            // not a comment\n"
+            "            ${name}   \n"
+            "        </div>`;\n"
+            "}\n"
+        )
+        self.assertEqual(minify_js(source), expected)
+    
+    def test_backticks_in_strings_and_comments_do_not_open_templates(self):
+        source = "    const a = 'it`s';\n    const b = \"`\"; // a ` here\n        indented();\n"
+        self.assertEqual(minify_js(source), "const a = 'it`s';\nconst b = \"`\"; // a ` here\nindented();\n")
+
+
+class AssetPipelineTest(unittest.TestCase):
+    def test_built_names_follow_content(self):
+        with tempfile.TemporaryDirectory() as directory:
+            static_dir = os.path.join(directory, "static")
+            dist_dir = os.path.join(static_dir, "dist")
+            os.makedirs(static_dir)
+            with open(os.path.join(static_dir, "site.css"), "w") as f:
+                f.write(".a :hover { color: red; }\n")
+            
+            pipeline = AssetPipeline(static_dir, dist_dir, os.path.join(dist_dir, "manifest.json"))
+            first = pipeline.build()["site.css"]
+            with open(os.path.join(dist_dir, first)) as f:
+                self.assertEqual(f.read(), ".a :hover{color:red}")
+            
+            with open(os.path.join(static_dir, "site.css"), "w") as f:
+                f.write(".a :hover { color: blue; }\n")
+            self.assertNotEqual(pipeline.build()["site.css"], first)
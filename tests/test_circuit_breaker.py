@@ -0,0 +1,67 @@
+"""
+Tests for the generation circuit breaker's state transitions.
+"""
+
+import unittest
+from unittest import mock
+
+from text_generation import CircuitBreaker
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patch = mock.patch("text_generation.time.monotonic", lambda: self.now)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30.0)
+    
+    def trip(self):
+        """Fail enough calls to open the circuit."""
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record_failure()
+    
+    def test_opens_at_the_failure_threshold(self):
+        self.trip()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+    
+    def test_success_while_closed_resets_the_failure_count(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.failures, 1)
+    
+    def test_late_success_does_not_close_an_open_circuit(self):
+        self.trip()
+        
+        # A slow call admitted before the circuit opened finishes now
+        self.breaker.record_success()
+        
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+    
+    def test_one_probe_after_the_reset_timeout(self):
+        self.trip()
+        self.now += 30.0
+        
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+    
+    def test_failed_probe_reopens_the_circuit(self):
+        self.trip()
+        self.now += 30.0
+        self.assertTrue(self.breaker.allow_request())
+        
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.get_state()["retry_in"], 30.0)
+        self.assertEqual(self.breaker.get_state()["times_opened"], 2)
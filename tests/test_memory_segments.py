@@ -0,0 +1,148 @@
+"""
+Tests for binary memory segments: the file round-trip, reads by position and
+timestamp, MuseMemory reading segments in place, and storage conversion.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from file_locks import file_lock
+from memory_segments import MemorySegmentReader, convert_storage, read_segment, write_segment
+from memory_system import MuseMemory
+
+
+def make_entries(count, start=1000):
+    """Build memory entries with increasing timestamps, ten apart."""
+    return [
+        {"timestamp": start + 10 * i, "user_input": f"question {i}", "muse_response": f"answer {i} ✨"}
+        for i in range(count)
+    ]
+
+
+class MemorySegmentTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "eve_memory.seg")
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_round_trip(self):
+        entries = make_entries(25)
+        write_segment(self.path, entries)
+        self.assertEqual(read_segment(self.path), entries)
+        
+        write_segment(self.path, [])
+        self.assertEqual(read_segment(self.path), [])
+    
+    def test_positional_reads_and_tail(self):
+        entries = make_entries(10)
+        write_segment(self.path, entries)
+        with MemorySegmentReader(self.path) as segment:
+            self.assertEqual(len(segment), 10)
+            self.assertEqual(segment[-1], entries[-1])
+            self.assertEqual(segment[2:5], entries[2:5])
+            self.assertEqual(segment.tail(3), entries[-3:])
+            self.assertEqual(segment.tail(50), entries)
+            with self.assertRaises(IndexError):
+                segment[10]
+    
+    def test_find_by_timestamp(self):
+        entries = make_entries(10)
+        write_segment(self.path, entries)
+        with MemorySegmentReader(self.path) as segment:
+            self.assertEqual(segment.find(1000), entries[0])
+            self.assertEqual(segment.find(1070), entries[7])
+            self.assertIsNone(segment.find(1075))
+            self.assertIsNone(segment.find(5000))
+    
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a segment at all")
+        with self.assertRaises(ValueError):
+            MemorySegmentReader(self.path)
+
+
+class SegmentMemoryReadTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.entries = make_entries(20)
+        write_segment(os.path.join(self.directory.name, "eve_memory.seg"), self.entries)
+        with mock.patch("memory_system.get_config", self.config({"memory_format": "binary"})):
+            self.memory = MuseMemory(self.directory.name)
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def config(self, overrides):
+        """Wrap get_config so some keys read test values."""
+        from config import get_config
+        return lambda key=None, default=None: overrides[key] if key in overrides else get_config(key, default)
+    
+    def test_reads_use_the_segment_in_place(self):
+        # Nothing is cached, so none of these reads should load the whole file
+        with mock.patch.object(self.memory, "_load_memories", side_effect=AssertionError("loaded in full")):
+            self.assertEqual(self.memory.get_memories("Eve", 3), self.entries[-3:])
+            self.assertEqual(self.memory.get_memory("Eve", 1050), self.entries[5])
+            self.assertIsNone(self.memory.get_memory("Eve", 1055))
+            self.assertEqual(self.memory.get_memory_range("Eve", after=1020, before=1060), self.entries[3:6])
+            self.assertEqual(self.memory.get_memory_range("Eve", before=1100, limit=2), self.entries[8:10])
+            
+            entries, oldest, more = self.memory.get_memory_delta("Eve", after=1150, limit=3)
+            self.assertEqual(entries, self.entries[16:19])
+            self.assertEqual(oldest, 1000)
+            self.assertTrue(more)
+    
+    def test_cached_reads_match_segment_reads(self):
+        self.memory._load_memories("Eve")
+        self.assertEqual(self.memory.get_memories("Eve", 3), self.entries[-3:])
+        self.assertEqual(self.memory.get_memory("Eve", 1050), self.entries[5])
+        self.assertIsNone(self.memory.get_memory("Eve", 1055))
+        self.assertEqual(self.memory.get_memory_range("Eve", after=1020, before=1060), self.entries[3:6])
+
+
+class ConvertStorageTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_converts_both_ways(self):
+        entries = make_entries(5)
+        json_path = os.path.join(self.directory.name, "eve_memory.json")
+        segment_path = os.path.join(self.directory.name, "eve_memory.seg")
+        with open(json_path, "w") as f:
+            json.dump(entries, f)
+        
+        self.assertEqual(convert_storage(self.directory.name, to_binary=True), 1)
+        self.assertFalse(os.path.exists(json_path))
+        self.assertEqual(read_segment(segment_path), entries)
+        
+        self.assertEqual(convert_storage(self.directory.name, to_binary=False), 1)
+        self.assertFalse(os.path.exists(segment_path))
+        with open(json_path) as f:
+            self.assertEqual(json.load(f), entries)
+    
+    def test_conversion_holds_the_muse_lock(self):
+        with open(os.path.join(self.directory.name, "eve_memory.json"), "w") as f:
+            json.dump(make_entries(2), f)
+        memory = MuseMemory(self.directory.name)
+        
+        # The lock must be the one MuseMemory takes for saves, or a save could be lost in the conversion
+        with mock.patch("memory_segments.file_lock", wraps=file_lock) as lock:
+            convert_storage(self.directory.name, to_binary=True)
+        self.assertEqual(
+            [os.path.abspath(call.args[0]) for call in lock.call_args_list],
+            [os.path.abspath(memory._lock_path("eve"))]
+        )
+    
+    def test_a_bad_file_is_left_in_place(self):
+        path = os.path.join(self.directory.name, "eve_memory.json")
+        with open(path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(convert_storage(self.directory.name, to_binary=True), 0)
+        self.assertTrue(os.path.exists(path))
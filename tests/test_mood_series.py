@@ -0,0 +1,82 @@
+"""
+Tests for mood ingestion and trend analysis: per-record validation, future
+timestamps, per-user storage and windowed trends.
+"""
+
+import tempfile
+import unittest
+
+import numpy as np
+
+from mood_series import MoodSeries, find_shifts
+from timestamps import now_timestamp, MILLISECONDS_PER_DAY
+
+
+class MoodSeriesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.series = MoodSeries(self.directory.name)
+        self.now = now_timestamp()
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def daily_records(self, days, mood=6):
+        """Build one record per day for the days before now."""
+        return [{"timestamp": self.now - day * MILLISECONDS_PER_DAY, "mood": mood} for day in range(days, 0, -1)]
+    
+    def test_invalid_records_are_reported_individually(self):
+        records = self.daily_records(3) + [
+            {"timestamp": float("inf"), "mood": 5},
+            {"timestamp": -5, "mood": 5},
+            {"timestamp": 1e30, "mood": 5},
+            {"timestamp": self.now + 365 * MILLISECONDS_PER_DAY, "mood": 5},
+            {"mood": 42},
+            ValueError("Expecting value")
+        ] + self.daily_records(2)
+        
+        result = self.series.ingest_records("client", records)
+        
+        self.assertEqual(result["ingested"], 5)
+        self.assertEqual([error["record"] for error in result["errors"]], [4, 5, 6, 7, 8, 9])
+        self.assertEqual(self.series.get_series("client", resolution="day")[1]["counts"].sum(), 5)
+    
+    def test_future_samples_do_not_move_the_window(self):
+        self.series.ingest_records("client", self.daily_records(30))
+        
+        with self.assertRaises(ValueError):
+            self.series.ingest("client", [(self.now + 3 * 365 * MILLISECONDS_PER_DAY, 5.0)])
+        
+        _, series = self.series.get_series("client", self.now - 40 * MILLISECONDS_PER_DAY, resolution="day")
+        self.assertEqual(len(series["timestamps"]), 30)
+        self.assertIsNotNone(self.series.analyze("client", days=40, now=self.now))
+    
+    def test_users_are_stored_separately(self):
+        self.series.ingest_records("first", self.daily_records(10, mood=8))
+        self.series.ingest_records("second", self.daily_records(10, mood=2))
+        
+        self.assertEqual(self.series.analyze("first", now=self.now)["mean"], 8)
+        self.assertEqual(self.series.analyze("second", now=self.now)["mean"], 2)
+        self.assertIsNone(self.series.analyze("third", now=self.now))
+    
+    def test_analysis_covers_the_requested_window(self):
+        self.series.ingest_records("client", self.daily_records(60, mood=3)[:30] + self.daily_records(30, mood=7))
+        
+        recent = self.series.analyze("client", days=20, now=self.now)
+        self.assertEqual(recent["mean"], 7)
+        self.assertEqual(recent["shifts"], [])
+        
+        whole = self.series.analyze("client", days=90, now=self.now)
+        self.assertEqual([(shift["before"], shift["after"]) for shift in whole["shifts"]], [(3.0, 7.0)])
+    
+    def test_find_shifts_ignores_noise(self):
+        rng = np.random.default_rng(1)
+        values = 6 + rng.normal(0, 0.5, 120)
+        self.assertEqual(find_shifts(values, np.ones(120)), [])
+        
+        values[40:80] -= 2
+        self.assertEqual([position for position, _, _ in find_shifts(values, np.ones(120))], [40, 80])
+
+
+if __name__ == "__main__":
+    unittest.main()
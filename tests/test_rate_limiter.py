@@ -0,0 +1,106 @@
+"""
+Tests for admission control: which token buckets a request is charged to,
+all-or-none consumption, and concurrency slots held by streamed responses.
+"""
+
+import unittest
+from unittest import mock
+
+from flask import Flask, Response
+
+import rate_limiter
+from rate_limiter import admission_control, ConcurrencyLimiter, InMemoryBucketBackend
+
+
+class AdmissionControlTest(unittest.TestCase):
+    def setUp(self):
+        controller = rate_limiter.admission_controller
+        self.patches = [
+            mock.patch.object(controller, "backend", InMemoryBucketBackend()),
+            mock.patch.object(controller, "limiter", ConcurrencyLimiter(max_concurrent=2, max_queue=0)),
+            mock.patch.object(controller, "enabled", True),
+            mock.patch("admin_api.verify_api_key", lambda api_key: api_key == "valid-key")
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.limiter = controller.limiter
+        
+        app = Flask(__name__)
+        app.secret_key = "test"
+        
+        @app.route("/ping")
+        @admission_control
+        def ping():
+            return "ok"
+        
+        @app.route("/stream")
+        @admission_control
+        def stream():
+            return Response(iter(["a", "b"]))
+        
+        self.client = app.test_client()
+    
+    def tearDown(self):
+        for patch in reversed(self.patches):
+            patch.stop()
+    
+    def statuses(self, count, **kwargs):
+        """Send requests and collect their status codes, closing each response."""
+        statuses = []
+        for _ in range(count):
+            response = self.client.get("/ping", **kwargs)
+            statuses.append(response.status_code)
+            response.close()
+        return statuses
+    
+    def test_api_key_clients_use_only_the_api_key_bucket(self):
+        headers = {"Authorization": "Bearer valid-key"}
+        self.assertEqual(self.statuses(25, headers=headers), [200] * 25)
+        
+        # No session is started for them, so they never share a per-address bucket
+        response = self.client.get("/ping", headers=headers)
+        self.assertNotIn("Set-Cookie", response.headers)
+        response.close()
+    
+    def test_invalid_api_keys_get_the_client_limit(self):
+        self.client = self.client.application.test_client(use_cookies=False)
+        statuses = self.statuses(11, headers={"Authorization": "Bearer wrong-key"})
+        self.assertEqual(statuses[:10], [200] * 10)
+        self.assertEqual(statuses[10], 429)
+    
+    def test_cookieless_clients_are_limited_by_address(self):
+        # A client that never stores the session cookie would get a fresh session each time
+        self.client = self.client.application.test_client(use_cookies=False)
+        statuses = self.statuses(11)
+        self.assertEqual(statuses[:10], [200] * 10)
+        self.assertEqual(statuses[10], 429)
+    
+    def test_streamed_response_holds_its_slot_until_closed(self):
+        response = self.client.get("/stream")
+        self.assertEqual(self.limiter.active, 1)
+        response.close()
+        self.assertEqual(self.limiter.active, 0)
+
+
+class InMemoryBucketBackendTest(unittest.TestCase):
+    def test_denied_request_consumes_no_tokens(self):
+        backend = InMemoryBucketBackend()
+        small = ("small", 0.001, 1)
+        large = ("large", 0.001, 5)
+        
+        self.assertTrue(backend.consume([small, large])[0])
+        self.assertFalse(backend.consume([small, large])[0])
+        
+        # The failed attempt left the large bucket untouched
+        for _ in range(4):
+            self.assertTrue(backend.consume([large])[0])
+        self.assertFalse(backend.consume([large])[0])
+
+
+class ConcurrencyLimiterTest(unittest.TestCase):
+    def test_full_queue_sheds_immediately(self):
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=0)
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire())
+        limiter.release()
+        self.assertTrue(limiter.acquire())
@@ -0,0 +1,65 @@
+"""
+Tests for streamed muse responses: the greeting is sent first, and the turn
+is stored whether or not the consumer reads the rest of the response.
+"""
+
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+import enhanced_response_generator
+from enhanced_response_generator import EnhancedMuseResponseGenerator
+from muse_profiles import get_muse_by_name
+
+
+class ResponseStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.stored = []
+        self.patches = [
+            mock.patch.object(enhanced_response_generator, "get_current_muse",
+                              lambda: get_muse_by_name("Salvatore Inverso")),
+            mock.patch.object(enhanced_response_generator, "extract_user_task", lambda: "help me let go"),
+            mock.patch.object(enhanced_response_generator, "has_conversation_interactions", lambda: False),
+            mock.patch.object(enhanced_response_generator, "get_conversation_context",
+                              lambda user_input: {"current_conversation": [], "memory_context": {"relevant_memories": []}}),
+            mock.patch.object(enhanced_response_generator, "add_conversation_interaction",
+                              lambda user_input, response: self.stored.append((user_input, response))),
+            mock.patch.object(enhanced_response_generator, "is_generation_enabled", lambda: False)
+        ]
+        for patch in self.patches:
+            patch.start()
+        
+        self.app = Flask(__name__)
+        self.app.secret_key = "test"
+    
+    def tearDown(self):
+        for patch in reversed(self.patches):
+            patch.stop()
+    
+    def test_full_stream_stores_the_whole_response(self):
+        with self.app.test_request_context():
+            chunks = list(EnhancedMuseResponseGenerator().generate_response_stream("help me let go"))
+        
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(self.stored, [("help me let go", "".join(chunks))])
+    
+    def test_turn_is_stored_when_the_consumer_stops_after_the_greeting(self):
+        with self.app.test_request_context():
+            stream = EnhancedMuseResponseGenerator().generate_response_stream("help me let go")
+            greeting = next(stream)
+            stream.close()
+        
+        self.assertEqual(len(self.stored), 1)
+        user_input, response = self.stored[0]
+        self.assertEqual(user_input, "help me let go")
+        self.assertTrue(response.startswith(greeting))
+        self.assertGreater(len(response), len(greeting))
+    
+    def test_turn_is_stored_before_the_rest_is_sent(self):
+        with self.app.test_request_context():
+            stream = EnhancedMuseResponseGenerator().generate_response_stream("help me let go")
+            next(stream)
+            remainder = next(stream)
+            self.assertEqual(len(self.stored), 1)
+            self.assertTrue(self.stored[0][1].endswith(remainder))
@@ -0,0 +1,125 @@
+"""
+Tests for the ritual scheduler: cancelling while a job runs, rebuilding from
+the journal, compaction and per-client collection.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import ritual_scheduler
+from ritual_scheduler import RitualScheduler
+
+MUSE = "Salvatore Inverso"
+OWNER = "0123456789abcdef"
+MINUTE = 60 * 1000
+HOUR = 60 * MINUTE
+
+
+class RitualSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.schedule_dir = self.directory.name
+        self.handlers = mock.patch.dict(ritual_scheduler.JOB_HANDLERS, {
+            "ritual": lambda muse_name, params: f"ritual for {params.get('purpose')}",
+            "reflection": lambda muse_name, params: "reflection"
+        })
+        self.handlers.start()
+    
+    def tearDown(self):
+        self.handlers.stop()
+        self.directory.cleanup()
+    
+    def leader(self):
+        """Create a scheduler that runs the jobs, as the process holding the scheduler lock would."""
+        scheduler = RitualScheduler(self.schedule_dir)
+        scheduler.leader = True
+        scheduler._catch_up()
+        return scheduler
+    
+    def test_directory_created_on_first_write(self):
+        schedule_dir = os.path.join(self.schedule_dir, "schedules")
+        scheduler = RitualScheduler(schedule_dir)
+        self.assertFalse(os.path.exists(schedule_dir))
+        
+        scheduler.schedule(OWNER, MUSE, "ritual", 1000)
+        self.assertTrue(os.path.exists(scheduler.journal.path))
+    
+    def test_cancel_while_job_runs(self):
+        scheduler = self.leader()
+        reminder = scheduler.schedule(OWNER, MUSE, "ritual", 1000, repeat_ms=MINUTE)
+        
+        def cancelling_job(muse_name, params):
+            scheduler.cancel(reminder["id"], OWNER)
+            return "ritual"
+        
+        with mock.patch.dict(ritual_scheduler.JOB_HANDLERS, {"ritual": cancelling_job}):
+            self.assertEqual(scheduler.run_due(now=10 * MINUTE), 1)
+        
+        self.assertNotIn(reminder["id"], scheduler.pending)
+        self.assertEqual(scheduler.collect(OWNER, now=10 * MINUTE), [])
+        
+        replayed = self.leader()
+        self.assertNotIn(reminder["id"], replayed.pending)
+        self.assertEqual(replayed.collect(OWNER, now=10 * MINUTE), [])
+    
+    def test_recurring_reminder_is_rescheduled(self):
+        scheduler = self.leader()
+        reminder = scheduler.schedule(OWNER, MUSE, "ritual", 1000, {"purpose": "rest"}, repeat_ms=MINUTE)
+        
+        scheduler.run_due(now=1000)
+        self.assertEqual(scheduler.pending[reminder["id"]][0], 1000 + MINUTE)
+        
+        collected = scheduler.collect(OWNER, now=1000)
+        self.assertEqual([(item["id"], item["content"]) for item in collected], [(reminder["id"], "ritual for rest")])
+    
+    def test_replay_rebuilds_state(self):
+        scheduler = self.leader()
+        prepared = scheduler.schedule(OWNER, MUSE, "ritual", 1000)
+        waiting = scheduler.schedule(OWNER, MUSE, "reflection", 100 * MINUTE)
+        cancelled = scheduler.schedule(OWNER, MUSE, "ritual", 200 * MINUTE)
+        scheduler.cancel(cancelled["id"], OWNER)
+        scheduler.run_due(now=1000)
+        
+        replayed = self.leader()
+        self.assertEqual(set(replayed.pending), {waiting["id"]})
+        self.assertEqual(list(replayed.ready[OWNER]), [prepared["id"]])
+        
+        # Other workers only read the ready log
+        follower = RitualScheduler(self.schedule_dir)
+        self.assertEqual([item["id"] for item in follower.collect(OWNER, now=1000)], [prepared["id"]])
+        self.assertEqual(follower.pending, {})
+        self.assertEqual(replayed.collect(OWNER, now=1000), [])
+    
+    def test_compaction_keeps_live_reminders(self):
+        scheduler = self.leader()
+        follower = RitualScheduler(self.schedule_dir)
+        reminders = [scheduler.schedule(OWNER, MUSE, "ritual", i * HOUR) for i in range(1, 11)]
+        scheduler.run_due(now=5 * HOUR)
+        follower.collect(OWNER, now=2 * HOUR)
+        
+        scheduler.compact()
+        self.assertEqual(scheduler.journal.records, len(scheduler.pending))
+        self.assertEqual(scheduler.ready_log.records, len(scheduler.ready[OWNER]))
+        
+        replayed = self.leader()
+        self.assertEqual(set(replayed.pending), {reminder["id"] for reminder in reminders[5:]})
+        self.assertEqual(replayed.queue and sorted(replayed.queue)[0][1], 6 * HOUR)
+        
+        # A worker that read the logs before compaction picks up the new files
+        collected = follower.collect(OWNER, now=5 * HOUR)
+        self.assertEqual([item["id"] for item in collected], [reminder["id"] for reminder in reminders[2:5]])
+    
+    def test_reminders_are_collected_by_their_owner(self):
+        scheduler = self.leader()
+        reminder = scheduler.schedule(OWNER, MUSE, "ritual", 1000)
+        scheduler.run_due(now=1000)
+        
+        self.assertEqual(scheduler.collect("someone else", now=1000), [])
+        self.assertEqual(scheduler.collect(OWNER, "Another Muse", now=1000), [])
+        self.assertEqual([item["id"] for item in scheduler.collect(OWNER, MUSE, now=1000)], [reminder["id"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
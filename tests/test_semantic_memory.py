@@ -0,0 +1,107 @@
+"""
+Tests for semantic memory retrieval: the partitioned (IVF) vector index and
+keeping a muse's index in line with its saved memories.
+"""
+
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from memory_system import MuseMemory
+from semantic_memory import HashingEmbedder, SemanticMemoryIndex, VectorIndex
+
+
+def random_vectors(count, dimensions=32, seed=0):
+    """Build L2-normalized random vectors."""
+    vectors = np.random.default_rng(seed).normal(size=(count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class VectorIndexTest(unittest.TestCase):
+    def test_partitions_are_built_past_the_threshold(self):
+        index = VectorIndex(32, ivf_threshold=64, ivf_lists=4, ivf_probes=4)
+        vectors = random_vectors(200)
+        index.append(vectors[:64])
+        self.assertIsNone(index.centroids)
+        
+        index.append(vectors[64:])
+        self.assertEqual(len(index.centroids), 4)
+        
+        # Probing every partition finds each stored vector as its own best match
+        for position in (0, 77, 199):
+            self.assertEqual(index.search(vectors[position], 1)[0][0], position)
+    
+    def test_rows_appended_after_training_are_searchable(self):
+        index = VectorIndex(32, ivf_threshold=64, ivf_lists=4, ivf_probes=4)
+        vectors = random_vectors(100)
+        index.append(vectors[:80])
+        for vector in vectors[80:]:
+            index.append(vector)
+        self.assertEqual(index.search(vectors[95], 1)[0][0], 95)
+    
+    def test_dropping_below_the_threshold_removes_partitions(self):
+        index = VectorIndex(32, ivf_threshold=64, ivf_lists=4)
+        vectors = random_vectors(100)
+        index.append(vectors)
+        index.drop_oldest(50)
+        self.assertIsNone(index.centroids)
+        self.assertEqual(index.size, 50)
+        
+        # Positions are relative to the oldest live row
+        self.assertEqual(index.search(vectors[60], 1)[0][0], 10)
+
+
+class MuseMemoryIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        with mock.patch("memory_system.get_config", self.config({"max_memory_entries": 300})):
+            self.memory = MuseMemory(self.directory.name)
+        self.memory.semantic_index = SemanticMemoryIndex(dimensions=256, ivf_threshold=100, ivf_lists=8, ivf_probes=8)
+        self.memory.memory_cache.on_discard = self.memory.semantic_index.discard
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def config(self, overrides):
+        """Wrap get_config so some keys read test values."""
+        from config import get_config
+        return lambda key=None, default=None: overrides[key] if key in overrides else get_config(key, default)
+    
+    def test_configured_cap_lets_the_index_partition(self):
+        for i in range(150):
+            self.memory.add_memory("Eve", f"note {i} about topic{i}", "reply")
+        
+        # The index is built on first search and extended by later writes
+        found = self.memory.get_relevant_memories("Eve", "topic42", max_results=1)
+        self.assertEqual(found[0]["user_input"], "note 42 about topic42")
+        self.memory.add_memory("Eve", "note 150 about topic150", "reply")
+        
+        index = self.memory.semantic_index.indexes["eve"]
+        self.assertEqual(index.size, 151)
+        self.assertIsNotNone(index.centroids)
+        found = self.memory.get_relevant_memories("Eve", "topic150", max_results=1)
+        self.assertEqual(found[0]["user_input"], "note 150 about topic150")
+    
+    def test_append_from_a_stale_base_rebuilds_the_index(self):
+        for i in range(3):
+            self.memory.add_memory("Eve", f"entry{i}", "reply")
+        self.memory.get_relevant_memories("Eve", "entry0")
+        
+        # Another writer's entry lands between this writer's read and its index update
+        stale = self.memory._load_memories("Eve")
+        self.memory.add_memory("Eve", "interloper", "reply")
+        current = self.memory._load_memories("Eve")
+        self.memory.semantic_index.append("eve", stale, current)
+        
+        self.assertNotIn("eve", self.memory.semantic_index.indexes)
+        found = self.memory.get_relevant_memories("Eve", "interloper", max_results=1)
+        self.assertEqual(found[0]["user_input"], "interloper")
+
+
+class HashingEmbedderTest(unittest.TestCase):
+    def test_related_phrasings_share_concepts(self):
+        embedder = HashingEmbedder(64)
+        self.assertIn("release", embedder.concepts("I need to let go"))
+        self.assertIn("release", embedder.concepts("releasing control"))
@@ -0,0 +1,405 @@
+"""
+Muse Summoner System - Text Generation Module
+
+This module connects the muses to an optional text-generation backend.
+Generation requests from concurrent web requests are collected by a
+micro-batching scheduler for a few milliseconds (or until the batch is full)
+and sent to the backend as a single batched call, and each result is handed
+back to the request that asked for it. Several batches can be in flight at
+once (generation.batch_max_in_flight), so one slow backend call does not hold
+up the requests queued behind it.
+
+When no backend is configured, generate_text returns None and callers keep
+using their template responses. The same fallback applies while a backend is
+failing: each call waits at most generation.deadline_ms, and a circuit breaker
+stops sending requests to a backend after repeated failures or missed
+deadlines, so a backend incident cannot tie up web workers.
+
+The HTTP backend posts {"prompts": [...], "max_tokens": n} to the configured
+endpoint and expects {"completions": [...]} in the same order.
+"""
+
+import json
+import time
+import threading
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from config import get_config
+
+
+class GenerationBackend:
+    """Interface for text-generation backends that accept batches of prompts."""
+    
+    name = "base"
+    
+    def generate_batch(self, prompts, max_tokens):
+        """
+        Generate completions for a batch of prompts.
+        
+        Args:
+            prompts (list): The prompts to complete
+            max_tokens (int): Maximum tokens per completion
+        
+        Returns:
+            list: One completion string per prompt, in order
+        """
+        raise NotImplementedError
+
+
+class HTTPGenerationBackend(GenerationBackend):
+    name = "http"
+    
+    def __init__(self, endpoint_url, api_key=None, timeout=30):
+        """
+        Initialize the HTTP backend.
+        
+        Args:
+            endpoint_url (str): URL of the batch completion endpoint
+            api_key (str): Optional bearer token for the endpoint
+            timeout (float): Request timeout in seconds
+        """
+        self.endpoint_url = endpoint_url
+        self.api_key = api_key
+        self.timeout = timeout
+    
+    def generate_batch(self, prompts, max_tokens):
+        """Send one batched request to the endpoint."""
+        body = json.dumps({"prompts": prompts, "max_tokens": max_tokens}).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        
+        request = urllib.request.Request(self.endpoint_url, data=body, headers=headers, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            completions = json.load(response)["completions"]
+        
+        if len(completions) != len(prompts):
+            raise ValueError(f"Backend returned {len(completions)} completions for {len(prompts)} prompts")
+        return completions
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Initialize a closed circuit breaker.
+        
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before a probe is allowed
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+    
+    def allow_request(self):
+        """
+        Check whether a request may be sent to the backend.
+        
+        Once the reset timeout has passed, an open circuit lets a single probe
+        request through; its outcome decides whether the circuit closes again.
+        
+        Returns:
+            bool: True if the request may proceed
+        """
+        with self.lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            
+            if self.state == self.HALF_OPEN:
+                if self.probe_in_flight:
+                    return False
+                self.probe_in_flight = True
+            
+            return True
+    
+    def record_success(self):
+        """
+        Record a successful call: a successful probe closes the circuit, and
+        while closed the failure count starts again.
+        
+        A call admitted before the circuit opened can still succeed while it
+        is open; that says nothing about the backend now, so it is ignored.
+        """
+        with self.lock:
+            if self.state == self.OPEN:
+                return
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+    
+    def record_failure(self):
+        """Count a failed call, opening the circuit at the threshold or after a failed probe."""
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.open_count += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self.probe_in_flight = False
+    
+    def get_state(self):
+        """
+        Get the breaker state for status reporting.
+        
+        Returns:
+            dict: State, consecutive failures, times opened and seconds until a probe
+        """
+        with self.lock:
+            retry_in = 0.0
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.open_count,
+                "retry_in": round(retry_in, 1)
+            }
+
+
+class MicroBatcher:
+    def __init__(self, backend, max_batch_size=8, max_wait_ms=10, max_in_flight=4):
+        """
+        Initialize the micro-batching scheduler.
+        
+        Args:
+            backend (GenerationBackend): The backend that receives batched calls
+            max_batch_size (int): Maximum prompts per backend call
+            max_wait_ms (float): How long the first request in a batch waits for company
+            max_in_flight (int): Backend calls allowed to run at once
+        """
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.pending = []
+        self.condition = threading.Condition()
+        self.stats = {"requests": 0, "batches": 0}  # Updated under the condition
+        
+        # Batches are collected while earlier ones are still running; with every slot busy they grow instead
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="generation-call")
+        self.in_flight = 0
+        self.worker = threading.Thread(target=self._run, name="generation-batcher", daemon=True)
+        self.worker.start()
+    
+    def submit(self, prompt, max_tokens):
+        """
+        Queue a prompt for the next batch.
+        
+        Args:
+            prompt (str): The prompt to complete
+            max_tokens (int): Maximum tokens for the completion
+        
+        Returns:
+            Future: Resolves to the completion string
+        """
+        future = Future()
+        with self.condition:
+            self.pending.append((prompt, max_tokens, future))
+            self.stats["requests"] += 1
+            self.condition.notify()
+        return future
+    
+    def _run(self):
+        """Collect batches and hand them to the call pool, forever."""
+        while True:
+            batch = self._next_batch()
+            
+            # Requests with different limits cannot share one backend call
+            groups = {}
+            for prompt, max_tokens, future in batch:
+                groups.setdefault(max_tokens, []).append((prompt, future))
+            
+            for max_tokens, items in groups.items():
+                self.slots.acquire()
+                with self.condition:
+                    self.in_flight += 1
+                self.executor.submit(self._dispatch, items, max_tokens)
+    
+    def _next_batch(self):
+        """Wait for work, then gather up to max_batch_size items within max_wait."""
+        with self.condition:
+            while not self.pending:
+                self.condition.wait()
+            
+            deadline = time.monotonic() + self.max_wait
+            while len(self.pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            
+            batch = self.pending[:self.max_batch_size]
+            self.pending = self.pending[self.max_batch_size:]
+            return batch
+    
+    def _dispatch(self, items, max_tokens):
+        """Call the backend once for a group and scatter the results, then free the group's slot."""
+        try:
+            # Skip requests whose callers already gave up
+            items = [(prompt, future) for prompt, future in items if future.set_running_or_notify_cancel()]
+            if not items:
+                return
+            
+            with self.condition:
+                self.stats["batches"] += 1
+            try:
+                completions = self.backend.generate_batch([prompt for prompt, future in items], max_tokens)
+            except Exception as e:
+                for prompt, future in items:
+                    future.set_exception(e)
+                return
+            
+            for (prompt, future), completion in zip(items, completions):
+                future.set_result(completion)
+        finally:
+            with self.condition:
+                self.in_flight -= 1
+            self.slots.release()
+    
+    def get_stats(self):
+        """
+        Get batching counters.
+        
+        Returns:
+            dict: Requests and batches sent, backend calls in flight and requests waiting for a batch
+        """
+        with self.condition:
+            stats = dict(self.stats)
+            stats["in_flight"] = self.in_flight
+            stats["queued"] = len(self.pending)
+        return stats
+
+
+class TextGenerator:
+    def __init__(self):
+        """Initialize the text generator from configuration."""
+        self.max_tokens = get_config("generation.max_tokens", 512)
+        self.timeout = get_config("generation.timeout", 30)
+        self.deadline = get_config("generation.deadline_ms", 4000) / 1000.0
+        self.backend = self._create_backend()
+        self.batcher = None
+        self.breakers = {}
+        if self.backend:
+            self.batcher = MicroBatcher(
+                self.backend,
+                max_batch_size=get_config("generation.batch_max_size", 8),
+                max_wait_ms=get_config("generation.batch_max_wait_ms", 10),
+                max_in_flight=get_config("generation.batch_max_in_flight", 4)
+            )
+            self.breakers[self.backend.name] = CircuitBreaker(
+                failure_threshold=get_config("generation.breaker_failure_threshold", 5),
+                reset_timeout=get_config("generation.breaker_reset_timeout", 30)
+            )
+        
+        self.stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "generated": 0, "fallback_circuit_open": 0,
+                      "fallback_deadline": 0, "fallback_error": 0}
+    
+    def _create_backend(self):
+        """Create the configured backend, or None if generation is disabled."""
+        backend_type = get_config("generation.backend", "none")
+        if backend_type == "http" and get_config("generation.endpoint_url"):
+            # Callers stop waiting at the deadline, so a longer call would only hold a slot
+            return HTTPGenerationBackend(
+                get_config("generation.endpoint_url"),
+                api_key=get_config("generation.api_key"),
+                timeout=min(self.timeout, self.deadline)
+            )
+        return None
+    
+    def is_enabled(self):
+        """Check whether a generation backend is configured."""
+        return self.batcher is not None
+    
+    def generate(self, prompt, max_tokens=None):
+        """
+        Generate a completion through the batching scheduler.
+        
+        Args:
+            prompt (str): The prompt to complete
+            max_tokens (int): Maximum tokens for the completion
+        
+        Returns:
+            str: The completion, or None if generation is disabled, the circuit
+                is open, the deadline passed or the backend failed
+        """
+        if not self.batcher:
+            return None
+        
+        breaker = self.breakers[self.backend.name]
+        self._count("requests")
+        if not breaker.allow_request():
+            self._count("fallback_circuit_open")
+            return None
+        
+        future = self.batcher.submit(prompt, max_tokens or self.max_tokens)
+        try:
+            completion = future.result(timeout=self.deadline)
+        except FutureTimeoutError:
+            future.cancel()
+            breaker.record_failure()
+            self._count("fallback_deadline")
+            print(f"Text generation missed its {self.deadline:.1f}s deadline")
+            return None
+        except Exception as e:
+            breaker.record_failure()
+            self._count("fallback_error")
+            print(f"Error generating text: {e}")
+            return None
+        
+        breaker.record_success()
+        self._count("generated")
+        return completion
+    
+    def _count(self, outcome):
+        """Increment a generation outcome counter."""
+        with self.stats_lock:
+            self.stats[outcome] += 1
+    
+    def get_stats(self):
+        """
+        Get generation outcome counters, fallback rate and breaker states.
+        
+        Returns:
+            dict: Counters, the share of requests that fell back to templates,
+                and the state of each backend's circuit breaker
+        """
+        with self.stats_lock:
+            stats = dict(self.stats)
+        fallbacks = stats["fallback_circuit_open"] + stats["fallback_deadline"] + stats["fallback_error"]
+        stats["enabled"] = self.is_enabled()
+        stats["fallback_rate"] = fallbacks / stats["requests"] if stats["requests"] else 0.0
+        stats["breakers"] = {name: breaker.get_state() for name, breaker in self.breakers.items()}
+        stats["batching"] = self.batcher.get_stats() if self.batcher else None
+        return stats
+
+
+# Create a singleton instance for global use
+text_generator = TextGenerator()
+
+def generate_text(prompt, max_tokens=None):
+    """
+    Global function to generate text with the configured backend.
+    Returns None when no backend is configured or generation fails.
+    """
+    return text_generator.generate(prompt, max_tokens)
+
+def is_generation_enabled():
+    """Global function to check whether a generation backend is configured."""
+    return text_generator.is_enabled()
+
+def get_generation_stats():
+    """Global function to get generation counters, fallback rate and circuit breaker states."""
+    return text_generator.get_stats()
@@ -0,0 +1,220 @@
+"""
+Muse Summoner System - Theme Statistics Module
+
+This module keeps running counts of the emotional themes and task types that come
+up in conversations with each muse. Counters and per-day histograms are updated
+as each memory is written, so pattern and trend queries read a handful of
+counters instead of rescanning the conversation history.
+"""
+
+import os
+import copy
+import json
+import datetime
+from config import get_config
+from semantic_memory import HashingEmbedder
+from timestamps import format_timestamp
+from file_locks import file_lock, file_version, read_json, write_json
+
+# Emotional themes the muses track; each is also a concept in the semantic lexicon
+EMOTIONAL_THEMES = [
+    "control", "vulnerability", "connection", "loss",
+    "transformation", "authenticity", "resilience", "joy"
+]
+
+# Task types and their trigger keywords, in the order they are checked
+TASK_TYPE_KEYWORDS = [
+    ("emotional_reflection", ["reflect", "journal", "feeling", "emotion", "process"]),
+    ("heartbreak_grief_processing", ["grief", "loss", "heartbreak", "closure", "heal"]),
+    ("identity_legacy_exploration", ["identity", "legacy", "self", "who am i", "purpose", "values"]),
+    ("creative_co_writing", ["write", "poem", "letter", "essay", "story"]),
+    ("ritual_creation", ["ritual", "mantra", "symbol", "practice", "let go"])
+]
+
+
+def classify_task_type(text):
+    """
+    Determine the task type requested in a piece of text.
+    
+    Args:
+        text (str): The text to classify
+    
+    Returns:
+        str: The first matching task type, or "general"
+    """
+    text_lower = text.lower()
+    for task_type, keywords in TASK_TYPE_KEYWORDS:
+        if any(keyword in text_lower for keyword in keywords):
+            return task_type
+    return "general"
+
+
+class ThemeStatistics:
+    def __init__(self, storage_dir="/tmp/memory_storage"):
+        """
+        Initialize the theme statistics store.
+        
+        Args:
+            storage_dir (str): Directory where statistics files are kept
+        """
+        self.storage_dir = storage_dir
+        self.stats_cache = {}
+        self.stats_versions = {}  # key -> version of the file the cached record was read from or written to
+        self.history_days = get_config("theme_statistics.history_days", 60)  # Days of the daily histogram kept
+        self.concept_matcher = HashingEmbedder(dimensions=1)
+        
+        os.makedirs(self.storage_dir, exist_ok=True)
+    
+    def record(self, key, entry):
+        """
+        Count the themes and task type of a new memory entry.
+        
+        Args:
+            key (str): The memory store key
+            entry (dict): The memory entry that was written
+        """
+        self.record_many(key, [entry])
+    
+    def record_many(self, key, entries):
+        """
+        Count the themes and task types of several memory entries with a single write.
+        
+        Args:
+            key (str): The memory store key
+            entries (list): The memory entries that were written
+        """
+        if not entries:
+            return
+        
+        # Counters are increments, so other workers' writes are reloaded under the lock before adding to them
+        with file_lock(self._stats_file(key)):
+            stats = self._load_stats(key)
+            
+            for entry in entries:
+                themes = self.concept_matcher.concepts(entry["user_input"]).intersection(EMOTIONAL_THEMES)
+                task_type = classify_task_type(entry["user_input"])
+                day = format_timestamp(entry["timestamp"], "%Y-%m-%d")
+                
+                stats["total_entries"] += 1
+                stats["task_types"][task_type] = stats["task_types"].get(task_type, 0) + 1
+                
+                bucket = stats["daily"].setdefault(day, {"entries": 0, "themes": {}})
+                bucket["entries"] += 1
+                for theme in themes:
+                    stats["themes"][theme] = stats["themes"].get(theme, 0) + 1
+                    bucket["themes"][theme] = bucket["themes"].get(theme, 0) + 1
+                
+                if stats["first_seen"] is None or day < stats["first_seen"]:
+                    stats["first_seen"] = day
+                if stats["last_seen"] is None or day > stats["last_seen"]:
+                    stats["last_seen"] = day
+            
+            # Trends only look back a bounded number of days, so older buckets are dropped
+            cutoff = (datetime.date.today() - datetime.timedelta(days=self.history_days)).isoformat()
+            for day in [day for day in stats["daily"] if day < cutoff]:
+                del stats["daily"][day]
+            
+            self._save_stats(key, stats)
+    
+    def get_stats(self, key):
+        """
+        Get the full statistics record for a memory store.
+        
+        Args:
+            key (str): The memory store key
+        
+        Returns:
+            dict: A copy of the totals, theme and task type counters, and the daily histogram of recent days
+        """
+        return copy.deepcopy(self._load_stats(key))
+    
+    def get_theme_trend(self, key, days=7, today=None):
+        """
+        Compare theme mentions in the latest window of days with the window before it.
+        
+        Only history_days of the daily histogram are kept, so windows longer
+        than half of that undercount the previous window.
+        
+        Args:
+            key (str): The memory store key
+            days (int): The length of each window in days
+            today (datetime.date): The last day of the current window (defaults to today)
+        
+        Returns:
+            dict: theme -> {"current": mentions, "previous": mentions}
+        """
+        daily = self._load_stats(key)["daily"]
+        today = today or datetime.date.today()
+        trend = {theme: {"current": 0, "previous": 0} for theme in EMOTIONAL_THEMES}
+        
+        # Walk the 2 * days buckets directly rather than scanning the histogram
+        for offset in range(2 * days):
+            day = (today - datetime.timedelta(days=offset)).isoformat()
+            bucket = daily.get(day)
+            if not bucket:
+                continue
+            window = "current" if offset < days else "previous"
+            for theme, mentions in bucket["themes"].items():
+                trend.setdefault(theme, {"current": 0, "previous": 0})[window] += mentions
+        
+        return trend
+    
+    def clear(self, key):
+        """
+        Reset the statistics for a memory store.
+        
+        Args:
+            key (str): The memory store key
+        """
+        stats_file = self._stats_file(key)
+        with file_lock(stats_file):
+            self.stats_cache.pop(key, None)
+            self.stats_versions.pop(key, None)
+            if os.path.exists(stats_file):
+                try:
+                    os.remove(stats_file)
+                except OSError as e:
+                    print(f"Error clearing theme statistics for {key}: {e}")
+    
+    def _empty_stats(self):
+        """Create an empty statistics record."""
+        return {
+            "total_entries": 0,
+            "themes": {},
+            "task_types": {},
+            "daily": {},
+            "first_seen": None,
+            "last_seen": None
+        }
+    
+    def _load_stats(self, key):
+        """Load the statistics record for a memory store from cache, or from file if another worker changed it."""
+        stats_file = self._stats_file(key)
+        version = file_version(stats_file)
+        if key in self.stats_cache and self.stats_versions.get(key) == version:
+            return self.stats_cache[key]
+        
+        stats = self._empty_stats()
+        try:
+            saved, version = read_json(stats_file)
+            if saved:
+                stats.update(saved)
+        except (json.JSONDecodeError, IOError):
+            pass
+        
+        self.stats_cache[key] = stats
+        self.stats_versions[key] = version
+        return stats
+    
+    def _save_stats(self, key, stats):
+        """Save the statistics record for a memory store."""
+        stats_file = self._stats_file(key)
+        try:
+            write_json(stats_file, stats, indent=None)
+            self.stats_versions[key] = file_version(stats_file)
+        except IOError as e:
+            print(f"Error saving theme statistics for {key}: {e}")
+    
+    def _stats_file(self, key):
+        """Get the statistics file path for a memory store."""
+        return os.path.join(self.storage_dir, f"{key}_themes.json")
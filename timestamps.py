@@ -0,0 +1,82 @@
+"""
+Muse Summoner System - Timestamps Module
+
+This module defines how memory entries are timestamped. Timestamps are integer
+milliseconds since the Unix epoch, so entries sort and compare as plain numbers
+and time windows are found by binary search. Rendering a timestamp as text goes
+through a small cache, because the same recent entries are formatted again on
+every turn.
+
+Entries written by earlier versions carry ISO 8601 strings; to_timestamp
+converts them when they are loaded or imported.
+"""
+
+import math
+import time
+import datetime
+from functools import lru_cache
+
+MILLISECONDS_PER_DAY = 24 * 60 * 60 * 1000
+
+
+def now_timestamp():
+    """
+    Get the current time as a timestamp.
+    
+    Returns:
+        int: Milliseconds since the Unix epoch
+    """
+    return time.time_ns() // 1_000_000
+
+
+def to_timestamp(value):
+    """
+    Convert a stored timestamp to epoch milliseconds.
+    
+    Args:
+        value: Epoch milliseconds, or an ISO 8601 string (local time if it has no offset)
+    
+    Returns:
+        int: Milliseconds since the Unix epoch
+    
+    Raises:
+        ValueError: If the value is not a timestamp
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        return int(datetime.datetime.fromisoformat(value).timestamp() * 1000)
+    raise ValueError(f"Invalid timestamp: {value!r}")
+
+
+@lru_cache(maxsize=4096)
+def format_timestamp(timestamp, fmt="%Y-%m-%d %H:%M"):
+    """
+    Format a timestamp in local time.
+    
+    Args:
+        timestamp (int): Milliseconds since the Unix epoch
+        fmt (str): A strftime format
+    
+    Returns:
+        str: The formatted time
+    """
+    return datetime.datetime.fromtimestamp(timestamp / 1000).strftime(fmt)
+
+
+def days_ago(days, now=None):
+    """
+    Get the timestamp a number of days before now, for since/until windows.
+    
+    Args:
+        days (float): How far back to go
+        now (int): The reference timestamp (defaults to the current time)
+    
+    Returns:
+        int: Milliseconds since the Unix epoch
+    """
+    return (now if now is not None else now_timestamp()) - int(days * MILLISECONDS_PER_DAY)